@@ -0,0 +1,261 @@
+"""
+Async Voice Model API
+=====================
+
+asyncio front end for ZonosVoiceModel, for services that must not block
+their event loop:
+
+- Blocking work runs on a shared, bounded thread pool. Callers beyond its
+  capacity wait asynchronously for a slot (backpressure), instead of piling
+  up in an unbounded executor queue.
+- Cancelling the awaiting task sets the operation's cancel event, so
+  training and synthesis stop at their next checkpoint. The task then waits
+  for the worker thread to finish before it re-raises CancelledError, so a
+  cancelled call never keeps running in the background.
+- Training progress is an async event stream instead of a synchronous
+  callback, and synthesis can be consumed chunk by chunk as an async iterator.
+
+Example:
+    voice = AsyncVoiceModel(ZonosVoiceModel("anna"))
+    await voice.load_voice_model()
+    async for chunk in voice.stream_speech("Hallo Welt. Wie geht es dir?"):
+        player.feed(chunk)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from voice_model import ZonosVoiceModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASYNC_WORKERS = 2
+
+_END = object()
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded number of admitted jobs per event loop.
+    Jobs are callables taking a threading.Event that is set on cancellation.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_ASYNC_WORKERS, max_queued: int = None):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Worker threads
+            max_queued: Jobs admitted beyond the running ones; defaults to
+                        max_workers. Further callers wait for a slot.
+        """
+        self.max_workers = max_workers
+        self.capacity = max_workers + (max_workers if max_queued is None else max_queued)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="AsyncVoiceModel")
+        # asyncio primitives belong to one event loop
+        self._slots: 'weakref.WeakKeyDictionary[Any, asyncio.Semaphore]' = weakref.WeakKeyDictionary()
+        self._slots_lock = threading.Lock()
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        with self._slots_lock:
+            semaphore = self._slots.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.capacity)
+                self._slots[loop] = semaphore
+            return semaphore
+
+    async def run(self, job: Callable[[threading.Event], Any]) -> Any:
+        """
+        Run job(cancel_event) on the pool and return its result.
+
+        Raises:
+            asyncio.CancelledError: If the awaiting task was cancelled; the
+                                    job has finished by then
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        async with self._semaphore(loop):
+            future = loop.run_in_executor(self._pool, job, cancel_event)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                # Keep the slot until the thread is done, then propagate
+                try:
+                    await asyncio.shield(future)
+                except Exception:
+                    pass
+                raise
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+class ProgressStream:
+    """
+    Async iterator over progress values pushed from a worker thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.latest: Optional[int] = None
+
+    def push(self, progress: int):
+        """Thread-safe; usable as a progress_callback."""
+        self._loop.call_soon_threadsafe(self._put, progress)
+
+    def _put(self, progress):
+        if progress is not _END:
+            self.latest = progress
+        self._queue.put_nowait(progress)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, _END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> int:
+        progress = await self._queue.get()
+        if progress is _END:
+            # Let later iterations end as well
+            self._queue.put_nowait(_END)
+            raise StopAsyncIteration
+        return progress
+
+
+class AsyncOperation:
+    """
+    A running background operation: awaitable for its result, with an async
+    progress stream and cancellation.
+    """
+
+    def __init__(self, task: 'asyncio.Task', progress: ProgressStream):
+        self.task = task
+        self.progress = progress
+
+    def __await__(self):
+        return self.task.__await__()
+
+    def cancel(self) -> bool:
+        """Request cancellation; awaiting the operation then raises CancelledError."""
+        return self.task.cancel()
+
+    def done(self) -> bool:
+        return self.task.done()
+
+
+_shared_executor: Optional[BoundedExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_async_executor() -> BoundedExecutor:
+    """
+    Return the process-wide executor, sized by STIMMENKLON_ASYNC_WORKERS (default 2).
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            try:
+                workers = int(os.environ.get('STIMMENKLON_ASYNC_WORKERS', DEFAULT_ASYNC_WORKERS))
+            except ValueError:
+                workers = DEFAULT_ASYNC_WORKERS
+            _shared_executor = BoundedExecutor(max(1, workers))
+        return _shared_executor
+
+
+class AsyncVoiceModel:
+    """
+    asyncio variants of the blocking ZonosVoiceModel methods.
+    """
+
+    def __init__(self, voice_model: ZonosVoiceModel, executor: BoundedExecutor = None):
+        """
+        Initialize the async front end.
+
+        Args:
+            voice_model: The wrapped model; don't call its blocking methods
+                         concurrently with the async ones
+            executor: Executor for blocking work, defaults to get_async_executor()
+        """
+        self.voice_model = voice_model
+        self.executor = executor or get_async_executor()
+
+    async def load_model(self) -> bool:
+        """Load the Zonos backend without blocking the event loop."""
+        return await self.executor.run(lambda cancel_event: self.voice_model.load_model())
+
+    async def load_voice_model(self, model_path: str = None) -> bool:
+        """
+        Load a trained voice. Loading can't be interrupted; on cancellation
+        it completes before CancelledError is raised.
+        """
+        return await self.executor.run(lambda cancel_event: self.voice_model.load_voice_model(model_path))
+
+    def train_voice_model(self, audio_files: List[str], resume: bool = False) -> AsyncOperation:
+        """
+        Start training in the background. Must be called from a running event loop.
+
+        Example:
+            training = voice.train_voice_model(files)
+            async for progress in training.progress:
+                print(f"{progress}%")
+            success = await training
+
+        Returns:
+            AsyncOperation resolving to True if training succeeded
+        """
+        loop = asyncio.get_running_loop()
+        progress = ProgressStream(loop)
+
+        async def run():
+            try:
+                return await self.executor.run(
+                    lambda cancel_event: self.voice_model.train_voice_model(
+                        audio_files, progress.push, cancel_event, resume=resume))
+            finally:
+                progress.close()
+
+        return AsyncOperation(loop.create_task(run()), progress)
+
+    async def synthesize_speech(self, text: str, output_path: str = None,
+                                conditioning: Dict[str, Any] = None,
+                                sample_rate: int = None) -> Optional[str]:
+        """
+        Synthesize text to a file without blocking the event loop.
+
+        Returns:
+            Path to the generated audio file, or None if synthesis failed
+        """
+        return await self.executor.run(
+            lambda cancel_event: self.voice_model.synthesize_speech(
+                text, output_path, cancel_event, conditioning=conditioning,
+                sample_rate=sample_rate))
+
+    async def stream_speech(self, text: str, conditioning: Dict[str, Any] = None,
+                            sample_rate: int = None) -> AsyncIterator[Any]:
+        """
+        Synthesize text segment by segment, yielding each audio chunk as soon
+        as it is generated. Each chunk takes one executor slot, so long texts
+        don't starve other callers.
+
+        Raises:
+            RuntimeError: If no voice is loaded
+        """
+        cancel_event = threading.Event()
+        chunks = self.voice_model.iter_speech_chunks(text, cancel_event, conditioning, sample_rate)
+        try:
+            while True:
+                chunk = await self.executor.run(lambda _: next(chunks, _END))
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            cancel_event.set()
+            chunks.close()
@@ -0,0 +1,333 @@
+"""
+Audio Analysis for Voice Training
+=================================
+
+Vectorized (NumPy) analysis stages applied to training audio before it is
+passed to the Zonos speaker encoder:
+
+- Frame-energy voice-activity detection (VAD) that drops silence and pauses,
+  processed block by block so long files stream through in bounded memory
+- Quality scoring of fixed-length segments (clipping, estimated SNR, RMS
+  level, spectral flatness), also streamable, and selection of the best
+  segments up to a training-time budget
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def to_numpy(audio):
+    """
+    Convert a mono torch tensor or array-like to a float32 NumPy array.
+    """
+    if hasattr(audio, 'detach'):
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32).ravel()
+
+
+def frame_energy_db(frames) -> 'np.ndarray':
+    """
+    Mean energy per frame in dBFS for a (num_frames, frame_size) array.
+    """
+    energy = np.mean(np.square(frames, dtype=np.float64), axis=1)
+    return 10.0 * np.log10(energy + 1e-12)
+
+
+class EnergyVAD:
+    """
+    Streaming frame-energy voice-activity detector.
+
+    A frame counts as speech when its energy exceeds both an absolute floor
+    (`threshold_db`) and the tracked noise floor plus `margin_db`. The noise
+    floor follows the quietest frames (minimum statistics): it drops to any
+    quieter frame at once but rises by at most `noise_rise_db` per second, so
+    long stretches of speech without pauses are not mistaken for noise.
+    Speech decisions are extended by a hangover so word endings and short
+    pauses inside phrases are kept. Partial frames, the noise floor and
+    hangover state carry across blocks, so long files can be streamed through
+    block by block in bounded memory, with the same result for any block size.
+    """
+
+    def __init__(self, sample_rate: int = 44100, frame_ms: float = 30.0,
+                 threshold_db: float = -50.0, margin_db: float = 10.0,
+                 hangover_ms: float = 200.0, noise_rise_db: float = 2.0):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate: Sample rate of the audio fed to process()
+            frame_ms: Analysis frame length in milliseconds
+            threshold_db: Absolute energy floor (dBFS) below which frames are silence
+            margin_db: Required energy above the tracked noise floor
+            hangover_ms: How long speech decisions are held after speech ends
+            noise_rise_db: Maximum rise of the noise floor estimate per second
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for voice-activity detection")
+
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(sample_rate * frame_ms / 1000.0))
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.hangover_frames = int(round(hangover_ms / frame_ms))
+        self.noise_rise_per_frame = noise_rise_db * frame_ms / 1000.0
+        self.reset()
+
+    def reset(self):
+        """Clear streaming state and statistics."""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        # Start where only the absolute floor applies; louder noise is learned
+        self._noise_floor_db = self.threshold_db - self.margin_db
+        self._frames_since_speech = self.hangover_frames + 1
+        self.total_samples = 0
+        self.speech_samples = 0
+
+    def process(self, block) -> 'np.ndarray':
+        """
+        Feed a block of mono audio and return the samples classified as speech.
+        """
+        block = to_numpy(block)
+        self.total_samples += len(block)
+        samples = np.concatenate([self._remainder, block]) if len(self._remainder) else block
+
+        num_frames = len(samples) // self.frame_size
+        usable = num_frames * self.frame_size
+        self._remainder = samples[usable:].copy()
+        if num_frames == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        frames = samples[:usable].reshape(num_frames, self.frame_size)
+        keep = self._speech_mask(frame_energy_db(frames))
+
+        speech = frames[keep].ravel()
+        self.speech_samples += len(speech)
+        return speech
+
+    def flush(self) -> 'np.ndarray':
+        """
+        Return the trailing partial frame if the detector is still in speech.
+        """
+        remainder, self._remainder = self._remainder, np.zeros(0, dtype=np.float32)
+        if len(remainder) and self._frames_since_speech <= self.hangover_frames:
+            self.speech_samples += len(remainder)
+            return remainder
+        return np.zeros(0, dtype=np.float32)
+
+    def process_array(self, audio, block_size: int = None) -> 'np.ndarray':
+        """
+        Run a whole signal through the detector block by block.
+        """
+        audio = to_numpy(audio)
+        block_size = block_size or self.sample_rate * 10
+        kept = [self.process(audio[start:start + block_size])
+                for start in range(0, len(audio), block_size)]
+        kept.append(self.flush())
+        return np.concatenate(kept) if kept else np.zeros(0, dtype=np.float32)
+
+    def _speech_mask(self, energy_db) -> 'np.ndarray':
+        # Noise floor per frame: floor[i] = min(floor[i - 1] + rise, energy[i]),
+        # unrolled as a running minimum so it needs no Python loop
+        rise = self.noise_rise_per_frame * np.arange(1, len(energy_db) + 1)
+        floor = np.minimum.accumulate(np.minimum(energy_db - rise, self._noise_floor_db)) + rise
+        self._noise_floor_db = float(floor[-1])
+
+        active = energy_db > np.maximum(self.threshold_db, floor + self.margin_db)
+
+        # Hangover: frames since the last speech frame, carried across blocks
+        indices = np.arange(len(active))
+        last_speech = np.where(active, indices, -1)
+        np.maximum.accumulate(last_speech, out=last_speech)
+        since = np.where(last_speech >= 0, indices - last_speech,
+                         self._frames_since_speech + indices + 1)
+        self._frames_since_speech = int(since[-1])
+        return since <= self.hangover_frames
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'seconds': self.total_samples / self.sample_rate,
+            'speech_seconds': self.speech_samples / self.sample_rate,
+            'speech_ratio': round(self.speech_ratio, 4),
+        }
+
+
+def summarize_vad(per_file: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Aggregate per-file VAD stats into totals and the share of embedding
+    compute saved by dropping non-speech audio.
+    """
+    if not per_file:
+        return None
+    total = sum(stats['seconds'] for stats in per_file.values())
+    speech = sum(stats['speech_seconds'] for stats in per_file.values())
+    return {
+        'files': per_file,
+        'total_seconds': round(total, 3),
+        'speech_seconds': round(speech, 3),
+        'compute_saved_ratio': round(1.0 - speech / total, 4) if total else 0.0,
+    }
+
+
+# Weights of the individual quality metrics in the combined segment score
+QUALITY_WEIGHTS = {'snr': 0.4, 'level': 0.2, 'flatness': 0.2, 'clipping': 0.2}
+
+
+def _segment_metrics(segments, frame_size: int) -> Dict[str, 'np.ndarray']:
+    """
+    Quality metrics for each row of a (num_segments, segment_length) array.
+    """
+    num_frames = segments.shape[1] // frame_size
+    frames = segments[:, :num_frames * frame_size].reshape(len(segments), num_frames, frame_size)
+
+    clipping = np.mean(np.abs(segments) >= 0.999, axis=1)
+    rms_db = 10.0 * np.log10(np.mean(np.square(segments, dtype=np.float64), axis=1) + 1e-12)
+
+    # SNR estimate: loud frames (speech) versus quiet frames (noise floor)
+    energy_db = 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=2) + 1e-12)
+    snr_db = np.percentile(energy_db, 90, axis=1) - np.percentile(energy_db, 10, axis=1)
+
+    # Spectral flatness of the average power spectrum: ~1 for noise, low for speech
+    power = np.mean(np.abs(np.fft.rfft(frames * np.hanning(frame_size), axis=2)) ** 2, axis=1) + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return {'clipping_ratio': clipping, 'rms_db': rms_db, 'snr_db': snr_db, 'spectral_flatness': flatness}
+
+
+def _combined_score(metrics: Dict[str, 'np.ndarray']) -> 'np.ndarray':
+    snr_score = np.clip(metrics['snr_db'] / 30.0, 0.0, 1.0)
+    level_score = np.clip(1.0 - np.abs(metrics['rms_db'] + 20.0) / 25.0, 0.0, 1.0)
+    flatness_score = 1.0 - np.clip(metrics['spectral_flatness'], 0.0, 1.0)
+    clipping_score = np.clip(1.0 - metrics['clipping_ratio'] * 100.0, 0.0, 1.0)
+    return (QUALITY_WEIGHTS['snr'] * snr_score + QUALITY_WEIGHTS['level'] * level_score +
+            QUALITY_WEIGHTS['flatness'] * flatness_score + QUALITY_WEIGHTS['clipping'] * clipping_score)
+
+
+def score_segments(audio, sample_rate: int, segment_seconds: float = 5.0,
+                   min_segment_seconds: float = 1.0, frame_size: int = 1024,
+                   batch_size: int = 32) -> List[Dict[str, Any]]:
+    """
+    Split mono audio into segments and score each one for training quality.
+
+    Metrics are computed vectorized over batches of segments, so memory
+    stays bounded for long recordings. A trailing segment shorter than
+    `min_segment_seconds` is dropped.
+
+    Returns:
+        List of dicts with start/end sample, the individual metrics and a
+        combined 'score' between 0 and 1 (higher is better)
+    """
+    audio = to_numpy(audio)
+    segment_length = int(segment_seconds * sample_rate)
+    min_length = max(int(min_segment_seconds * sample_rate), frame_size)
+
+    bounds = [(start, min(start + segment_length, len(audio)))
+              for start in range(0, len(audio), segment_length)]
+    bounds = [(start, end) for start, end in bounds if end - start >= min_length]
+
+    results = []
+    full = [b for b in bounds if b[1] - b[0] == segment_length]
+    partial = [b for b in bounds if b[1] - b[0] != segment_length]
+
+    for group in [full[i:i + batch_size] for i in range(0, len(full), batch_size)] + \
+            [[b] for b in partial]:
+        segments = np.stack([audio[start:end] for start, end in group])
+        metrics = _segment_metrics(segments, frame_size)
+        scores = _combined_score(metrics)
+        for i, (start, end) in enumerate(group):
+            entry = {name: round(float(values[i]), 4) for name, values in metrics.items()}
+            entry.update({'start': start, 'end': end, 'score': round(float(scores[i]), 4)})
+            results.append(entry)
+
+    results.sort(key=lambda entry: entry['start'])
+    return results
+
+
+class StreamingSegmentScorer:
+    """
+    Scores fixed-length segments of a stream as they complete.
+
+    Feeding a signal block by block yields the same segment boundaries and
+    scores as score_segments() on the whole signal, while holding at most
+    `batch_size` segments of audio.
+    """
+
+    def __init__(self, sample_rate: int, segment_seconds: float = 5.0,
+                 min_segment_seconds: float = 1.0, frame_size: int = 1024,
+                 batch_size: int = 32):
+        self.sample_rate = sample_rate
+        self.segment_seconds = segment_seconds
+        self.min_segment_seconds = min_segment_seconds
+        self.frame_size = frame_size
+        self.batch_size = batch_size
+        self.segment_length = int(segment_seconds * sample_rate)
+        self._pending = []
+        self._pending_samples = 0
+        self._offset = 0
+
+    def feed(self, block) -> List[Dict[str, Any]]:
+        """
+        Add audio and return the scores of all segments it completes in full batches.
+        """
+        block = to_numpy(block)
+        if len(block):
+            self._pending.append(block)
+            self._pending_samples += len(block)
+        if self._pending_samples < self.segment_length * self.batch_size:
+            return []
+        usable = (self._pending_samples // self.segment_length) * self.segment_length
+        return self._score(usable)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Score the remaining audio, including a trailing partial segment.
+        """
+        return self._score(self._pending_samples)
+
+    def _score(self, usable: int) -> List[Dict[str, Any]]:
+        if not usable:
+            return []
+        audio = np.concatenate(self._pending)
+        rest = audio[usable:]
+        self._pending = [rest] if len(rest) else []
+        self._pending_samples = len(rest)
+
+        scored = score_segments(audio[:usable], self.sample_rate, self.segment_seconds,
+                                self.min_segment_seconds, self.frame_size, self.batch_size)
+        for entry in scored:
+            entry['start'] += self._offset
+            entry['end'] += self._offset
+        self._offset += usable
+        return scored
+
+
+def select_best_segments(candidates: List[Dict[str, Any]], sample_rate: int,
+                         budget_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Pick the highest-scoring segments until the seconds budget is used up.
+
+    Each candidate needs 'start', 'end' and 'score'; the selection is returned
+    in the original candidate order.
+    """
+    budget = int(budget_seconds * sample_rate)
+    ranked = sorted(range(len(candidates)), key=lambda i: candidates[i]['score'], reverse=True)
+
+    selected, used = set(), 0
+    for index in ranked:
+        length = candidates[index]['end'] - candidates[index]['start']
+        if used + length > budget:
+            continue
+        selected.add(index)
+        used += length
+    return [candidate for i, candidate in enumerate(candidates) if i in selected]
@@ -0,0 +1,253 @@
+"""
+Duplicate Audio Detection
+=========================
+
+Finds duplicate training files before they are preprocessed, so the same
+take selected twice (or a trimmed export of it) is decoded, scored and
+embedded only once:
+
+- Exact duplicates are found by a streamed SHA-256 of the file contents.
+- Near duplicates (trimmed, re-encoded or level-changed copies) are found
+  with a cheap spectral fingerprint: the audio is streamed at 8 kHz, and
+  every 16 ms frame is reduced to 32 bits, the signs of the band-energy
+  differences across 33 log-spaced bands between 300 and 2000 Hz and across
+  time. Two files are aligned by voting on the offsets of matching frame
+  hashes and compared by their bit error rate at the best offset.
+
+Of a group of near duplicates the longest file is kept. Without NumPy and
+libsndfile only exact duplicates are detected.
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from audio_io import AUDIO_IO_AVAILABLE, duration_seconds, iter_audio_blocks
+
+logger = logging.getLogger(__name__)
+
+if AUDIO_IO_AVAILABLE:
+    import numpy as np
+else:
+    np = None
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+FINGERPRINT_RATE = 8000
+RESAMPLER_TAPS = 8  # a short filter is plenty below 2 kHz
+FRAME_SIZE = 1024
+HOP_SIZE = 128
+NUM_BANDS = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+
+# Two fingerprints match if at most this share of their bits differ at the
+# best alignment, and the aligned part covers most of the shorter file
+MAX_BIT_ERROR_RATE = 0.25
+MIN_OVERLAP_RATIO = 0.8
+MIN_OVERLAP_SECONDS = 2.0
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def _band_matrix() -> 'np.ndarray':
+    """(frequency bins, bands) matrix summing FFT power into log-spaced bands."""
+    frequencies = np.fft.rfftfreq(FRAME_SIZE, 1.0 / FINGERPRINT_RATE)
+    edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+    band = np.searchsorted(edges, frequencies, side='right') - 1
+    inside = np.nonzero((band >= 0) & (band < NUM_BANDS))[0]
+    matrix = np.zeros((len(frequencies), NUM_BANDS), dtype=np.float32)
+    matrix[inside, band[inside]] = 1.0
+    return matrix
+
+
+def audio_fingerprint(file_path: str) -> 'np.ndarray':
+    """
+    Compute the spectral fingerprint of a file, one uint32 per frame.
+
+    The file is streamed block by block; only one block of frames is held
+    in memory at a time.
+    """
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    bands = _band_matrix()
+    buffer = np.zeros(0, dtype=np.float32)
+    previous = None
+    hashes = []
+
+    for block in iter_audio_blocks(file_path, FINGERPRINT_RATE, taps=RESAMPLER_TAPS):
+        buffer = np.concatenate([buffer, block])
+        count = (len(buffer) - FRAME_SIZE) // HOP_SIZE + 1
+        if count <= 0:
+            continue
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, FRAME_SIZE)[::HOP_SIZE][:count]
+        power = np.square(np.abs(np.fft.rfft(frames * window, axis=1)))
+        energy = np.log(power.astype(np.float32) @ bands + 1e-10)
+        slope = energy[:, :-1] - energy[:, 1:]
+        if previous is not None:
+            slope = np.concatenate([previous, slope])
+        previous = slope[-1:]
+        bits = (slope[1:] - slope[:-1]) > 0
+        if len(bits):
+            hashes.append(np.packbits(bits, axis=1, bitorder='little').view('<u4').ravel())
+        buffer = buffer[count * HOP_SIZE:]
+
+    return np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint32)
+
+
+def _informative_frames(fingerprint) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Hashes and positions of frames, without hashes that repeat often (silence, hum)."""
+    _, inverse, counts = np.unique(fingerprint, return_inverse=True, return_counts=True)
+    keep = counts[inverse] <= max(4, len(fingerprint) // 200)
+    positions = np.nonzero(keep)[0]
+    return fingerprint[positions], positions
+
+
+def compare_fingerprints(first, second) -> Tuple[float, int]:
+    """
+    Align two fingerprints and compare them.
+
+    The offset is the most common position difference of identical frame
+    hashes; the bit error rate is then measured over the overlapping frames.
+
+    Returns:
+        Tuple of (bit error rate in [0, 1], overlapping frames); (1.0, 0)
+        if the fingerprints share no frame hash
+    """
+    first_hashes, first_positions = _informative_frames(first)
+    second_hashes, second_positions = _informative_frames(second)
+    order = np.argsort(second_hashes, kind='stable')
+    sorted_hashes = second_hashes[order]
+    sorted_positions = second_positions[order]
+
+    left = np.searchsorted(sorted_hashes, first_hashes, side='left')
+    counts = np.searchsorted(sorted_hashes, first_hashes, side='right') - left
+    total = int(counts.sum())
+    if not total:
+        return 1.0, 0
+
+    # Every (first, second) pair of identical hashes votes for one offset
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    matched = sorted_positions[np.repeat(left, counts) + within]
+    shifts = matched - np.repeat(first_positions, counts) + len(first)
+    offset = int(np.bincount(shifts).argmax()) - len(first)
+
+    start = max(0, -offset)
+    stop = min(len(first), len(second) - offset)
+    overlap = stop - start
+    if overlap <= 0:
+        return 1.0, 0
+    difference = np.bitwise_xor(first[start:stop], second[start + offset:stop + offset])
+    errors = int(np.unpackbits(difference.view(np.uint8)).sum())
+    return errors / (32.0 * overlap), overlap
+
+
+def is_near_duplicate(first, second) -> Tuple[bool, float]:
+    """
+    Decide whether two fingerprints belong to the same recording.
+
+    Returns:
+        Tuple of (match, similarity in [0, 1] = 1 - bit error rate)
+    """
+    if not len(first) or not len(second):
+        return False, 0.0
+    error_rate, overlap = compare_fingerprints(first, second)
+    min_overlap = max(MIN_OVERLAP_RATIO * min(len(first), len(second)),
+                      MIN_OVERLAP_SECONDS * FINGERPRINT_RATE / HOP_SIZE)
+    return error_rate <= MAX_BIT_ERROR_RATE and overlap >= min_overlap, 1.0 - error_rate
+
+
+def deduplicate_audio_files(audio_files: List[str], near_duplicates: bool = True,
+                            cancel_check: Callable[[], None] = None,
+                            progress_callback: Callable[[str], None] = None
+                            ) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Drop exact and near-duplicate files from a training selection.
+
+    Args:
+        audio_files: Paths of the selected (valid) audio files
+        near_duplicates: Also detect trimmed or re-encoded copies; needs NumPy
+        cancel_check: Called before each file; may raise to abort
+        progress_callback: Called with each file once it has been checked
+
+    Returns:
+        Tuple of (unique files in their original order, report). The report
+        lists every skipped file with the file it duplicates, the reason
+        ('identical' or 'near_duplicate') and the similarity, plus the
+        skipped audio duration and the time spent on fingerprinting.
+    """
+    start = time.perf_counter()
+    skipped = []
+    by_hash: Dict[str, str] = {}
+    candidates = []
+    for file_path in audio_files:
+        if cancel_check:
+            cancel_check()
+        try:
+            digest = content_hash(file_path)
+        except OSError as e:
+            logger.warning(f"Could not hash {file_path}: {e}")
+            candidates.append(file_path)
+            continue
+        if digest in by_hash:
+            skipped.append({'file': file_path, 'duplicate_of': by_hash[digest],
+                            'reason': 'identical', 'similarity': 1.0})
+            if progress_callback:
+                progress_callback(file_path)
+        else:
+            by_hash[digest] = file_path
+            candidates.append(file_path)
+
+    if near_duplicates and AUDIO_IO_AVAILABLE and len(candidates) > 1:
+        fingerprints = {}
+        for file_path in candidates:
+            if cancel_check:
+                cancel_check()
+            try:
+                fingerprints[file_path] = audio_fingerprint(file_path)
+            except Exception as e:
+                logger.warning(f"Could not fingerprint {file_path}: {e}")
+            if progress_callback:
+                progress_callback(file_path)
+
+        # Longest first, so the most complete take of a recording is kept
+        kept: List[str] = []
+        for file_path in sorted(fingerprints, key=lambda path: -len(fingerprints[path])):
+            for other in kept:
+                match, similarity = is_near_duplicate(fingerprints[file_path], fingerprints[other])
+                if match:
+                    skipped.append({'file': file_path, 'duplicate_of': other,
+                                    'reason': 'near_duplicate', 'similarity': round(similarity, 3)})
+                    break
+            else:
+                kept.append(file_path)
+        kept_files = set(kept)
+        candidates = [path for path in candidates if path in kept_files or path not in fingerprints]
+
+    skipped_seconds = 0.0
+    for entry in skipped:
+        try:
+            skipped_seconds += duration_seconds(entry['file']) if AUDIO_IO_AVAILABLE else 0.0
+        except Exception:
+            pass
+        logger.info(f"Skipping {os.path.basename(entry['file'])}: {entry['reason'].replace('_', ' ')} "
+                    f"to {os.path.basename(entry['duplicate_of'])}")
+
+    report = {
+        'files': len(audio_files),
+        'unique': len(candidates),
+        'skipped': skipped,
+        'skipped_audio_seconds': skipped_seconds,
+        'fingerprint_seconds': time.perf_counter() - start,
+    }
+    return candidates, report
@@ -0,0 +1,391 @@
+"""
+Chunked Audio Reading
+=====================
+
+Reads training audio block by block, so long recordings (multi-hour podcast
+uploads) never have to be decoded into memory in full:
+
+    decode block -> mono -> resample (filter state carried across blocks) -> downstream
+
+Peak memory is bounded by the block size and the resampling filter length,
+independent of the file duration. Plain PCM/float WAV files are memory-mapped
+and converted to float32 one block at a time; other formats are decoded
+through libsndfile, and formats it cannot read fall back to a whole-file
+torchaudio decode.
+"""
+
+import functools
+import logging
+import mmap
+import os
+import struct
+from collections import namedtuple
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    import soundfile as sf
+    AUDIO_IO_AVAILABLE = True
+except ImportError:
+    np = None
+    sf = None
+    AUDIO_IO_AVAILABLE = False
+
+TARGET_SAMPLE_RATE = 44100
+BLOCK_SECONDS = 10.0
+
+AudioInfo = namedtuple('AudioInfo', ['sample_rate', 'frames', 'channels'])
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> NumPy dtype of one sample in the data chunk
+_WAV_SAMPLE_TYPES = {
+    (WAVE_FORMAT_PCM, 16): '<i2',
+    (WAVE_FORMAT_PCM, 24): 'u1',
+    (WAVE_FORMAT_PCM, 32): '<i4',
+    (WAVE_FORMAT_IEEE_FLOAT, 32): '<f4',
+}
+
+
+class MappedWav:
+    """
+    Memory-mapped view of the data chunk of a RIFF/WAVE file.
+
+    `frames` is a NumPy view of shape (num_frames, channels), or
+    (num_frames, channels, 3) raw bytes for 24-bit PCM; read() converts a
+    range of frames to float32 in [-1, 1], and release() drops pages that
+    were already read so a sequential pass keeps the resident set flat.
+    """
+
+    def __init__(self, file_path: str, sample_rate: int, channels: int, format_tag: int,
+                 bits: int, data_offset: int, data_size: int):
+        self.file_path = file_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits = bits
+        self.dtype = np.dtype(_WAV_SAMPLE_TYPES[(format_tag, bits)])
+        self.frame_bytes = channels * bits // 8
+        self.num_frames = data_size // self.frame_bytes
+        self.data_offset = data_offset
+        shape = (self.num_frames, channels, 3) if bits == 24 else (self.num_frames, channels)
+
+        self._mmap = None
+        self._released = 0
+        if self.num_frames:
+            with open(file_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            count = self.num_frames * self.frame_bytes // self.dtype.itemsize
+            self.frames = np.frombuffer(self._mmap, dtype=self.dtype, count=count,
+                                        offset=data_offset).reshape(shape)
+        else:
+            self.frames = np.zeros(shape, self.dtype)
+
+    @classmethod
+    def open(cls, file_path: str) -> Optional['MappedWav']:
+        """
+        Map a WAV file, or return None if it is not a supported PCM/float WAV.
+        """
+        try:
+            header = parse_wav_header(file_path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if header is None:
+            return None
+        return cls(file_path, **header)
+
+    def read(self, start: int, stop: int) -> 'np.ndarray':
+        """
+        Convert frames [start, stop) to a float32 (frames, channels) array.
+        """
+        block = self.frames[start:stop]
+        if self.bits == 16:
+            return block.astype(np.float32) * np.float32(1.0 / 32768)
+        if self.bits == 24:
+            raw = (block[..., 0].astype(np.int32) | (block[..., 1].astype(np.int32) << 8)
+                   | (block[..., 2].astype(np.int8).astype(np.int32) << 16))
+            return raw.astype(np.float32) * np.float32(1.0 / 8388608)
+        if self.dtype.kind == 'i':
+            return (block.astype(np.float64) * (1.0 / 2147483648)).astype(np.float32)
+        return np.array(block, dtype=np.float32)
+
+    def release(self, stop: int):
+        """
+        Tell the kernel the mapped pages before frame `stop` are no longer needed.
+        """
+        if self._mmap is None or not hasattr(self._mmap, 'madvise'):
+            return
+        end = min(self.data_offset + stop * self.frame_bytes, len(self._mmap))
+        end = end // mmap.PAGESIZE * mmap.PAGESIZE
+        if end > self._released:
+            self._mmap.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+            self._released = end
+
+    def close(self):
+        self.frames = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # views handed out by `frames` still reference the mapping
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_wav_header(file_path: str) -> Optional[dict]:
+    """
+    Locate the fmt and data chunks of a RIFF/WAVE file.
+
+    Returns:
+        Keyword arguments for MappedWav, or None if the file is not a WAV
+        with a sample format the fast path supports
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            return None
+
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                format_tag, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]  # first bytes of the subformat GUID
+                fmt = (format_tag, channels, sample_rate, bits)
+                f.seek(chunk_size & 1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                format_tag, channels, sample_rate, bits = fmt
+                if (format_tag, bits) not in _WAV_SAMPLE_TYPES or not channels:
+                    return None
+                data_offset = f.tell()
+                # Streamed writers may leave the size unset; trust the file length instead
+                data_size = min(chunk_size, file_size - data_offset)
+                return {'sample_rate': sample_rate, 'channels': channels, 'format_tag': format_tag,
+                        'bits': bits, 'data_offset': data_offset, 'data_size': data_size}
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def audio_info(file_path: str) -> AudioInfo:
+    """
+    Read sample rate, length and channel count from the file header only.
+    """
+    try:
+        info = sf.info(file_path)
+        return AudioInfo(info.samplerate, info.frames, info.channels)
+    except Exception:
+        import torchaudio
+        info = torchaudio.info(file_path)
+        return AudioInfo(info.sample_rate, info.num_frames, info.num_channels)
+
+
+def duration_seconds(file_path: str) -> float:
+    info = audio_info(file_path)
+    return info.frames / info.sample_rate if info.sample_rate else 0.0
+
+
+def scan_audio_files(file_paths) -> Dict[str, Optional[AudioInfo]]:
+    """
+    Read the header of every file (no decoding); None for files whose
+    header can't be read.
+    """
+    infos = {}
+    for file_path in file_paths:
+        try:
+            infos[file_path] = audio_info(file_path)
+        except Exception:
+            infos[file_path] = None
+    return infos
+
+
+def decoded_bytes(info: AudioInfo) -> int:
+    """Size of a file decoded to float32 at its native rate."""
+    return info.frames * info.channels * 4
+
+
+def iter_decoded_blocks(file_path: str, block_frames: int) -> Iterator['np.ndarray']:
+    """
+    Decode a file into (frames, channels) float32 blocks at its native rate.
+    """
+    wav = MappedWav.open(file_path) if file_path.lower().endswith(('.wav', '.wave')) else None
+    if wav is not None:
+        with wav:
+            for start in range(0, wav.num_frames, block_frames):
+                yield wav.read(start, start + block_frames)
+                wav.release(start + block_frames)
+        return
+
+    try:
+        handle = sf.SoundFile(file_path)
+    except Exception:
+        handle = None
+
+    if handle is None:
+        # libsndfile can't read this format (e.g. m4a): decode it in one go
+        import torchaudio
+        logger.debug(f"Chunked decode unavailable for {file_path}, loading whole file")
+        audio, _ = torchaudio.load(file_path)
+        audio = audio.numpy().T
+        for start in range(0, len(audio), block_frames):
+            yield audio[start:start + block_frames]
+        return
+
+    with handle:
+        for block in handle.blocks(blocksize=block_frames, dtype='float32', always_2d=True):
+            yield block
+
+
+@functools.lru_cache(maxsize=16)
+def polyphase_filter(up: int, down: int, taps: int = 32, rolloff: float = 0.94) -> 'np.ndarray':
+    """
+    Kaiser-windowed sinc low-pass for rational resampling by up/down,
+    split into `up` phases.
+
+    `taps` counts coefficients per phase when upsampling. When downsampling
+    the cutoff moves down with the output rate, so each phase gets
+    ceil(down / up) times as many coefficients to keep the transition band
+    the same fraction of the output Nyquist.
+    """
+    taps *= max(1, -(-down // up))
+    length = taps * up
+    cutoff = rolloff * 0.5 / max(up, down)  # in cycles per upsampled sample
+    k = np.arange(length) - length // 2
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * k) * np.kaiser(length, 8.6) * up
+    phases = np.ascontiguousarray(h.reshape(taps, up).T, dtype=np.float32)
+    phases.setflags(write=False)
+    return phases
+
+
+class StreamingResampler:
+    """
+    Polyphase resampler for mono float32 audio fed in arbitrary blocks.
+
+    Input history is carried between blocks, so feeding a signal block by
+    block and calling flush() gives the same output as resampling it in one
+    call. The filter delay is compensated, and the output has
+    ceil(input_length * target_rate / orig_rate) samples.
+    """
+
+    OUTPUT_CHUNK = 32768
+
+    def __init__(self, orig_rate: int, target_rate: int, taps: int = 32):
+        """
+        Initialize the resampler.
+
+        Args:
+            orig_rate: Sample rate of the input
+            target_rate: Sample rate of the output
+            taps: Filter taps per polyphase branch (quality versus speed),
+                scaled up by polyphase_filter() when downsampling
+        """
+        gcd = np.gcd(int(orig_rate), int(target_rate))
+        self.up = int(target_rate) // gcd
+        self.down = int(orig_rate) // gcd
+        self.passthrough = self.up == self.down
+        self._filter = None if self.passthrough else polyphase_filter(self.up, self.down, taps)
+        self.taps = taps if self.passthrough else self._filter.shape[1]
+        self._delay = (self.taps * self.up) // 2
+        self.reset()
+
+    def reset(self):
+        """Clear the carried input history."""
+        self._buffer = np.zeros(self.taps - 1, dtype=np.float32)
+        self._buffer_start = -(self.taps - 1)  # input index of _buffer[0]
+        self._consumed = 0
+        self._next_output = 0
+
+    def process(self, block) -> 'np.ndarray':
+        """
+        Feed a block of input and return all output samples it completes.
+        """
+        block = np.asarray(block, dtype=np.float32)
+        if self.passthrough:
+            return block
+        self._buffer = np.concatenate([self._buffer, block])
+        self._consumed += len(block)
+        # Output n needs input up to (n * down + delay) // up
+        ready = (self._consumed * self.up - 1 - self._delay) // self.down + 1
+        return self._emit(max(ready, self._next_output))
+
+    def flush(self) -> 'np.ndarray':
+        """
+        Return the remaining output, treating the input as zero past its end.
+        """
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        total = -(-self._consumed * self.up // self.down)
+        if total <= self._next_output:
+            return np.zeros(0, dtype=np.float32)
+        last_input = ((total - 1) * self.down + self._delay) // self.up
+        missing = last_input - (self._buffer_start + len(self._buffer) - 1)
+        if missing > 0:
+            self._buffer = np.concatenate([self._buffer, np.zeros(missing, dtype=np.float32)])
+        return self._emit(total)
+
+    def resample(self, audio) -> 'np.ndarray':
+        """
+        Resample a whole signal in one call (resets the stream state).
+        """
+        self.reset()
+        out = [self.process(audio), self.flush()]
+        self.reset()
+        return np.concatenate(out)
+
+    def _emit(self, end: int) -> 'np.ndarray':
+        chunks = []
+        offsets = np.arange(self.taps)
+        for start in range(self._next_output, end, self.OUTPUT_CHUNK):
+            n = np.arange(start, min(start + self.OUTPUT_CHUNK, end), dtype=np.int64)
+            t = n * self.down + self._delay
+            rows = (t // self.up - self._buffer_start)[:, None] - offsets
+            chunks.append(np.einsum('ij,ij->i', self._buffer[rows], self._filter[t % self.up]))
+        self._next_output = max(end, self._next_output)
+
+        # Drop input history no future output can reach
+        first_needed = (self._next_output * self.down + self._delay) // self.up - (self.taps - 1)
+        drop = first_needed - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+def iter_audio_blocks(file_path: str, target_rate: int = TARGET_SAMPLE_RATE,
+                      block_seconds: float = BLOCK_SECONDS, taps: int = 32) -> Iterator['np.ndarray']:
+    """
+    Stream a file as mono float32 blocks at target_rate, resampled with
+    `taps` filter taps per polyphase branch.
+
+    Channels are averaged before resampling; both steps are linear, so this
+    matches resampling every channel and downmixing afterwards at a fraction
+    of the cost.
+    """
+    info = audio_info(file_path)
+    resampler = StreamingResampler(info.sample_rate, target_rate, taps)
+    block_frames = max(1, int(info.sample_rate * block_seconds))
+
+    for block in iter_decoded_blocks(file_path, block_frames):
+        mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+        out = resampler.process(mono)
+        if len(out):
+            yield out
+    tail = resampler.flush()
+    if len(tail):
+        yield tail
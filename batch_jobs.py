@@ -0,0 +1,358 @@
+"""
+Bulk Voice Jobs
+===============
+
+Runs training and synthesis for many voices in one process. Work is spread
+over a thread pool that shares the process-wide Zonos backend, so torch is
+imported and the model loaded only once.
+
+- Bulk training: every subdirectory of a root directory is one speaker.
+  Progress is appended to a JSONL manifest as each speaker finishes; an
+  interrupted run resumes by skipping speakers already recorded as done.
+- Bulk synthesis: job records (voice, text, output, format and optional
+  language, speaking_rate, pitch_std, emotion, sample_rate) are streamed
+  from a JSONL or CSV file in fixed-size windows, grouped by voice so each
+  embedding is loaded once, and their status lines appended to a results
+  file. Jobs whose output already exists are skipped, so reruns are
+  incremental and memory stays flat regardless of the job file size.
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from conditioning_cache import DEFAULT_CONDITIONING
+from voice_model import ZonosVoiceModel
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a')
+MANIFEST_NAME = ".stimmenklon_manifest.jsonl"
+
+
+def find_audio_files(directory: str) -> List[str]:
+    """
+    Audio files directly inside a directory, sorted by name.
+    """
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def find_speakers(root_dir: str) -> Dict[str, List[str]]:
+    """
+    Map each speaker subdirectory of root_dir to its audio files.
+    Subdirectories without audio files are ignored.
+    """
+    speakers = {}
+    for name in sorted(os.listdir(root_dir)):
+        path = os.path.join(root_dir, name)
+        if name.startswith('.') or not os.path.isdir(path):
+            continue
+        files = find_audio_files(path)
+        if files:
+            speakers[name] = files
+    return speakers
+
+
+class Manifest:
+    """
+    Append-only JSONL record of finished work items, safe to share between
+    threads. The last record per key wins; a truncated last line from an
+    interrupted run is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.records[record['key']] = record
+                    except (ValueError, KeyError):
+                        continue
+
+    def is_done(self, key: str) -> bool:
+        return self.records.get(key, {}).get('status') == 'done'
+
+    def append(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records[record['key']] = record
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _train_speaker(name: str, files: List[str], model_options: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    voice_model = ZonosVoiceModel(name, **model_options)
+    try:
+        success = voice_model.train_voice_model(files, resume=True)
+        error = None if success else "training failed"
+    except Exception as e:
+        success, error = False, str(e)
+
+    scanned = voice_model.training_report.get('input') or {}
+    return {
+        'key': name,
+        'status': 'done' if success else 'failed',
+        'error': error,
+        'files': len(files),
+        'audio_seconds': scanned.get('audio_seconds'),
+        'seconds': round(time.perf_counter() - start, 3),
+        'finished_at': time.time(),
+    }
+
+
+def train_many(root_dir: str, workers: int = 2, manifest_path: str = None,
+               model_options: Dict[str, Any] = None,
+               on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Train one voice model per speaker subdirectory of root_dir.
+
+    Args:
+        root_dir: Directory with one subdirectory of audio files per speaker
+        workers: Number of speakers trained concurrently
+        manifest_path: Progress manifest, defaults to <root_dir>/.stimmenklon_manifest.jsonl
+        model_options: Extra ZonosVoiceModel keyword arguments
+        on_result: Called with each speaker's manifest record as it finishes
+
+    Returns:
+        Summary with counts, failures and throughput
+    """
+    manifest = Manifest(manifest_path or os.path.join(root_dir, MANIFEST_NAME))
+    speakers = find_speakers(root_dir)
+    pending = {name: files for name, files in speakers.items() if not manifest.is_done(name)}
+    skipped = len(speakers) - len(pending)
+    logger.info(f"Bulk training: {len(speakers)} speakers, {skipped} already done, "
+                f"{len(pending)} to train with {workers} workers")
+
+    # Load the shared backend once up front instead of in every worker
+    if pending and not ZonosVoiceModel("bulk", **(model_options or {})).load_model():
+        raise RuntimeError("Zonos TTS backend could not be loaded")
+
+    start = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="train") as pool:
+        futures = [pool.submit(_train_speaker, name, files, model_options or {})
+                   for name, files in pending.items()]
+        for future in as_completed(futures):
+            record = future.result()
+            manifest.append(record)
+            results.append(record)
+            if on_result:
+                on_result(record)
+    wall_seconds = time.perf_counter() - start
+
+    done = [r for r in results if r['status'] == 'done']
+    failed = [r for r in results if r['status'] != 'done']
+    audio_seconds = sum(r['audio_seconds'] or 0.0 for r in done)
+    return {
+        'speakers': len(speakers),
+        'skipped': skipped,
+        'trained': len(done),
+        'failed': len(failed),
+        'failures': {r['key']: r['error'] for r in failed},
+        'wall_seconds': round(wall_seconds, 3),
+        'speakers_per_minute': round(len(done) / wall_seconds * 60, 2) if wall_seconds > 0 else None,
+        'audio_seconds_per_second': round(audio_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+        'manifest': manifest.path,
+    }
+
+
+def read_job_records(jobs_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream job records from a JSONL file, or a CSV file with a header row.
+
+    Each record gets a 'line' number; unparsable JSON lines are yielded as
+    records with an 'error' so they show up in the results.
+    """
+    with open(jobs_path, 'r', encoding='utf-8', newline='') as f:
+        if jobs_path.lower().endswith('.csv'):
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield dict(row, line=line)
+            return
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+                if not isinstance(record, dict):
+                    raise ValueError("record is not an object")
+            except ValueError as e:
+                record = {'error': f"invalid job record: {e}"}
+            record['line'] = line
+            yield record
+
+
+def job_output_path(job: Dict[str, Any]) -> str:
+    """
+    Output path of a job, with the extension implied by its format.
+
+    Raises:
+        ValueError: If the job has no output or the extension contradicts the format
+    """
+    output = job.get('output')
+    if not output:
+        raise ValueError("job has no output path")
+    fmt = (job.get('format') or '').lower().lstrip('.')
+    ext = os.path.splitext(output)[1].lower().lstrip('.')
+    if fmt and not ext:
+        return f"{output}.{fmt}"
+    if fmt and ext != fmt:
+        raise ValueError(f"output extension '.{ext}' does not match format '{fmt}'")
+    return output
+
+
+class _VoiceCache:
+    """
+    Small LRU cache of loaded voice models, so memory does not grow with
+    the number of distinct voices in a job file.
+    """
+
+    def __init__(self, capacity: int, model_options: Dict[str, Any]):
+        self.capacity = max(1, capacity)
+        self.model_options = model_options
+        self.loads = 0
+        self._models: 'OrderedDict[str, Optional[ZonosVoiceModel]]' = OrderedDict()
+
+    def get(self, voice: str) -> Optional[ZonosVoiceModel]:
+        if voice in self._models:
+            self._models.move_to_end(voice)
+            return self._models[voice]
+        voice_model = ZonosVoiceModel(voice, **self.model_options)
+        self.loads += 1
+        if not voice_model.load_voice_model():
+            voice_model = None
+        self._models[voice] = voice_model
+        if len(self._models) > self.capacity:
+            self._models.popitem(last=False)
+        return voice_model
+
+
+def _synthesize_job(job: Dict[str, Any], voice_model: Optional[ZonosVoiceModel],
+                    output_path: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    error = None
+    if voice_model is None:
+        error = f"voice model not found: {job['voice']}"
+    else:
+        # Render next to the target and rename, so an existing output is always complete
+        base, ext = os.path.splitext(output_path)
+        tmp_path = f"{base}.tmp{os.getpid()}-{threading.get_ident()}{ext}"
+        try:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            conditioning = {key: job[key] for key in DEFAULT_CONDITIONING if job.get(key) not in (None, '')}
+            sample_rate = int(job['sample_rate']) if job.get('sample_rate') not in (None, '') else None
+            if voice_model.synthesize_speech(str(job['text']), tmp_path, conditioning=conditioning,
+                                             sample_rate=sample_rate):
+                os.replace(tmp_path, output_path)
+            else:
+                error = "synthesis failed"
+        except Exception as e:
+            error = str(e)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return {
+        'line': job['line'],
+        'id': job.get('id'),
+        'voice': job['voice'],
+        'output': output_path,
+        'status': 'failed' if error else 'done',
+        'error': error,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def synthesize_jobs(jobs_path: str, results_path: str = None, workers: int = 2,
+                    window: int = 256, voice_cache_size: int = 8,
+                    model_options: Dict[str, Any] = None,
+                    on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Synthesize every job of a JSONL/CSV job file.
+
+    Jobs are read in windows of `window` records; within a window they are
+    grouped by voice and synthesized by `workers` threads. Only one window
+    and at most `voice_cache_size` voice embeddings are held in memory.
+
+    Args:
+        jobs_path: Job file with 'voice', 'text', 'output' and optional 'format'/'id'/'sample_rate'
+        results_path: JSONL file status lines are appended to, defaults to <jobs_path>.results.jsonl
+        workers: Number of jobs synthesized concurrently
+        window: Number of job records read and grouped at a time
+        voice_cache_size: Number of loaded voice embeddings kept between windows
+        model_options: Extra ZonosVoiceModel keyword arguments
+        on_result: Called with each job's status line as it finishes
+
+    Returns:
+        Summary with counts and throughput
+    """
+    results_path = results_path or f"{jobs_path}.results.jsonl"
+    voices = _VoiceCache(voice_cache_size, model_options or {})
+    counts = {'done': 0, 'failed': 0, 'skipped': 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    with open(results_path, 'a', encoding='utf-8') as results, \
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="synth") as pool:
+
+        def record_result(result):
+            with lock:
+                counts[result['status']] += 1
+                results.write(json.dumps(result, ensure_ascii=False) + "\n")
+                results.flush()
+            if on_result:
+                on_result(result)
+
+        def run_window(jobs):
+            futures = []
+            for job in sorted(jobs, key=lambda j: str(j.get('voice') or '')):
+                result = {'line': job['line'], 'id': job.get('id'), 'voice': job.get('voice'),
+                          'output': job.get('output'), 'status': 'failed', 'error': job.get('error'),
+                          'seconds': 0.0}
+                try:
+                    if result['error'] is None:
+                        if not job.get('voice') or not job.get('text'):
+                            raise ValueError("job needs 'voice' and 'text'")
+                        result['output'] = job_output_path(job)
+                except ValueError as e:
+                    result['error'] = str(e)
+
+                if result['error']:
+                    record_result(result)
+                elif os.path.exists(result['output']):
+                    record_result(dict(result, status='skipped'))
+                else:
+                    futures.append(pool.submit(_synthesize_job, job, voices.get(job['voice']),
+                                               result['output']))
+            for future in as_completed(futures):
+                record_result(future.result())
+
+        jobs = []
+        for job in read_job_records(jobs_path):
+            jobs.append(job)
+            if len(jobs) >= window:
+                run_window(jobs)
+                jobs = []
+        if jobs:
+            run_window(jobs)
+
+    wall_seconds = time.perf_counter() - start
+    logger.info(f"Bulk synthesis finished: {counts} in {wall_seconds:.1f}s")
+    return dict(counts,
+                voice_loads=voices.loads,
+                wall_seconds=round(wall_seconds, 3),
+                jobs_per_second=round(counts['done'] / wall_seconds, 2) if wall_seconds > 0 else None,
+                results=results_path)
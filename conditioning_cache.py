@@ -0,0 +1,155 @@
+"""
+Conditioning Cache
+==================
+
+Per-voice speaker conditioning state for synthesis. The conditioning
+prefix depends only on the voice and the conditioning settings (language,
+speaking rate, pitch variation, emotion), not on the text, so it is
+computed once and reused by every request for that voice:
+
+- Entries are kept in a process-wide LRU, keyed by a digest of the speaker
+  embedding, the normalized settings and the backend configuration
+  (precision and compile mode) that computed them. Retraining a voice
+  changes its embedding and therefore its key, so stale state is never
+  served.
+- Optionally the state is persisted as a sidecar file next to the voice's
+  model file, so new processes (CLI runs, workers) start hot. A sidecar
+  records the embedding digest it was computed from and is ignored if
+  it no longer matches. The model store removes sidecars whenever the
+  model file is replaced.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONDITIONING = {
+    'language': 'de',
+    'speaking_rate': 15.0,  # phonemes per second
+    'pitch_std': 20.0,      # pitch variation
+    'emotion': None,        # emotion name or weight vector, None for neutral
+}
+SIDECAR_PREFIX = "cond-"
+
+
+def normalize_conditioning(conditioning: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Merge conditioning overrides into DEFAULT_CONDITIONING.
+
+    Raises:
+        ValueError: For unknown settings or non-numeric rate/pitch values
+    """
+    conditioning = {k: v for k, v in (conditioning or {}).items() if v is not None}
+    unknown = set(conditioning) - set(DEFAULT_CONDITIONING)
+    if unknown:
+        raise ValueError(f"Unknown conditioning settings: {sorted(unknown)}")
+
+    params = dict(DEFAULT_CONDITIONING, **conditioning)
+    params['language'] = str(params['language']).lower()
+    params['speaking_rate'] = float(params['speaking_rate'])
+    params['pitch_std'] = float(params['pitch_std'])
+    emotion = params['emotion']
+    if emotion is not None and not isinstance(emotion, str):
+        params['emotion'] = tuple(float(w) for w in emotion)
+    return params
+
+
+def conditioning_key(params: Dict[str, Any], backend_key: str = '') -> str:
+    """Short stable hash of normalized conditioning settings and the backend configuration."""
+    encoded = json.dumps([params, backend_key], sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def embedding_digest(speaker_embedding) -> str:
+    """Hash of a speaker embedding's values."""
+    try:
+        data = speaker_embedding.detach().cpu().float().numpy().tobytes()
+    except AttributeError:
+        data = repr(getattr(speaker_embedding, 'data', speaker_embedding)).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+class ConditioningCache:
+    """
+    Thread-safe LRU of per-voice conditioning state.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'sidecar_hits': 0, 'misses': 0, 'compute_seconds': 0.0}
+
+    def get(self, speaker_embedding, params: Dict[str, Any], compute: Callable[[], Any],
+            store=None, voice_name: str = None, backend_key: str = '') -> Any:
+        """
+        Return the conditioning state for a voice and settings, computing it on a miss.
+
+        Args:
+            speaker_embedding: The voice's speaker embedding
+            params: Normalized conditioning settings
+            compute: Called without arguments to build the state on a miss
+            store: ModelStore to persist the state in, or None for memory only
+            voice_name: Name of the voice in the store
+            backend_key: Backend configuration the state is computed with
+                         (e.g. precision and compile mode); states of
+                         different configurations are never shared
+
+        Returns:
+            The conditioning state
+        """
+        digest = embedding_digest(speaker_embedding)
+        params_key = conditioning_key(params, backend_key)
+        key = (digest, params_key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+
+        state = None
+        tag = SIDECAR_PREFIX + params_key
+        if store is not None and voice_name:
+            persisted = store.load_sidecar(voice_name, tag)
+            if isinstance(persisted, dict) and persisted.get('embedding_digest') == digest:
+                state = persisted['state']
+                with self._lock:
+                    self.stats['sidecar_hits'] += 1
+
+        if state is None:
+            start = time.perf_counter()
+            state = compute()
+            with self._lock:
+                self.stats['misses'] += 1
+                self.stats['compute_seconds'] += time.perf_counter() - start
+            if store is not None and voice_name:
+                try:
+                    store.save_sidecar(voice_name, tag, {'embedding_digest': digest, 'params': params,
+                                                         'backend': backend_key, 'state': state})
+                except Exception as e:
+                    logger.warning(f"Could not persist conditioning of {voice_name}: {e}")
+
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return state
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache = ConditioningCache()
+
+
+def get_conditioning_cache() -> ConditioningCache:
+    """Return the process-wide conditioning cache."""
+    return _shared_cache
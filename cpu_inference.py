@@ -0,0 +1,715 @@
+"""
+CPU Inference Optimizations
+===========================
+
+Opt-in helpers for running Zonos TTS inference efficiently on CPU-only
+servers and Android devices:
+
+- Low-precision inference: dynamic int8 quantization of linear layers or
+  bfloat16 autocast where the CPU supports it
+- Compiled inference: TorchScript tracing or torch.compile per input shape,
+  with fallback to eager execution
+- On-disk cache for converted and compiled model artifacts so conversions
+  run only once
+- Shared weights (opt-in): a backend checkpoint converted once into a cache
+  file that every process memory-maps onto a backend built without weights,
+  so startup reads no weights and processes share page-cache pages instead
+  of each keeping a private copy
+- Thread configuration: explicit intra-/inter-op thread counts, per-call
+  limits and per-machine autotuned settings applied at load
+- Small measurement helpers (RSS, spectral distance) used by the benchmarks
+"""
+
+import contextlib
+import hashlib
+import itertools
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Supported precision modes
+PRECISION_FP32 = 'fp32'
+PRECISION_INT8 = 'int8'
+PRECISION_BF16 = 'bf16'
+PRECISIONS = (PRECISION_FP32, PRECISION_INT8, PRECISION_BF16)
+
+# Supported compile modes
+COMPILE_EAGER = 'eager'
+COMPILE_TRACE = 'trace'
+COMPILE_TORCH = 'compile'
+COMPILE_MODES = (COMPILE_EAGER, COMPILE_TRACE, COMPILE_TORCH)
+
+# Smallest input-length bucket; larger inputs are rounded up to a power of two
+MIN_SHAPE_BUCKET = 256
+
+# Traced graphs kept in memory per CompiledBackend (least recently used are dropped)
+MAX_GRAPHS = 16
+
+
+def get_cache_dir(subdir: str = None) -> str:
+    """
+    Return the directory used for converted model artifacts.
+
+    Defaults to ~/.stimmenklon_cache, overridable via STIMMENKLON_CACHE_DIR.
+    """
+    cache_dir = os.environ.get('STIMMENKLON_CACHE_DIR') or \
+        os.path.join(os.path.expanduser("~"), ".stimmenklon_cache")
+    if subdir:
+        cache_dir = os.path.join(cache_dir, subdir)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def default_precision() -> str:
+    """
+    Precision mode from STIMMENKLON_PRECISION, falling back to fp32.
+    """
+    precision = os.environ.get('STIMMENKLON_PRECISION', PRECISION_FP32).lower()
+    if precision not in PRECISIONS:
+        logger.warning(f"Unknown precision '{precision}', using {PRECISION_FP32}")
+        return PRECISION_FP32
+    return precision
+
+
+def default_compile_mode() -> str:
+    """
+    Compile mode from STIMMENKLON_COMPILE, falling back to eager.
+    """
+    mode = os.environ.get('STIMMENKLON_COMPILE', COMPILE_EAGER).lower()
+    if mode not in COMPILE_MODES:
+        logger.warning(f"Unknown compile mode '{mode}', using {COMPILE_EAGER}")
+        return COMPILE_EAGER
+    return mode
+
+
+def default_mmap_weights() -> bool:
+    """
+    Whether to memory-map backend weights, from STIMMENKLON_MMAP_WEIGHTS
+    (disabled unless set to 1/true/on).
+    """
+    return os.environ.get('STIMMENKLON_MMAP_WEIGHTS', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def default_weights_path() -> Optional[str]:
+    """
+    Backend checkpoint (a state dict) to map weights from, from STIMMENKLON_WEIGHTS.
+    """
+    return os.environ.get('STIMMENKLON_WEIGHTS') or None
+
+
+def bf16_supported() -> bool:
+    """
+    Check whether this CPU has native bfloat16 support.
+    """
+    if torch is None:
+        return False
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def weights_digest(module) -> str:
+    """
+    Digest of a module's state dict (names, shapes, dtypes and values).
+
+    Hashes every tensor, so it costs about one pass over the weights; it is
+    only computed when a cached artifact is looked up.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for name, value in module.state_dict().items():
+        if not torch.is_tensor(value):
+            digest.update(f"{name}={value!r}".encode('utf-8'))
+            continue
+        tensor = value.detach().cpu()
+        if tensor.is_quantized:
+            tensor = tensor.int_repr()
+        digest.update(f"{name}:{tuple(tensor.shape)}:{tensor.dtype}".encode('utf-8'))
+        digest.update(tensor.contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _versions_key() -> str:
+    zonos_module = sys.modules.get('zonos')
+    zonos_version = getattr(zonos_module, '__version__', 'unknown')
+    torch_version = getattr(torch, '__version__', 'none')
+    return f"zonos{zonos_version}-torch{torch_version}"
+
+
+def backend_cache_key(backend) -> str:
+    """
+    Key for cached artifacts of a backend: backend type, Zonos version,
+    torch version and a digest of the weights, so neither upgrades nor
+    updated model weights ever pick up stale conversions.
+    """
+    key = f"{type(backend).__name__}-{_versions_key()}"
+    module = _as_module(backend)
+    if module is not None:
+        key += f"-w{weights_digest(module)}"
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+
+def _as_module(backend):
+    if torch is not None and isinstance(backend, torch.nn.Module):
+        return backend
+    return None
+
+
+def _atomic_torch_save(obj, path: str):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_or_quantize_int8(backend):
+    """
+    Return a dynamically int8-quantized copy of the backend's linear layers.
+
+    The quantized module is cached on disk and reused by later processes.
+    Backends that are not torch modules are returned unchanged.
+    """
+    module = _as_module(backend)
+    if module is None:
+        logger.warning("Backend is not a torch module, int8 quantization skipped")
+        return backend
+
+    cache_file = os.path.join(get_cache_dir('quantized'), f"{backend_cache_key(backend)}-int8.pt")
+
+    if os.path.exists(cache_file):
+        try:
+            quantized = torch.load(cache_file, map_location='cpu', weights_only=False)
+            logger.info(f"Loaded int8 backend from cache: {cache_file}")
+            return quantized
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable quantized cache {cache_file}: {e}")
+
+    logger.info("Quantizing backend linear layers to int8...")
+    quantized = torch.ao.quantization.quantize_dynamic(
+        module.eval(), {torch.nn.Linear}, dtype=torch.qint8
+    )
+    try:
+        _atomic_torch_save(quantized, cache_file)
+        logger.info(f"Cached int8 backend: {cache_file}")
+    except Exception as e:
+        logger.warning(f"Could not cache quantized backend: {e}")
+    return quantized
+
+
+def checkpoint_cache_key(weights_path: str) -> str:
+    """
+    Key for artifacts derived from a checkpoint file: Zonos and torch
+    versions plus the file's identity (absolute path, size and mtime), so it
+    costs one stat() instead of a pass over the weights.
+    """
+    stat = os.stat(weights_path)
+    identity = f"{os.path.abspath(weights_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+    name = os.path.splitext(os.path.basename(weights_path))[0]
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', f"{name}-{_versions_key()}-c{digest}")
+
+
+def load_backend_mapped(factory: Callable[[], Any], weights_path: str):
+    """
+    Create the backend with its weights memory-mapped from a shared cache file.
+
+    <cache>/weights/<key>-fp32.pt holds the checkpoint's state dict in a
+    mappable layout and is keyed by checkpoint_cache_key(). Once it exists,
+    the backend is constructed on the meta device (no weight memory is
+    allocated or initialized) and the read-only (copy-on-write) mapping is
+    attached, so startup reads no weights and all processes on the host
+    share the same page-cache pages. The first load constructs the backend
+    normally, loads the checkpoint and writes the cache file.
+
+    Args:
+        factory: Called without arguments to construct the backend
+                 architecture, e.g. zonos.TTS; the checkpoint replaces its weights
+        weights_path: Checkpoint file with the backend's state dict
+
+    Returns:
+        The backend; with private weights if it is not a torch module or
+        mapping is not possible
+    """
+    try:
+        cache_file = os.path.join(get_cache_dir('weights'), f"{checkpoint_cache_key(weights_path)}-fp32.pt")
+    except OSError as e:
+        logger.warning(f"Backend checkpoint not found, weights not mapped: {e}")
+        return factory()
+
+    if os.path.exists(cache_file):
+        with torch.device('meta'):
+            backend = factory()
+        module = _as_module(backend)
+        if module is None:
+            return backend
+        try:
+            state = torch.load(cache_file, map_location='cpu', mmap=True, weights_only=True)
+            module.load_state_dict(state, strict=True, assign=True)
+            if not any(t.is_meta for t in itertools.chain(module.parameters(), module.buffers())):
+                logger.info("Mapped backend weights from the shared weight cache")
+                return module.eval()
+            logger.warning("Backend has tensors outside its state dict, constructing it normally")
+        except Exception as e:
+            logger.warning(f"Ignoring unusable weight cache {cache_file}: {e}")
+
+    backend = factory()
+    module = _as_module(backend)
+    if module is None:
+        return backend
+    module.load_state_dict(torch.load(weights_path, map_location='cpu', weights_only=True))
+    if not os.path.exists(cache_file):
+        try:
+            _atomic_torch_save({k: v.detach().contiguous() for k, v in module.state_dict().items()},
+                               cache_file)
+            logger.info(f"Cached backend weights for memory mapping: {cache_file}")
+        except Exception as e:
+            logger.warning(f"Could not cache backend weights: {e}")
+    return module.eval()
+
+
+def shape_bucket(length: int, minimum: int = MIN_SHAPE_BUCKET) -> int:
+    """
+    Round an input length up to its shape bucket (next power of two).
+    """
+    bucket = minimum
+    while bucket < length:
+        bucket *= 2
+    return bucket
+
+
+class CompiledBackend:
+    """
+    Runs a backend module traced or compiled, one graph per input shape.
+    
+    Graphs are built for the exact input shapes by default, which is correct
+    for any module. With pad_to_bucket, inputs are zero-padded along
+    `length_dim` to a power-of-two bucket and outputs trimmed back, so only a
+    few graphs are ever built; that is only valid for modules that are
+    pointwise along that dimension (no normalization, attention or pooling
+    over time), since everything else sees the padding.
+    
+    Traced graphs are saved to the cache directory keyed by backend version,
+    weights, precision and shape, so restarts load instead of re-tracing, and
+    at most MAX_GRAPHS are kept in memory; torch.compile uses a persistent
+    inductor cache in the same directory. Any compile or runtime failure
+    falls back to eager execution.
+    
+    Attribute access is delegated to the wrapped module, so the rest of the
+    backend API keeps working.
+    """
+    
+    def __init__(self, module, mode: str, cache_key: str, length_dim: int = -1,
+                 pad_to_bucket: bool = False):
+        self.module = module
+        self.mode = mode
+        self.cache_key = cache_key
+        self.length_dim = length_dim
+        self.pad_to_bucket = pad_to_bucket
+        self.stats: Dict[str, Any] = {'compile_seconds': {}, 'cache_hits': 0, 'fallbacks': 0}
+        self._graphs: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._torch_compiled = None
+        self._disabled = mode == COMPILE_EAGER
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, name):
+        if name == 'module':
+            raise AttributeError(name)
+        return getattr(self.module, name)
+    
+    def __call__(self, *inputs):
+        if self._disabled or not inputs or not torch.is_tensor(inputs[0]):
+            return self.module(*inputs)
+        
+        length = inputs[0].shape[self.length_dim]
+        bucket = shape_bucket(length) if self.pad_to_bucket else length
+        padded = tuple(self._pad(t, length, bucket) for t in inputs)
+        shapes = tuple(tuple(t.shape) if torch.is_tensor(t) else None for t in padded)
+        
+        try:
+            graph = self._graph_for(shapes, padded)
+            with torch.inference_mode():
+                output = graph(*padded)
+        except Exception as e:
+            logger.warning(f"Compiled inference failed ({self.mode}), falling back to eager: {e}")
+            self.stats['fallbacks'] += 1
+            self._disabled = True
+            return self.module(*inputs)
+        
+        if (bucket != length and torch.is_tensor(output) and output.dim() > 0
+                and output.shape[self.length_dim] == bucket):
+            output = output.narrow(self.length_dim % output.dim(), 0, length)
+        return output
+    
+    def _pad(self, tensor, length: int, bucket: int):
+        if not torch.is_tensor(tensor) or tensor.dim() == 0 or tensor.shape[self.length_dim] != length:
+            return tensor
+        if bucket == length:
+            return tensor
+        pad_shape = list(tensor.shape)
+        pad_shape[self.length_dim] = bucket - length
+        padding = torch.zeros(pad_shape, dtype=tensor.dtype, device=tensor.device)
+        return torch.cat([tensor, padding], dim=self.length_dim)
+    
+    def _graph_for(self, shapes, example_inputs):
+        with self._lock:
+            if shapes in self._graphs:
+                self._graphs.move_to_end(shapes)
+                return self._graphs[shapes]
+            
+            start = time.perf_counter()
+            if self.mode == COMPILE_TRACE:
+                graph = self._load_or_trace(shapes, example_inputs)
+            else:
+                graph = self._compile()
+            self.stats['compile_seconds'][_shape_name(shapes)] = time.perf_counter() - start
+            self._graphs[shapes] = graph
+            if len(self._graphs) > MAX_GRAPHS:
+                self._graphs.popitem(last=False)
+            return graph
+    
+    def _load_or_trace(self, shapes, example_inputs):
+        cache_file = os.path.join(get_cache_dir('compiled'),
+                                  f"{self.cache_key}-trace-{_shape_name(shapes)}.pt")
+        
+        if os.path.exists(cache_file):
+            try:
+                graph = torch.jit.load(cache_file, map_location='cpu')
+                self.stats['cache_hits'] += 1
+                logger.info(f"Loaded traced graph from cache: {cache_file}")
+                return graph
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable traced graph {cache_file}: {e}")
+        
+        logger.info(f"Tracing backend for input shape {_shape_name(shapes)}...")
+        with torch.inference_mode():
+            graph = torch.jit.trace(self.module.eval(), example_inputs, check_trace=False)
+        try:
+            tmp_path = f"{cache_file}.tmp{os.getpid()}"
+            torch.jit.save(graph, tmp_path)
+            os.replace(tmp_path, cache_file)
+        except Exception as e:
+            logger.warning(f"Could not cache traced graph: {e}")
+        return graph
+    
+    def _compile(self):
+        # One torch.compile wrapper for all shapes: static graphs per bucket
+        # when padding, otherwise dynamic shapes after the first recompile.
+        # The inductor cache persists them on disk
+        if self._torch_compiled is None:
+            os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', get_cache_dir('inductor'))
+            try:
+                torch._inductor.config.fx_graph_cache = True
+            except Exception:
+                pass
+            self._torch_compiled = torch.compile(self.module.eval(),
+                                                 dynamic=False if self.pad_to_bucket else None)
+        return self._torch_compiled
+
+
+def _shape_name(shapes) -> str:
+    return '_'.join('x'.join(str(d) for d in shape) if shape is not None else 'n' for shape in shapes)
+
+
+def compile_backend(backend, mode: str, precision: str = PRECISION_FP32):
+    """
+    Wrap a backend for compiled inference.
+    
+    Backends that are not torch modules, and the eager mode, are returned
+    unchanged.
+    """
+    if mode == COMPILE_EAGER:
+        return backend
+    module = _as_module(backend)
+    if module is None:
+        logger.warning(f"Backend is not a torch module, compile mode '{mode}' skipped")
+        return backend
+    return CompiledBackend(module, mode, f"{backend_cache_key(backend)}-{precision}")
+
+
+def example_backend_input(module, length: int):
+    """
+    Build a synthetic input for benchmarking a backend module, shaped after
+    its first Linear or Conv1d layer with `length` along the last dimension.
+    
+    Returns:
+        Tuple of (input tensor, length_dim), or (None, None) if unknown
+    """
+    if _as_module(module) is None:
+        return None, None
+    for layer in module.modules():
+        if isinstance(layer, torch.nn.Conv1d):
+            return torch.randn(1, layer.in_channels, length), -1
+        if isinstance(layer, torch.nn.Linear):
+            # (batch, features, time) -> layers see time on the middle axis
+            return torch.randn(1, length, layer.in_features), 1
+    return None, None
+
+
+def machine_key() -> str:
+    """
+    Identify this machine for persisted per-machine settings.
+    """
+    return f"{platform.node()}-{platform.machine()}-{os.cpu_count()}cpu"
+
+
+def _thread_settings_file() -> str:
+    return os.path.join(get_cache_dir(), "thread_settings.json")
+
+
+def load_thread_settings() -> Optional[Dict[str, Any]]:
+    """
+    Return the autotuned thread settings for this machine, if any.
+    """
+    try:
+        with open(_thread_settings_file(), 'r', encoding='utf-8') as f:
+            return json.load(f).get(machine_key())
+    except (OSError, ValueError):
+        return None
+
+
+def save_thread_settings(settings: Dict[str, Any]):
+    """
+    Persist thread settings for this machine (other machines are kept).
+    """
+    path = _thread_settings_file()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            all_settings = json.load(f)
+    except (OSError, ValueError):
+        all_settings = {}
+    all_settings[machine_key()] = settings
+    
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(all_settings, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def configure_threads(intra_op: int = None, inter_op: int = None) -> Dict[str, int]:
+    """
+    Set torch intra-op and inter-op thread counts for this process.
+    
+    The inter-op count can only be changed before the first parallel torch
+    work, later attempts are logged and ignored.
+    
+    Returns:
+        The thread counts in effect afterwards
+    """
+    if torch is None:
+        return {}
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            logger.warning(f"Could not set inter-op threads: {e}")
+    applied = {
+        'intra_op_threads': torch.get_num_threads(),
+        'inter_op_threads': torch.get_num_interop_threads(),
+    }
+    logger.info(f"Torch threads: {applied['intra_op_threads']} intra-op, "
+                f"{applied['inter_op_threads']} inter-op")
+    return applied
+
+
+def apply_default_thread_settings() -> Dict[str, int]:
+    """
+    Apply thread settings at backend load.
+    
+    STIMMENKLON_THREADS ("intra" or "intra,inter") takes precedence over the
+    autotuned settings for this machine; without either, torch defaults stay.
+    """
+    env_value = os.environ.get('STIMMENKLON_THREADS')
+    if env_value:
+        try:
+            parts = [int(p) for p in env_value.split(',') if p.strip()]
+            return configure_threads(*parts[:2])
+        except ValueError:
+            logger.warning(f"Ignoring invalid STIMMENKLON_THREADS='{env_value}'")
+    
+    settings = load_thread_settings()
+    if settings:
+        return configure_threads(settings.get('intra_op_threads'), settings.get('inter_op_threads'))
+    return {}
+
+
+# Overlapping thread_limit calls share one saved process setting
+_thread_limit_lock = threading.Lock()
+_thread_limit_users = 0
+_thread_limit_baseline = None
+
+
+@contextlib.contextmanager
+def thread_limit(num_threads: int = None):
+    """
+    Limit torch intra-op threads for the duration of one call.
+    
+    torch's thread count is process-wide: while calls overlap, the most
+    recently entered limit applies, and the process setting from before
+    the first of them is restored when the last one exits.
+    """
+    global _thread_limit_users, _thread_limit_baseline
+    if torch is None or not num_threads:
+        yield
+        return
+    with _thread_limit_lock:
+        if _thread_limit_users == 0:
+            _thread_limit_baseline = torch.get_num_threads()
+        _thread_limit_users += 1
+        torch.set_num_threads(int(num_threads))
+    try:
+        yield
+    finally:
+        with _thread_limit_lock:
+            _thread_limit_users -= 1
+            if _thread_limit_users == 0:
+                torch.set_num_threads(_thread_limit_baseline)
+
+
+def thread_candidates() -> List[int]:
+    """
+    Thread counts to try during autotuning: powers of two up to the CPU count.
+    """
+    cpu_count = os.cpu_count() or 1
+    candidates = []
+    count = 1
+    while count < cpu_count:
+        candidates.append(count)
+        count *= 2
+    candidates.append(cpu_count)
+    return candidates
+
+
+def autotune_threads(workloads: Dict[str, Callable[[], Any]], candidates: List[int] = None,
+                     repeats: int = 3, tolerance: float = 0.05) -> Dict[str, Any]:
+    """
+    Time each workload at each intra-op thread count and pick the best count.
+    
+    The best count is the smallest one whose total median time is within
+    `tolerance` of the fastest, which avoids oversubscribing cores for no gain.
+    
+    Returns:
+        Dict with per-candidate timings and the chosen 'intra_op_threads'
+    """
+    candidates = candidates or thread_candidates()
+    results = []
+    
+    for count in candidates:
+        timings = {}
+        with thread_limit(count):
+            for name, workload in workloads.items():
+                workload()  # warm-up
+                samples = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    workload()
+                    samples.append(time.perf_counter() - start)
+                timings[name] = statistics.median(samples)
+        results.append({'threads': count, 'seconds': timings, 'total_seconds': sum(timings.values())})
+        logger.info(f"Autotune: {count} threads -> {sum(timings.values()):.4f}s")
+    
+    fastest = min(r['total_seconds'] for r in results)
+    best = min(r['threads'] for r in results if r['total_seconds'] <= fastest * (1 + tolerance))
+    return {'machine': machine_key(), 'results': results, 'intra_op_threads': best}
+
+
+def precision_context(precision: str):
+    """
+    Context manager applying the precision mode around an inference call.
+    """
+    if torch is None:
+        return contextlib.nullcontext()
+    if precision == PRECISION_BF16:
+        if bf16_supported():
+            return torch.autocast('cpu', dtype=torch.bfloat16)
+        logger.debug("bfloat16 not supported on this CPU, running in fp32")
+    return contextlib.nullcontext()
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Current resident set size of this process in MB, if available.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+    except Exception:
+        return None
+
+
+def memory_usage_mb() -> Dict[str, Optional[float]]:
+    """
+    Memory of this process in MB: resident (rss), proportional to sharing
+    (pss) and private (not shared with any other process). pss and private
+    are only available on Linux.
+    """
+    usage = {'rss': current_rss_mb(), 'pss': None, 'private': None}
+    try:
+        fields = {}
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024.0
+        usage['pss'] = fields.get('Pss')
+        usage['private'] = fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0)
+    except OSError:
+        pass
+    return usage
+
+
+def spectral_distance(reference, candidate, frame_size: int = 1024) -> Optional[float]:
+    """
+    Log-spectral distance (dB) between two signals, frame by frame.
+
+    A simple quality check for comparing reduced-precision output against
+    fp32; 0 means identical spectra.
+    """
+    if np is None:
+        return None
+
+    reference = np.asarray(reference, dtype=np.float32).ravel()
+    candidate = np.asarray(candidate, dtype=np.float32).ravel()
+    length = min(len(reference), len(candidate)) // frame_size * frame_size
+    if length == 0:
+        return None
+
+    window = np.hanning(frame_size).astype(np.float32)
+    ref_frames = reference[:length].reshape(-1, frame_size) * window
+    cand_frames = candidate[:length].reshape(-1, frame_size) * window
+
+    eps = 1e-10
+    ref_db = 10 * np.log10(np.abs(np.fft.rfft(ref_frames, axis=1)) ** 2 + eps)
+    cand_db = 10 * np.log10(np.abs(np.fft.rfft(cand_frames, axis=1)) ** 2 + eps)
+
+    per_frame = np.sqrt(np.mean((ref_db - cand_db) ** 2, axis=1))
+    return float(np.mean(per_frame))
@@ -13,8 +13,11 @@ Usage:
 """
 
 import argparse
+import json
 import os
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 def setup_path():
@@ -22,12 +25,13 @@ def setup_path():
     current_dir = Path(__file__).parent
     sys.path.insert(0, str(current_dir))
 
-def train_voice_model(model_name, audio_dir, verbose=True):
+def train_voice_model(model_name, audio_dir, verbose=True, resume=False):
     """Train a voice model from audio files"""
     setup_path()
     
     try:
         from voice_model import ZonosVoiceModel, check_zonos_installation
+        from training_progress import format_eta
         
         if verbose:
             print(f"🎙️ Training voice model: {model_name}")
@@ -64,22 +68,46 @@ def train_voice_model(model_name, audio_dir, verbose=True):
         # Create and train model
         voice_model = ZonosVoiceModel(model_name)
         
+        last_printed = [-1]
+        
         def progress_callback(progress):
-            if verbose:
-                print(f"📊 Training progress: {progress:.1f}%")
+            # Progress is weighted by audio seconds and updates per block; print whole percents
+            if verbose and int(progress) > last_printed[0]:
+                last_printed[0] = int(progress)
+                report = voice_model.training_progress.report()
+                print(f"📊 Training progress: {int(progress)}% ({report['stage'] or 'done'}, "
+                      f"ETA {format_eta(report['eta_seconds'])})")
         
         if verbose:
             print("🚀 Starting training...")
         
         success = voice_model.train_voice_model(
             [str(f) for f in audio_files], 
-            progress_callback
+            progress_callback,
+            resume=resume
         )
         
         if success:
             if verbose:
                 print(f"✅ Training completed successfully!")
                 print(f"💾 Model saved as: {model_name}")
+                source = voice_model.training_report.get('input')
+                if source:
+                    print(f"📏 Input: {source['files']} files, {format_eta(source['audio_seconds'])} "
+                          f"audio, {source['decoded_mb']:.0f} MB decoded")
+                embedding = voice_model.training_report.get('embedding')
+                if embedding and embedding.get('audio_seconds_per_second'):
+                    print(f"⚡ Speaker embedding: {embedding['windows']} windows in "
+                          f"{embedding['batches']} batches, "
+                          f"{embedding['audio_seconds_per_second']:.0f} s audio per second")
+                dedup = voice_model.training_report.get('dedup')
+                if dedup and dedup['skipped']:
+                    print(f"🧹 Skipped {len(dedup['skipped'])} duplicate files "
+                          f"({dedup['skipped_audio_seconds']:.1f} s audio, "
+                          f"~{dedup.get('estimated_seconds_saved', 0.0):.1f} s saved):")
+                    for entry in dedup['skipped']:
+                        print(f"   {Path(entry['file']).name} = {Path(entry['duplicate_of']).name} "
+                              f"({entry['reason']}, {entry['similarity']:.0%})")
             return True
         else:
             print("❌ Training failed")
@@ -89,7 +117,38 @@ def train_voice_model(model_name, audio_dir, verbose=True):
         print(f"❌ Training error: {e}")
         return False
 
-def synthesize_speech(model_name, text, output_file=None, verbose=True):
+def train_many_voices(root_dir, workers=2, manifest=None, verbose=True):
+    """Train one voice model per speaker subdirectory, resumable via a manifest"""
+    setup_path()
+    
+    try:
+        from batch_jobs import train_many
+        
+        if not Path(root_dir).is_dir():
+            print(f"❌ Directory not found: {root_dir}")
+            return None
+        
+        def on_result(record):
+            if verbose:
+                icon = "✅" if record['status'] == 'done' else "❌"
+                print(f"{icon} {record['key']} ({record['files']} files, {record['seconds']:.1f}s)")
+        
+        if verbose:
+            print(f"🎙️ Training all speakers in: {root_dir} ({workers} workers)")
+        
+        summary = train_many(root_dir, workers=workers, manifest_path=manifest, on_result=on_result)
+        
+        if verbose:
+            print("📊 Summary:")
+        print(json.dumps(summary, indent=2))
+        return summary
+        
+    except Exception as e:
+        print(f"❌ Bulk training error: {e}")
+        return None
+
+def synthesize_speech(model_name, text, output_file=None, verbose=True, conditioning=None,
+                      persist_conditioning=False, sample_rate=None):
     """Synthesize speech using a trained model"""
     setup_path()
     
@@ -105,7 +164,8 @@ def synthesize_speech(model_name, text, output_file=None, verbose=True):
             print("⚠️ Zonos TTS not installed. Using demo functionality.")
         
         # Load model
-        voice_model = ZonosVoiceModel(model_name)
+        voice_model = ZonosVoiceModel(model_name, persist_conditioning=persist_conditioning,
+                                      output_sample_rate=sample_rate)
         
         if not voice_model.load_voice_model():
             print(f"❌ Could not load model: {model_name}")
@@ -116,12 +176,12 @@ def synthesize_speech(model_name, text, output_file=None, verbose=True):
             print("🚀 Starting speech synthesis...")
         
         # Generate speech
-        result_path = voice_model.synthesize_speech(text, output_file)
+        result_path = voice_model.synthesize_speech(text, output_file, conditioning=conditioning)
         
         if result_path and os.path.exists(result_path):
             if verbose:
                 print(f"✅ Speech synthesis completed!")
-                print(f"🔊 Audio file: {result_path}")
+                print(f"🔊 Audio file: {result_path} ({voice_model.output_sample_rate} Hz)")
             return result_path
         else:
             print("❌ Speech synthesis failed")
@@ -131,6 +191,38 @@ def synthesize_speech(model_name, text, output_file=None, verbose=True):
         print(f"❌ Synthesis error: {e}")
         return None
 
+def synthesize_many(jobs_file, results_file=None, workers=2, verbose=True,
+                    persist_conditioning=False, sample_rate=None):
+    """Synthesize every job of a JSONL/CSV job file, skipping finished outputs"""
+    setup_path()
+    
+    try:
+        from batch_jobs import synthesize_jobs
+        
+        if not Path(jobs_file).is_file():
+            print(f"❌ Job file not found: {jobs_file}")
+            return None
+        
+        def on_result(result):
+            if verbose and result['status'] == 'failed':
+                print(f"❌ Line {result['line']}: {result['error']}")
+        
+        if verbose:
+            print(f"🎙️ Synthesizing jobs from: {jobs_file} ({workers} workers)")
+        
+        summary = synthesize_jobs(jobs_file, results_file, workers=workers, on_result=on_result,
+                                  model_options={'persist_conditioning': persist_conditioning,
+                                                 'output_sample_rate': sample_rate})
+        
+        if verbose:
+            print("📊 Summary:")
+        print(json.dumps(summary, indent=2))
+        return summary
+        
+    except Exception as e:
+        print(f"❌ Bulk synthesis error: {e}")
+        return None
+
 def list_models(verbose=True):
     """List all available trained models"""
     setup_path()
@@ -155,6 +247,478 @@ def list_models(verbose=True):
         print(f"❌ Error listing models: {e}")
         return []
 
+def benchmark_first_request(model_name, text, verbose=True):
+    """Measure first-request synthesis latency with and without pre-warming"""
+    setup_path()
+    
+    try:
+        from voice_model import ZonosVoiceModel, ModelPrewarmer, reset_shared_backend
+        
+        output_file = os.path.join(tempfile.gettempdir(), f"stimmenklon_bench_{model_name}.wav")
+        
+        def first_request():
+            voice_model = ZonosVoiceModel(model_name)
+            start = time.perf_counter()
+            if not voice_model.load_voice_model():
+                return None
+            result = voice_model.synthesize_speech(text, output_file)
+            return time.perf_counter() - start if result else None
+        
+        # Cold: backend is loaded inside the first request
+        reset_shared_backend()
+        cold = first_request()
+        
+        # Warm: pre-warm first, then time the first request
+        reset_shared_backend()
+        prewarmer = ModelPrewarmer(model_name)
+        prewarmer.run()
+        warm = first_request() if prewarmer.is_ready else None
+        
+        report = {
+            'model_name': model_name,
+            'cold_first_request_seconds': cold,
+            'prewarm': prewarmer.timings,
+            'prewarm_state': prewarmer.state,
+            'warm_first_request_seconds': warm,
+        }
+        
+        if verbose:
+            print("⏱️ First-request latency:")
+        print(json.dumps(report, indent=2))
+        return report
+        
+    except Exception as e:
+        print(f"❌ Benchmark error: {e}")
+        return None
+
+def benchmark_precision(model_name, text, verbose=True):
+    """Compare real-time factor, memory and quality of the precision modes"""
+    setup_path()
+    
+    try:
+        import soundfile as sf
+        import torch
+        from voice_model import ZonosVoiceModel
+        from cpu_inference import PRECISIONS, PRECISION_FP32, current_rss_mb, spectral_distance, bf16_supported
+        
+        results = []
+        reference_audio = None
+        
+        for precision in PRECISIONS:
+            voice_model = ZonosVoiceModel(model_name, precision=precision)
+            
+            rss_before = current_rss_mb()
+            load_start = time.perf_counter()
+            if not voice_model.load_model() or not voice_model.load_voice_model():
+                print(f"❌ Could not load model '{model_name}' with precision {precision}")
+                return None
+            load_seconds = time.perf_counter() - load_start
+            rss_after = current_rss_mb()
+            
+            output_file = os.path.join(tempfile.gettempdir(), f"stimmenklon_bench_{precision}.wav")
+            
+            # Same seed for every mode so outputs are comparable
+            torch.manual_seed(0)
+            synth_start = time.perf_counter()
+            if not voice_model.synthesize_speech(text, output_file):
+                print(f"❌ Synthesis failed with precision {precision}")
+                return None
+            synth_seconds = time.perf_counter() - synth_start
+            
+            audio, sample_rate = sf.read(output_file, dtype='float32')
+            audio_seconds = len(audio) / sample_rate
+            if precision == PRECISION_FP32:
+                reference_audio = audio
+            
+            results.append({
+                'precision': precision,
+                'load_seconds': round(load_seconds, 4),
+                'synthesis_seconds': round(synth_seconds, 4),
+                'real_time_factor': round(synth_seconds / audio_seconds, 4) if audio_seconds else None,
+                'rss_mb': rss_after,
+                'rss_delta_mb': (rss_after - rss_before) if rss_after and rss_before else None,
+                'spectral_distance_db': spectral_distance(reference_audio, audio),
+            })
+        
+        report = {'model_name': model_name, 'bf16_supported': bf16_supported(), 'results': results}
+        
+        if verbose:
+            print("⚖️ Precision comparison (spectral distance vs fp32, lower is better):")
+        print(json.dumps(report, indent=2))
+        return report
+        
+    except Exception as e:
+        print(f"❌ Benchmark error: {e}")
+        return None
+
+def benchmark_compile(lengths=(300, 1000, 4000), iterations=20, verbose=True):
+    """Compare cold-start and steady-state latency of eager and compiled inference"""
+    setup_path()
+    
+    try:
+        import statistics
+        from voice_model import get_shared_backend
+        from cpu_inference import (COMPILE_EAGER, COMPILE_MODES, CompiledBackend,
+                                   backend_cache_key, example_backend_input)
+        
+        backend = get_shared_backend()
+        results = []
+        
+        for mode in COMPILE_MODES:
+            for length in lengths:
+                example, length_dim = example_backend_input(backend, length)
+                if example is None:
+                    print("❌ Backend is not a torch module with Linear/Conv1d layers")
+                    return None
+                
+                runner = CompiledBackend(backend, mode, f"{backend_cache_key(backend)}-fp32",
+                                         length_dim=length_dim)
+                
+                # Cold start: first call includes tracing/compiling or cache load
+                start = time.perf_counter()
+                runner(example)
+                cold = time.perf_counter() - start
+                
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    runner(example)
+                    timings.append(time.perf_counter() - start)
+                
+                results.append({
+                    'mode': mode,
+                    'input_length': length,
+                    'cold_start_seconds': round(cold, 4),
+                    'steady_median_ms': round(statistics.median(timings) * 1000, 3),
+                    'cache_hits': runner.stats['cache_hits'],
+                    'fell_back_to_eager': mode != COMPILE_EAGER and runner.stats['fallbacks'] > 0,
+                })
+        
+        if verbose:
+            print("🏎️ Eager vs compiled inference (run twice to see the on-disk cache):")
+        print(json.dumps({'results': results}, indent=2))
+        return results
+        
+    except Exception as e:
+        print(f"❌ Benchmark error: {e}")
+        return None
+
+def benchmark_audio_load(files, verbose=True):
+    """Compare WAV load throughput and memory of the mmap fast path, soundfile and torchaudio"""
+    setup_path()
+    
+    try:
+        import gc
+        import torchaudio
+        from audio_io import MappedWav, audio_info, iter_decoded_blocks
+        from cpu_inference import current_rss_mb
+        
+        def streamed(path, fast_path):
+            if fast_path:
+                return iter_decoded_blocks(path, 441000)
+            import soundfile as sf
+            return sf.blocks(path, blocksize=441000, dtype='float32', always_2d=True)
+        
+        results = []
+        for path in files:
+            info = audio_info(path)
+            audio_seconds = info.frames / info.sample_rate
+            if MappedWav.open(path) is None:
+                print(f"⚠️ {path} is not a PCM/float WAV, fast path not used")
+            
+            entry = {'file': path, 'audio_seconds': round(audio_seconds, 1),
+                     'file_mb': round(os.path.getsize(path) / 1024 / 1024, 1)}
+            
+            for name, fast_path in (('mmap', True), ('soundfile', False)):
+                gc.collect()
+                rss_before = current_rss_mb()
+                peak = rss_before
+                start = time.perf_counter()
+                for _ in streamed(path, fast_path):
+                    peak = max(peak, current_rss_mb())
+                seconds = time.perf_counter() - start
+                entry[name] = {'seconds': round(seconds, 3),
+                               'audio_seconds_per_second': round(audio_seconds / seconds, 1),
+                               'peak_rss_delta_mb': round(peak - rss_before, 1)}
+            
+            # Whole-file decode last, so its allocation doesn't inflate the others
+            gc.collect()
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            try:
+                audio, _ = torchaudio.load(path)
+                seconds = time.perf_counter() - start
+                entry['torchaudio'] = {'seconds': round(seconds, 3),
+                                       'audio_seconds_per_second': round(audio_seconds / seconds, 1),
+                                       'peak_rss_delta_mb': round(current_rss_mb() - rss_before, 1)}
+                del audio
+            except Exception as e:
+                entry['torchaudio'] = {'error': str(e)}
+            results.append(entry)
+        
+        if verbose:
+            print("📂 Audio load comparison (higher audio_seconds_per_second is better):")
+        print(json.dumps(results, indent=2))
+        return results
+        
+    except Exception as e:
+        print(f"❌ Benchmark error: {e}")
+        return None
+
+def benchmark_shared_weights(processes=3, verbose=True):
+    """Compare backend startup time and memory per process with private and memory-mapped weights"""
+    setup_path()
+    
+    try:
+        import subprocess
+        import torch
+        
+        # Each child loads the backend, runs one inference to touch all weights,
+        # reports, and stays alive until every child is loaded so sharing shows in PSS
+        child_code = f"""
+import json, sys, time
+sys.path.insert(0, {str(Path(__file__).parent)!r})
+import torch
+from cpu_inference import example_backend_input, memory_usage_mb
+from voice_model import get_shared_backend
+before = memory_usage_mb()
+start = time.perf_counter()
+backend = get_shared_backend()
+load_seconds = time.perf_counter() - start
+example, _ = example_backend_input(backend, 256)
+if example is not None:
+    with torch.inference_mode():
+        backend(example)
+after = memory_usage_mb()
+print(json.dumps({{'load_seconds': load_seconds, 'before': before, 'after': after}}), flush=True)
+sys.stdin.readline()
+print(json.dumps(memory_usage_mb()), flush=True)
+"""
+        
+        # Mapped weights come from a checkpoint; without one, save the backend's own
+        base_env = dict(os.environ)
+        if not base_env.get('STIMMENKLON_WEIGHTS'):
+            from cpu_inference import get_cache_dir
+            from voice_model import get_shared_backend
+            base_env['STIMMENKLON_WEIGHTS'] = os.path.join(get_cache_dir('weights'), 'benchmark-backend.pt')
+            if not os.path.exists(base_env['STIMMENKLON_WEIGHTS']):
+                torch.save(get_shared_backend().state_dict(), base_env['STIMMENKLON_WEIGHTS'])
+        
+        def run_group(mmap_weights):
+            env = dict(base_env, STIMMENKLON_MMAP_WEIGHTS='1' if mmap_weights else '0')
+            children = [subprocess.Popen([sys.executable, '-c', child_code], env=env, text=True,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+                        for _ in range(processes)]
+            loaded = [json.loads(child.stdout.readline()) for child in children]
+            for child in children:
+                child.stdin.write("report\n")
+                child.stdin.flush()
+            together = [json.loads(child.stdout.readline()) for child in children]
+            for child in children:
+                child.wait()
+            
+            def delta(entry, key):
+                if entry['after'][key] is None or entry['before'][key] is None:
+                    return None
+                return round(entry['after'][key] - entry['before'][key], 1)
+            
+            return [{'load_seconds': round(entry['load_seconds'], 4),
+                     'rss_delta_mb': delta(entry, 'rss'),
+                     'private_delta_mb': delta(entry, 'private'),
+                     'pss_mb_all_running': round(mem['pss'], 1) if mem['pss'] is not None else None}
+                    for entry, mem in zip(loaded, together)]
+        
+        # One process converts the weights cache first, so both groups start cold the same way
+        subprocess.run([sys.executable, '-c', child_code], input="\n", text=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       env=dict(base_env, STIMMENKLON_MMAP_WEIGHTS='1'), check=True)
+        
+        report = {'processes': processes,
+                  'private_weights': run_group(False),
+                  'mapped_weights': run_group(True)}
+        
+        if verbose:
+            print("🧠 Backend startup per process (private_delta_mb is memory not shared with others):")
+        print(json.dumps(report, indent=2))
+        return report
+        
+    except Exception as e:
+        print(f"❌ Benchmark error: {e}")
+        return None
+
+def load_test(voices=1, model_name=None, corpus=None, requests=50, duration=None, concurrency=4,
+              arrival_rate=None, target_url=None, conditioning=None, offline=False,
+              report_file=None, sample_rate=None, verbose=True):
+    """Measure synthesis latency percentiles, throughput and error rate under concurrent load"""
+    setup_path()
+    
+    try:
+        from load_test import HttpTarget, InProcessTarget, load_corpus, run_load_test
+        from synthesis_server import VoicePool
+        from voice_model import ZonosVoiceModel
+        
+        texts = load_corpus(corpus)
+        if target_url:
+            target = HttpTarget(target_url, conditioning, sample_rate=sample_rate)
+            available = target.health().get('voices', [])
+        else:
+            available = ZonosVoiceModel.list_available_models()
+        
+        names = [model_name] if model_name else available[:voices]
+        if target_url and not names:
+            print("❌ The server has no voices; start it with --voices N or train one first")
+            return None
+        if not target_url:
+            # Synthetic voices make up for missing trained ones
+            pool = VoicePool(placeholder=True if offline else None,
+                             synthetic_voices=max(0, voices - len(names)) if not model_name else 0)
+            names += [name for name in pool.names() if name not in available][:voices - len(names)]
+            target = InProcessTarget(pool, conditioning, sample_rate)
+        
+        if verbose:
+            mode = f"{arrival_rate}/s open loop" if arrival_rate else f"{concurrency} clients"
+            print(f"🏋️ Load test against {target.name} ({target.backend}): {len(texts)} utterances, "
+                  f"voices {', '.join(names)}, {mode}")
+        
+        report = run_load_test(target, names, texts, requests=requests, duration=duration,
+                               concurrency=concurrency, arrival_rate=arrival_rate)
+        
+        print(json.dumps(report, indent=2))
+        if report_file:
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            if verbose:
+                print(f"💾 Report: {report_file}")
+        return report
+        
+    except Exception as e:
+        print(f"❌ Load test error: {e}")
+        return None
+
+def serve_synthesis(host, port, workers=2, voices=0, offline=False, sample_rate=None, verbose=True):
+    """Run the local synthesis server until interrupted"""
+    setup_path()
+    
+    from synthesis_server import VoicePool, create_server
+    
+    pool = VoicePool(placeholder=True if offline else None, synthetic_voices=voices,
+                     output_sample_rate=sample_rate)
+    server = create_server(host, port, pool, workers)
+    if verbose:
+        print(f"🌐 Serving {pool.backend} synthesis on http://{host}:{server.server_address[1]} "
+              f"({workers} workers, voices: {', '.join(pool.names()) or 'none'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+    finally:
+        server.server_close()
+    return True
+
+def autotune_threads(verbose=True):
+    """Find the best torch thread count for this machine and persist it"""
+    setup_path()
+    
+    try:
+        import torch
+        from voice_model import ZonosVoiceModel
+        from conditioning_cache import normalize_conditioning
+        from cpu_inference import autotune_threads as run_autotune, example_backend_input, save_thread_settings
+        
+        voice_model = ZonosVoiceModel("autotune")
+        backend_loaded = voice_model.load_model()
+        if not backend_loaded:
+            print("⚠️ Zonos TTS not available, tuning on placeholder workloads only (result not saved).")
+        
+        text = "Hallo, dies ist ein repräsentativer Satz für die deutsche Sprachsynthese."
+        conditioning = voice_model._build_conditioning(torch.randn(256), normalize_conditioning())
+        reference_audio = torch.randn(44100 * 10)  # 10 seconds of audio
+        backend_input, _ = example_backend_input(voice_model.model, 1000)
+        
+        def synthesis_workload():
+            voice_model._generate_speech(text, conditioning)
+            if backend_input is not None:
+                with torch.inference_mode():
+                    voice_model.model(backend_input)
+        
+        def embedding_workload():
+            voice_model._create_speaker_embedding(reference_audio)
+        
+        if verbose:
+            print("🔧 Sweeping thread counts...")
+        report = run_autotune({'synthesis': synthesis_workload, 'embedding': embedding_workload})
+        # Placeholder timings say nothing about the real backend, so they are never applied at load
+        if backend_loaded:
+            save_thread_settings({'intra_op_threads': report['intra_op_threads']})
+        
+        print(json.dumps(report, indent=2))
+        if verbose and backend_loaded:
+            print(f"✅ Saved {report['intra_op_threads']} intra-op threads for {report['machine']}")
+        return report
+        
+    except Exception as e:
+        print(f"❌ Autotune error: {e}")
+        return None
+
+def find_similar_voices(model_name, top_k=5, verbose=True):
+    """List the stored voices most similar to a model"""
+    setup_path()
+    
+    try:
+        from voice_model import ZonosVoiceModel
+        
+        index = ZonosVoiceModel.get_embedding_index()
+        if index is None:
+            print("❌ Similarity search requires NumPy and torch")
+            return None
+        
+        # Index missing or out of date: build it from the model files once
+        if model_name not in index:
+            ZonosVoiceModel.rebuild_embedding_index()
+        
+        query = index.get(model_name)
+        if query is None:
+            print(f"❌ Could not find model: {model_name}")
+            return None
+        
+        start = time.perf_counter()
+        matches = index.top_k(query, top_k, exclude=model_name)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        if verbose:
+            print(f"🔎 Voices most similar to {model_name} ({len(index)} indexed, {elapsed_ms:.1f} ms):")
+        for name, similarity in matches:
+            print(f"   - {name}: {similarity:.4f}")
+        return matches
+        
+    except Exception as e:
+        print(f"❌ Similarity search error: {e}")
+        return None
+
+def find_duplicate_voices(threshold=0.95, verbose=True):
+    """List pairs of near-duplicate stored voices"""
+    setup_path()
+    
+    try:
+        from voice_model import ZonosVoiceModel
+        
+        index = ZonosVoiceModel.get_embedding_index()
+        if index is None:
+            print("❌ Duplicate search requires NumPy and torch")
+            return None
+        
+        pairs = index.find_near_duplicates(threshold)
+        if verbose:
+            print(f"👯 Near-duplicate voices (similarity >= {threshold}): {len(pairs)}")
+        for first, second, similarity in pairs:
+            print(f"   - {first} ≈ {second}: {similarity:.4f}")
+        return pairs
+        
+    except Exception as e:
+        print(f"❌ Duplicate search error: {e}")
+        return None
+
 def create_sample_audio_dir():
     """Create a sample audio directory with instructions"""
     sample_dir = Path("./sample_audio")
@@ -195,49 +759,228 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
+  # Synthesize many prompts from a JSONL/CSV job file (rerun to resume)
+  python demo_voice_cloning.py --synthesize-jobs jobs.jsonl --workers 4
+  
   # List available models
   python demo_voice_cloning.py --list
   
   # Train a new voice model
   python demo_voice_cloning.py --train --model-name my_voice --audio-dir ./audio_samples/
   
+  # Continue an interrupted training run from its checkpoints
+  python demo_voice_cloning.py --train --model-name my_voice --audio-dir ./audio_samples/ --resume
+  
+  # Train one model per speaker subdirectory (rerun to resume)
+  python demo_voice_cloning.py --train-many ./speakers/ --workers 4
+  
   # Synthesize speech with trained model
   python demo_voice_cloning.py --synthesize --model-name my_voice --text "Hallo Welt!"
   
+  # Synthesize with other conditioning settings, keeping the conditioning state next to the model
+  python demo_voice_cloning.py --synthesize --model-name my_voice --text "Hello!" --language en-us \\
+      --speaking-rate 12 --persist-conditioning
+  
+  # Write 16 kHz audio for telephony (resampled while streaming, no separate pass)
+  python demo_voice_cloning.py --synthesize --model-name my_voice --text "Hallo Welt!" --sample-rate 16000
+  
   # Create sample directory structure
   python demo_voice_cloning.py --setup
+  
+  # Find the voices most similar to a model, or near-duplicate voices
+  python demo_voice_cloning.py --similar my_voice --top-k 10
+  python demo_voice_cloning.py --find-duplicates --threshold 0.97
+  
+  # Measure first-request latency with and without pre-warming
+  python demo_voice_cloning.py --benchmark-prewarm --model-name my_voice
+  
+  # Compare fp32, int8 and bf16 inference (run synthesis with STIMMENKLON_PRECISION=int8)
+  python demo_voice_cloning.py --benchmark-precision --model-name my_voice
+  
+  # Compare eager, traced and torch.compile inference (use with STIMMENKLON_COMPILE=trace)
+  python demo_voice_cloning.py --benchmark-compile
+  
+  # Compare WAV loading: memory-mapped fast path vs soundfile vs torchaudio.load
+  python demo_voice_cloning.py --benchmark-audio-load long_recording.wav
+  
+  # Compare backend startup time and memory of several processes with shared weights
+  python demo_voice_cloning.py --benchmark-shared-weights --workers 4
+  
+  # Attribute memory to training stages (JSON report in ~/.stimmenklon_cache/profiles)
+  python demo_voice_cloning.py --train --model-name my_voice --audio-dir ./audio_samples/ --profile-memory
+  
+  # Find where synthesis time goes (view with: flamegraph.pl FILE.collapsed > out.svg, or snakeviz FILE.pstats)
+  python demo_voice_cloning.py --synthesize --model-name my_voice --text "Hallo Welt!" --profile
+  
+  # Find and save the best thread count for this machine (applied automatically at load)
+  python demo_voice_cloning.py --autotune-threads
+  
+  # Load-test synthesis: 8 closed-loop clients over 3 voices, then 5 requests/s open loop
+  python demo_voice_cloning.py --load-test --voices 3 --concurrency 8 --requests 200 --report load.json
+  python demo_voice_cloning.py --load-test --rate 5 --duration 60 --corpus prompts.txt
+  
+  # Same against the local synthesis server (started in another shell)
+  python demo_voice_cloning.py --serve --workers 4 --voices 3
+  python demo_voice_cloning.py --load-test --target http://127.0.0.1:8765 --concurrency 8
         """
     )
     
     parser.add_argument('--train', action='store_true',
                        help='Train a new voice model')
+    parser.add_argument('--train-many', type=str, metavar='ROOT',
+                       help='Train one model per speaker subdirectory of ROOT')
     parser.add_argument('--synthesize', action='store_true',
                        help='Synthesize speech using trained model')
+    parser.add_argument('--synthesize-jobs', type=str, metavar='FILE',
+                       help='Synthesize all jobs (voice, text, output, format) of a JSONL/CSV file')
+    parser.add_argument('--results', type=str,
+                       help='Results file for --synthesize-jobs (default: FILE.results.jsonl)')
     parser.add_argument('--list', action='store_true',
                        help='List available trained models')
     parser.add_argument('--setup', action='store_true',
                        help='Create sample audio directory structure')
+    parser.add_argument('--similar', type=str, metavar='MODEL',
+                       help='List the stored voices most similar to MODEL')
+    parser.add_argument('--find-duplicates', action='store_true',
+                       help='List pairs of near-duplicate stored voices')
+    parser.add_argument('--rebuild-index', action='store_true',
+                       help='Rebuild the voice similarity index from the model files')
+    parser.add_argument('--migrate-store', action='store_true',
+                       help='Move all voices from the flat model directory into the sharded layout')
+    parser.add_argument('--benchmark-prewarm', action='store_true',
+                       help='Measure first-request latency with and without pre-warming')
+    parser.add_argument('--benchmark-precision', action='store_true',
+                       help='Compare fp32, int8 and bf16 inference speed, memory and quality')
+    parser.add_argument('--benchmark-compile', action='store_true',
+                       help='Compare eager, traced and compiled inference latency')
+    parser.add_argument('--benchmark-audio-load', type=str, nargs='+', metavar='FILE',
+                       help='Compare load throughput and memory of the WAV fast path and torchaudio')
+    parser.add_argument('--benchmark-shared-weights', action='store_true',
+                       help='Compare startup time and memory per process with memory-mapped backend weights')
+    parser.add_argument('--autotune-threads', action='store_true',
+                       help='Find and save the best torch thread count for this machine')
+    parser.add_argument('--load-test', action='store_true',
+                       help='Replay a corpus under concurrent load and report latency percentiles')
+    parser.add_argument('--serve', action='store_true',
+                       help='Run the local synthesis HTTP server (--workers concurrent syntheses)')
     
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume an interrupted --train run from its checkpoints')
     parser.add_argument('--model-name', type=str,
                        help='Name of the voice model')
+    parser.add_argument('--model-dir', type=str,
+                       help='Voice model store root (default: STIMMENKLON_MODEL_DIR or ~/.stimmenklon_models)')
     parser.add_argument('--audio-dir', type=str,
                        help='Directory containing audio files for training')
     parser.add_argument('--text', type=str,
                        help='Text to synthesize')
     parser.add_argument('--output', type=str,
                        help='Output audio file path')
+    parser.add_argument('--language', type=str,
+                       help='Synthesis language (default: de)')
+    parser.add_argument('--speaking-rate', type=float,
+                       help='Speaking rate in phonemes per second (default: 15)')
+    parser.add_argument('--pitch-std', type=float,
+                       help='Pitch variation (default: 20)')
+    parser.add_argument('--emotion', type=str,
+                       help='Emotion name (default: neutral)')
+    parser.add_argument('--sample-rate', type=int, choices=[8000, 16000, 22050, 24000, 44100],
+                       help='Output sample rate of synthesis, --synthesize-jobs, --load-test and '
+                            '--serve (default: 44100)')
+    parser.add_argument('--persist-conditioning', action='store_true',
+                       help='Keep the voice conditioning state next to the model for later runs')
+    
+    parser.add_argument('--workers', type=int, default=2,
+                       help='Concurrent workers for bulk operations (default: 2)')
+    parser.add_argument('--manifest', type=str,
+                       help='Progress manifest for --train-many (default: ROOT/.stimmenklon_manifest.jsonl)')
+    parser.add_argument('--top-k', type=int, default=5,
+                       help='Number of similar voices to list (default: 5)')
+    parser.add_argument('--threshold', type=float, default=0.95,
+                       help='Similarity threshold for --find-duplicates (default: 0.95)')
+    parser.add_argument('--corpus', type=str, metavar='FILE',
+                       help='Utterances for --load-test, one per line or JSONL with "text" '
+                            '(default: built-in German prompts)')
+    parser.add_argument('--voices', type=int,
+                       help='Voices for --load-test (default: 1) or synthetic voices for --serve; '
+                            'synthetic voices make up for missing trained ones')
+    parser.add_argument('--concurrency', type=int, default=4,
+                       help='Concurrent clients, or maximum requests in flight with --rate (default: 4)')
+    parser.add_argument('--rate', type=float,
+                       help='Open-loop arrival rate in requests per second for --load-test')
+    parser.add_argument('--requests', type=int, default=50,
+                       help='Number of --load-test requests (default: 50)')
+    parser.add_argument('--duration', type=float,
+                       help='Stop sending --load-test requests after this many seconds')
+    parser.add_argument('--target', type=str, metavar='URL',
+                       help='Load-test a synthesis server instead of in-process synthesis')
+    parser.add_argument('--report', type=str, metavar='FILE',
+                       help='Write the --load-test report to FILE')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                       help='Address for --serve (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765,
+                       help='Port for --serve (default: 8765)')
+    parser.add_argument('--offline', action='store_true',
+                       help='Use the placeholder backend for --load-test/--serve even if Zonos is installed')
+    parser.add_argument('--threads', type=str,
+                       help='Torch threads for this run: "intra" or "intra,inter" '
+                            '(overrides autotuned settings)')
+    
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile training, synthesis and model loading with cProfile '
+                            '(writes .pstats and flamegraph .collapsed files)')
+    parser.add_argument('--profile-memory', nargs='?', const='rss', choices=['rss', 'tracemalloc'],
+                       help='Record RSS (and optionally tracemalloc) per training/synthesis stage '
+                            'and write a JSON report')
+    parser.add_argument('--profile-dir', type=str,
+                       help='Directory for profiles and profiling reports (default: '
+                            'STIMMENKLON_PROFILE_DIR or ~/.stimmenklon_cache/profiles)')
     
     parser.add_argument('--quiet', action='store_true',
                        help='Suppress verbose output')
     
     args = parser.parse_args()
     
+    # Picked up when the backend loads, ahead of autotuned settings
+    if args.threads:
+        os.environ['STIMMENKLON_THREADS'] = args.threads
+    if args.model_dir:
+        os.environ['STIMMENKLON_MODEL_DIR'] = args.model_dir
+    
+    if args.profile_dir:
+        os.environ['STIMMENKLON_PROFILE_DIR'] = args.profile_dir
+    
     verbose = not args.quiet
     
     if verbose:
         print("🎯 Stimmenklon-Builder Voice Cloning Demo")
         print("=" * 50)
     
+    memory_profiler = None
+    if args.profile_memory:
+        setup_path()
+        from profiling import enable_memory_profiling
+        memory_profiler = enable_memory_profiling(args.profile_memory, report_at_exit=False)
+    
+    cpu_profiler = None
+    if args.profile:
+        setup_path()
+        from profiling import enable_cpu_profiling
+        cpu_profiler = enable_cpu_profiling()
+    
+    try:
+        return run_command(args, parser, verbose)
+    finally:
+        if memory_profiler is not None:
+            print(f"🧠 Memory profile: {memory_profiler.write_report()}")
+        if cpu_profiler is not None:
+            for path in cpu_profiler.outputs:
+                print(f"🔥 CPU profile: {path}")
+            if not cpu_profiler.outputs:
+                print("🔥 No profiled training, synthesis or model loading ran")
+
+def run_command(args, parser, verbose):
+    """Run the action selected on the command line"""
     # Setup sample directory
     if args.setup:
         create_sample_audio_dir()
@@ -248,6 +991,82 @@ Examples:
         list_models(verbose)
         return 0
     
+    # Similarity index
+    if args.migrate_store:
+        setup_path()
+        from voice_model import get_model_store
+        count = get_model_store().migrate_flat_layout()
+        print(f"✅ Migrated {count} voices to the sharded layout")
+        return 0
+    
+    if args.rebuild_index:
+        setup_path()
+        from voice_model import ZonosVoiceModel
+        count = ZonosVoiceModel.rebuild_embedding_index()
+        print(f"✅ Indexed {count} voices")
+        return 0
+    
+    if args.similar:
+        matches = find_similar_voices(args.similar, args.top_k, verbose)
+        return 0 if matches is not None else 1
+    
+    if args.find_duplicates:
+        pairs = find_duplicate_voices(args.threshold, verbose)
+        return 0 if pairs is not None else 1
+    
+    # Pre-warm benchmark
+    if args.benchmark_prewarm:
+        if not args.model_name:
+            print("❌ --model-name required for benchmark")
+            return 1
+        
+        text = args.text or "Hallo, das ist ein kurzer Test."
+        report = benchmark_first_request(args.model_name, text, verbose)
+        return 0 if report else 1
+    
+    # Precision benchmark
+    if args.benchmark_precision:
+        if not args.model_name:
+            print("❌ --model-name required for benchmark")
+            return 1
+        
+        text = args.text or "Hallo, das ist ein kurzer Test."
+        report = benchmark_precision(args.model_name, text, verbose)
+        return 0 if report else 1
+    
+    # Thread autotuning
+    if args.autotune_threads:
+        report = autotune_threads(verbose)
+        return 0 if report else 1
+    
+    # Compile benchmark
+    if args.benchmark_compile:
+        results = benchmark_compile(verbose=verbose)
+        return 0 if results else 1
+    
+    # Audio loading benchmark
+    if args.benchmark_audio_load:
+        results = benchmark_audio_load(args.benchmark_audio_load, verbose)
+        return 0 if results else 1
+    
+    if args.benchmark_shared_weights:
+        report = benchmark_shared_weights(max(1, args.workers), verbose)
+        return 0 if report else 1
+    
+    # Load testing
+    if args.load_test:
+        conditioning = {'language': args.language, 'speaking_rate': args.speaking_rate,
+                        'pitch_std': args.pitch_std, 'emotion': args.emotion}
+        report = load_test(args.voices or 1, args.model_name, args.corpus, args.requests,
+                           args.duration, args.concurrency, args.rate, args.target,
+                           conditioning, args.offline, args.report, args.sample_rate, verbose)
+        return 0 if report else 1
+    
+    if args.serve:
+        serve_synthesis(args.host, args.port, max(1, args.workers), args.voices or 0,
+                        args.offline, args.sample_rate, verbose)
+        return 0
+    
     # Training
     if args.train:
         if not args.model_name:
@@ -258,9 +1077,20 @@ Examples:
             print("❌ --audio-dir required for training")
             return 1
         
-        success = train_voice_model(args.model_name, args.audio_dir, verbose)
+        success = train_voice_model(args.model_name, args.audio_dir, verbose, args.resume)
         return 0 if success else 1
     
+    # Bulk training
+    if args.train_many:
+        summary = train_many_voices(args.train_many, args.workers, args.manifest, verbose)
+        return 0 if summary and not summary['failed'] else 1
+    
+    # Bulk synthesis
+    if args.synthesize_jobs:
+        summary = synthesize_many(args.synthesize_jobs, args.results, args.workers, verbose,
+                                  args.persist_conditioning, args.sample_rate)
+        return 0 if summary and not summary['failed'] else 1
+    
     # Synthesis
     if args.synthesize:
         if not args.model_name:
@@ -271,7 +1101,10 @@ Examples:
             print("❌ --text required for synthesis")
             return 1
         
-        result = synthesize_speech(args.model_name, args.text, args.output, verbose)
+        conditioning = {'language': args.language, 'speaking_rate': args.speaking_rate,
+                        'pitch_std': args.pitch_std, 'emotion': args.emotion}
+        result = synthesize_speech(args.model_name, args.text, args.output, verbose,
+                                   conditioning, args.persist_conditioning, args.sample_rate)
         return 0 if result else 1
     
     # No action specified
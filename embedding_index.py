@@ -0,0 +1,350 @@
+"""
+Speaker Embedding Index
+=======================
+
+A similarity index over all stored speaker embeddings, for nearest-voice
+lookup and near-duplicate detection without loading every model file.
+
+Layout (next to the model files):
+- embeddings.names  "#dim <n> <matrix file>" header, then voice names, one
+                    per line, in row order
+- embeddings*.f32   contiguous float32 matrix named in the header, one
+                    L2-normalized row per voice
+
+Rows are appended or overwritten in place, and the matrix is memory-mapped
+for queries, so cosine top-k over 100k voices is a single matrix-vector
+product. Writers in all processes serialize on an advisory lock
+(fcntl.flock on embeddings.lock); readers only ever map the rows that
+are fully written, so a writer that died between row and name never
+breaks queries. Rebuilds and removals write a new matrix file and switch
+to it by replacing the names file, so readers always see names and rows
+of the same generation.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking falls back to this process only
+    fcntl = None
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MATRIX_FILE = "embeddings.f32"
+NAMES_FILE = "embeddings.names"
+LOCK_FILE = "embeddings.lock"
+DIM_HEADER = "#dim "
+
+# Per-process locks, used where fcntl is unavailable
+_local_locks: Dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _as_vector(embedding) -> 'np.ndarray':
+    if hasattr(embedding, 'detach'):
+        embedding = embedding.detach().cpu().numpy()
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class EmbeddingIndex:
+    """
+    Memory-mapped cosine-similarity index of speaker embeddings.
+    """
+
+    def __init__(self, index_dir: str):
+        """
+        Open (or create) the index stored in index_dir.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for the embedding index")
+        self.index_dir = index_dir
+        self.matrix_path = os.path.join(index_dir, MATRIX_FILE)  # as named by the names file
+        self.names_path = os.path.join(index_dir, NAMES_FILE)
+        self.lock_path = os.path.join(index_dir, LOCK_FILE)
+        self._lock = threading.Lock()
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = None
+        self._stamp = None
+        self._names_on_disk = 0
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        self._refresh()
+        return name in self._rows
+
+    @property
+    def dim(self) -> Optional[int]:
+        self._refresh()
+        return self._matrix.shape[1] if self._matrix is not None else None
+
+    def add(self, name: str, embedding):
+        """
+        Insert or update the embedding of a voice.
+        """
+        vector = _as_vector(embedding)
+        with self._write_lock():
+            # Other writers may have appended since the last refresh
+            self._stamp = None
+            self._refresh()
+            if self._names_on_disk > len(self._names):
+                self._truncate_names()
+            if self._matrix is not None and self._matrix.shape[1] != len(vector):
+                raise ValueError(f"Embedding size {len(vector)} does not match index size "
+                                 f"{self._matrix.shape[1]}")
+
+            if name in self._rows:
+                # Overwrite the existing row in place
+                matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                   shape=self._matrix.shape)
+                matrix[self._rows[name]] = vector
+                matrix.flush()
+                del matrix
+            else:
+                # Row first, then name: the name count never exceeds the rows
+                row = len(self._names)
+                with open(self.matrix_path, 'r+b' if os.path.exists(self.matrix_path) else 'wb') as f:
+                    f.seek(row * len(vector) * 4)
+                    f.write(vector.tobytes())
+                new_index = not os.path.exists(self.names_path) or os.path.getsize(self.names_path) == 0
+                with open(self.names_path, 'a', encoding='utf-8') as f:
+                    if new_index:
+                        f.write(self._header(len(vector)))
+                    f.write(name + "\n")
+            self._stamp = None
+
+    def get(self, name: str) -> Optional['np.ndarray']:
+        """
+        Return the normalized embedding of a voice, if indexed.
+        """
+        self._refresh()
+        row = self._rows.get(name)
+        return np.array(self._matrix[row]) if row is not None else None
+
+    def top_k(self, query, k: int = 5, exclude: str = None) -> List[Tuple[str, float]]:
+        """
+        Most similar voices to an embedding, by cosine similarity.
+
+        Returns:
+            List of (voice name, similarity) pairs, best first
+        """
+        return self.top_k_batch([query], k, exclude=[exclude])[0]
+
+    def top_k_batch(self, queries, k: int = 5,
+                    exclude: List[Optional[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k lookup for several query embeddings with one matrix product.
+        """
+        self._refresh()
+        if self._matrix is None or not self._names:
+            return [[] for _ in queries]
+
+        query_matrix = np.stack([_as_vector(q) for q in queries])
+        scores = query_matrix @ self._matrix.T
+        exclude = exclude or [None] * len(queries)
+
+        results = []
+        for row_scores, excluded in zip(scores, exclude):
+            if excluded in self._rows:
+                row_scores[self._rows[excluded]] = -np.inf
+            count = min(k, len(row_scores))
+            top = np.argpartition(-row_scores, count - 1)[:count]
+            top = top[np.argsort(-row_scores[top])]
+            results.append([(self._names[i], float(row_scores[i]))
+                            for i in top if np.isfinite(row_scores[i])])
+        return results
+
+    def find_near_duplicates(self, threshold: float = 0.95,
+                             block_rows: int = 256) -> List[Tuple[str, str, float]]:
+        """
+        All pairs of voices with cosine similarity >= threshold.
+
+        The similarity matrix is computed in row blocks to bound memory.
+        """
+        self._refresh()
+        pairs = []
+        if self._matrix is None:
+            return pairs
+        matrix = self._matrix
+        for start in range(0, len(matrix), block_rows):
+            block = np.asarray(matrix[start:start + block_rows])
+            scores = block @ matrix.T
+            rows, cols = np.nonzero(scores >= threshold)
+            for i, j in zip(rows, cols):
+                i = int(i) + start
+                if j > i:
+                    pairs.append((self._names[i], self._names[j], float(scores[i - start, j])))
+        pairs.sort(key=lambda pair: -pair[2])
+        return pairs
+
+    def rebuild(self, embeddings: Dict[str, object]):
+        """
+        Replace the whole index with the given name -> embedding mapping.
+        """
+        vectors = [_as_vector(e) for e in embeddings.values()]
+        with self._write_lock():
+            self._stamp = None
+            self._refresh()
+            self._publish(list(embeddings), vectors)
+
+    def remove(self, name: str) -> bool:
+        """
+        Drop a voice from the index.
+
+        Returns:
+            False if the voice wasn't indexed
+        """
+        with self._write_lock():
+            self._stamp = None
+            self._refresh()
+            if name not in self._rows:
+                return False
+            keep = [row for row, other in enumerate(self._names) if other != name]
+            self._publish([self._names[row] for row in keep], [self._matrix[row] for row in keep])
+            return True
+
+    def _publish(self, names: List[str], vectors: list):
+        """
+        Write a new generation of the index and switch to it.
+
+        The matrix goes to a fresh file, then the names file naming it is
+        swapped in with a single os.replace, so a reader sees either the
+        old names and rows or the new ones. Called with the write lock held.
+        """
+        previous = self.matrix_path
+        matrix_path = os.path.join(self.index_dir, MATRIX_FILE)
+        if vectors:
+            matrix_path = os.path.join(self.index_dir, f"embeddings.{time.time_ns()}.f32")
+            with open(matrix_path, 'wb') as f:
+                for vector in vectors:
+                    f.write(np.asarray(vector, dtype=np.float32).tobytes())
+
+        tmp_names = f"{self.names_path}.tmp{os.getpid()}"
+        with open(tmp_names, 'w', encoding='utf-8') as f:
+            if vectors:
+                f.write(self._header(len(vectors[0]), matrix_path))
+            f.writelines(name + "\n" for name in names)
+        os.replace(tmp_names, self.names_path)
+
+        if previous != matrix_path:
+            # Readers still holding the old mapping keep working on it
+            try:
+                os.remove(previous)
+            except OSError:
+                pass
+        self._stamp = None
+        self._refresh()
+
+    def _header(self, dim: int, matrix_path: str = None) -> str:
+        return f"{DIM_HEADER}{dim} {os.path.basename(matrix_path or self.matrix_path)}\n"
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Hold the index's exclusive lock, across threads and processes.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self._lock:
+            if fcntl is None:
+                with _local_locks_guard:
+                    local = _local_locks.setdefault(self.lock_path, threading.Lock())
+                with local:
+                    yield
+                return
+
+            with open(self.lock_path, 'a') as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _truncate_names(self):
+        """
+        Drop names without a matrix row (left by an interrupted writer).
+        Called with the write lock held, right after _refresh.
+        """
+        logger.warning(f"Embedding index lists {self._names_on_disk} voices but has "
+                       f"{len(self._names)} rows, dropping the names without a row")
+        tmp_names = f"{self.names_path}.tmp{os.getpid()}"
+        with open(tmp_names, 'w', encoding='utf-8') as f:
+            f.write(self._header(self._matrix.shape[1]) if self._matrix is not None else "")
+            f.writelines(name + "\n" for name in self._names)
+        os.replace(tmp_names, self.names_path)
+        self._stamp = None
+        self._refresh()
+
+    def _refresh(self):
+        """
+        (Re)load names and re-map the matrix if the files changed on disk.
+        
+        Only rows present in the matrix file are mapped; names beyond them
+        are ignored (and dropped by the next writer).
+        """
+        try:
+            names_stat = os.stat(self.names_path)
+            matrix_stat = os.stat(self.matrix_path)
+            if (names_stat.st_mtime_ns, names_stat.st_size,
+                    matrix_stat.st_mtime_ns, matrix_stat.st_size) == self._stamp:
+                return
+        except OSError:
+            pass
+
+        for _ in range(3):
+            try:
+                self._load()
+                return
+            except FileNotFoundError:
+                # A rebuild switched generations between reading names and mapping rows
+                continue
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.names_path, 'r', encoding='utf-8') as f:
+                names_stat = os.fstat(f.fileno())
+                header = f.readline()
+                names = [line.rstrip("\n") for line in f if line.strip()]
+        except FileNotFoundError:
+            self._names, self._rows, self._matrix, self._stamp = [], {}, None, None
+            self._names_on_disk = 0
+            self.matrix_path = os.path.join(self.index_dir, MATRIX_FILE)
+            return
+
+        self._names_on_disk = len(names)
+        fields = header[len(DIM_HEADER):].split() if header.startswith(DIM_HEADER) else []
+        # Indexes written before generations existed name no matrix file
+        self.matrix_path = os.path.join(self.index_dir, fields[1] if len(fields) > 1 else MATRIX_FILE)
+        if not fields:
+            self._names, self._rows, self._matrix, self._stamp = [], {}, None, None
+            return
+
+        matrix_stat = os.stat(self.matrix_path)
+        stamp = (names_stat.st_mtime_ns, names_stat.st_size, matrix_stat.st_mtime_ns, matrix_stat.st_size)
+        dim = int(fields[0])
+        names = names[:matrix_stat.st_size // (dim * 4)]
+        if not names:
+            self._names, self._rows, self._matrix, self._stamp = [], {}, None, stamp
+            return
+
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(len(names), dim))
+        self._names = names
+        self._rows = {name: row for row, name in enumerate(names)}
+        self._stamp = stamp
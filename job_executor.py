@@ -0,0 +1,263 @@
+"""
+Background Job Executor
+=======================
+
+Runs long-running work (Zonos installation, voice training, speech synthesis)
+for the Kivy app on a single background worker thread.
+
+Features:
+- One worker thread instead of a new thread per action
+- Priority queue (installation before synthesis, synthesis before training)
+- Cooperative cancellation via a per-job cancel event
+- Completion callbacks marshalled through a dispatch function
+  (e.g. onto the Kivy clock)
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower value = runs first
+PRIORITY_INSTALL = 0
+PRIORITY_SYNTHESIS = 10
+PRIORITY_TRAINING = 20
+
+# Job states
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+
+class Job:
+    """
+    A unit of work submitted to the JobExecutor.
+
+    The job function is called with the job's cancel event and should check
+    it between stages of its work.
+    """
+
+    def __init__(self, job_id: int, name: str, func: Callable[[threading.Event], Any],
+                 priority: int, on_complete: Callable = None, on_error: Callable = None,
+                 on_cancel: Callable = None):
+        self.job_id = job_id
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.status = STATUS_QUEUED
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """Request cooperative cancellation of this job."""
+        self.cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'priority': self.priority,
+            'status': self.status,
+        }
+
+
+class JobExecutor:
+    """
+    Single-worker priority job queue with cooperative cancellation.
+    """
+
+    def __init__(self, dispatch: Callable[[Callable[[], None]], None] = None,
+                 on_queue_changed: Callable[[List[Job]], None] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            dispatch: Function used to run callbacks, e.g. on the UI thread.
+                      Defaults to calling them directly on the worker thread.
+            on_queue_changed: Called (via dispatch) with a snapshot of the
+                              running and queued jobs whenever it changes
+        """
+        self._dispatch = dispatch or (lambda fn: fn())
+        self._on_queue_changed = on_queue_changed
+        self._heap = []
+        self._counter = itertools.count(1)
+        self._condition = threading.Condition()
+        self._current_job: Optional[Job] = None
+        self._worker: Optional[threading.Thread] = None
+        self._shutdown = False
+
+    def submit(self, name: str, func: Callable[[threading.Event], Any],
+               priority: int = PRIORITY_TRAINING, on_complete: Callable = None,
+               on_error: Callable = None, on_cancel: Callable = None) -> Job:
+        """
+        Queue a job for execution.
+
+        Args:
+            name: Human readable job name shown in the queue
+            func: Function called with the job's cancel event
+            priority: Job priority (lower runs first)
+            on_complete: Called with the function's return value
+            on_error: Called with the raised exception
+            on_cancel: Called without arguments if the job was cancelled
+
+        Returns:
+            Job: The queued job
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("JobExecutor has been shut down")
+            job = Job(next(self._counter), name, func, priority,
+                      on_complete, on_error, on_cancel)
+            heapq.heappush(self._heap, (priority, job.job_id, job))
+            self._ensure_worker()
+            self._condition.notify()
+        logger.info(f"Job queued: #{job.job_id} {name} (priority {priority})")
+        self._notify_queue_changed()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Queued jobs are removed immediately; running jobs are signalled and
+        stop at their next cancellation check.
+
+        Returns:
+            bool: True if a matching job was found
+        """
+        with self._condition:
+            if self._current_job and self._current_job.job_id == job_id:
+                self._current_job.cancel()
+                logger.info(f"Cancellation requested for running job #{job_id}")
+                return True
+
+            for index, (_, _, job) in enumerate(self._heap):
+                if job.job_id == job_id:
+                    self._heap.pop(index)
+                    heapq.heapify(self._heap)
+                    break
+            else:
+                return False
+
+        job.cancel()
+        job.status = STATUS_CANCELLED
+        logger.info(f"Queued job #{job_id} cancelled")
+        if job.on_cancel:
+            self._dispatch(job.on_cancel)
+        self._notify_queue_changed()
+        return True
+
+    def cancel_current(self) -> bool:
+        """Cancel the currently running job, if any."""
+        with self._condition:
+            job = self._current_job
+        return self.cancel(job.job_id) if job else False
+
+    def cancel_all(self):
+        """Cancel the running job and clear the queue."""
+        for job in self.jobs():
+            self.cancel(job.job_id)
+
+    def jobs(self) -> List[Job]:
+        """
+        Snapshot of the running job followed by queued jobs in run order.
+        """
+        with self._condition:
+            queued = [job for _, _, job in sorted(self._heap)]
+            return ([self._current_job] if self._current_job else []) + queued
+
+    @property
+    def is_busy(self) -> bool:
+        with self._condition:
+            return self._current_job is not None or bool(self._heap)
+
+    def shutdown(self, wait: bool = False, timeout: float = None):
+        """
+        Stop accepting jobs, cancel pending work and stop the worker.
+        """
+        # Flag and queue are cleared under one lock, so the worker can't
+        # dequeue another job in between
+        with self._condition:
+            self._shutdown = True
+            pending = [job for _, _, job in sorted(self._heap)]
+            self._heap = []
+            if self._current_job:
+                self._current_job.cancel()
+            self._condition.notify_all()
+
+        for job in pending:
+            job.cancel()
+            job.status = STATUS_CANCELLED
+            if job.on_cancel:
+                self._dispatch(job.on_cancel)
+        if pending:
+            logger.info(f"{len(pending)} queued jobs cancelled at shutdown")
+            self._notify_queue_changed()
+        if wait and self._worker:
+            self._worker.join(timeout)
+
+    def _ensure_worker(self):
+        # Called with the condition held
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="JobExecutor", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap and not self._shutdown:
+                    self._condition.wait()
+                if self._shutdown and not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                self._current_job = job
+                job.status = STATUS_RUNNING
+
+            self._notify_queue_changed()
+            logger.info(f"Job started: #{job.job_id} {job.name}")
+            self._execute(job)
+
+            with self._condition:
+                self._current_job = None
+            self._notify_queue_changed()
+
+    def _execute(self, job: Job):
+        try:
+            job.result = job.func(job.cancel_event)
+        except Exception as e:
+            job.error = e
+            job.status = STATUS_CANCELLED if job.is_cancelled else STATUS_FAILED
+        else:
+            job.status = STATUS_CANCELLED if job.is_cancelled else STATUS_DONE
+
+        logger.info(f"Job finished: #{job.job_id} {job.name} ({job.status})")
+
+        if job.status == STATUS_DONE and job.on_complete:
+            result = job.result
+            self._dispatch(lambda: job.on_complete(result))
+        elif job.status == STATUS_FAILED:
+            if job.on_error:
+                error = job.error
+                self._dispatch(lambda: job.on_error(error))
+            else:
+                logger.error(f"Job #{job.job_id} {job.name} failed: {job.error}")
+        elif job.status == STATUS_CANCELLED and job.on_cancel:
+            self._dispatch(job.on_cancel)
+
+    def _notify_queue_changed(self):
+        if self._on_queue_changed:
+            snapshot = self.jobs()
+            self._dispatch(lambda: self._on_queue_changed(snapshot))
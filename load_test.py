@@ -0,0 +1,301 @@
+"""
+Synthesis Load Testing
+======================
+
+Replays a text corpus against one or more voices and measures how
+synthesis behaves under concurrent load, for sizing deployments:
+
+- Closed loop: `concurrency` clients each send their next request as soon
+  as the previous one finished.
+- Open loop: requests arrive as a Poisson process at `arrival_rate` per
+  second, independent of how fast earlier ones complete. Latency is
+  measured from the scheduled arrival time, so time spent waiting behind
+  slow requests is counted (no coordinated omission).
+
+Requests go to ZonosVoiceModel in this process, or over HTTP to a local
+synthesis server (synthesis_server.py). The report gives p50/p95/p99 of
+the latency, the time to first audio and the real-time factor
+(processing time / audio duration), the throughput and the error rate.
+"""
+
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from synthesis_server import SAMPLE_RATE, VoicePool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = [
+    "Hallo, wie geht es Ihnen heute?",
+    "Ihr Anruf ist uns wichtig. Bitte bleiben Sie in der Leitung.",
+    "Der nächste freie Mitarbeiter ist gleich für Sie da.",
+    "Ihre Bestellung wurde versandt und kommt voraussichtlich morgen an.",
+    "Bitte nennen Sie Ihre Kundennummer. Sie finden sie oben rechts auf Ihrer Rechnung.",
+    "Vielen Dank für Ihren Anruf. Auf Wiederhören!",
+    "Drücken Sie die Eins für den Kundenservice oder die Zwei für technische Fragen.",
+    "Das Wetter in Berlin: sonnig bei zweiundzwanzig Grad.",
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def load_corpus(path: str = None) -> List[str]:
+    """
+    Read utterances from a text file (one per line) or a JSONL file with a
+    "text" field per line; the built-in German corpus if path is None.
+    """
+    if not path:
+        return list(DEFAULT_CORPUS)
+    texts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                line = json.loads(line)['text']
+            texts.append(line)
+    if not texts:
+        raise ValueError(f"No utterances in corpus {path}")
+    return texts
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linearly interpolated q-th percentile, None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: Sequence[float], scale: float = 1.0, digits: int = 1) -> Dict[str, Any]:
+    """Percentiles, mean and max of values, multiplied by scale."""
+    summary = {f'p{q}': percentile(values, q) for q in PERCENTILES}
+    summary['mean'] = sum(values) / len(values) if values else None
+    summary['max'] = max(values) if values else None
+    return {key: round(value * scale, digits) if value is not None else None
+            for key, value in summary.items()}
+
+
+class InProcessTarget:
+    """
+    Synthesizes in this process through ZonosVoiceModel.iter_speech_chunks.
+    """
+
+    name = 'in-process'
+
+    def __init__(self, pool: VoicePool, conditioning: Dict[str, Any] = None,
+                 sample_rate: int = None):
+        self.pool = pool
+        self.conditioning = conditioning
+        self.sample_rate = sample_rate
+
+    @property
+    def backend(self) -> str:
+        return self.pool.backend
+
+    def request(self, voice: str, text: str) -> Tuple[float, float]:
+        """
+        Synthesize one utterance.
+
+        Returns:
+            Tuple of (seconds until the first audio chunk, audio seconds)
+        """
+        start = time.perf_counter()
+        voice_model = self.pool.get(voice)
+        sample_rate = self.sample_rate or voice_model.output_sample_rate
+        first_audio = None
+        samples = 0
+        for chunk in voice_model.iter_speech_chunks(text, conditioning=self.conditioning,
+                                                    sample_rate=sample_rate):
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+            samples += len(chunk)
+        return first_audio or 0.0, samples / sample_rate
+
+
+class HttpTarget:
+    """
+    Sends requests to a synthesis server and reads the streamed PCM response.
+    """
+
+    def __init__(self, url: str, conditioning: Dict[str, Any] = None, timeout: float = 120.0,
+                 sample_rate: int = None):
+        parsed = urlparse(url)
+        if parsed.scheme != 'http' or not parsed.hostname:
+            raise ValueError(f"Expected an http://host:port URL, got {url}")
+        self.name = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.conditioning = conditioning
+        self.timeout = timeout
+        self.sample_rate = sample_rate
+        self.backend = self.health().get('backend')
+
+    def health(self) -> Dict[str, Any]:
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request('GET', '/health')
+            return json.loads(connection.getresponse().read())
+        finally:
+            connection.close()
+
+    def request(self, voice: str, text: str) -> Tuple[float, float]:
+        """
+        Synthesize one utterance on the server.
+
+        Returns:
+            Tuple of (seconds until the first audio bytes, audio seconds)
+
+        Raises:
+            RuntimeError: For error responses
+        """
+        body = json.dumps({'voice': voice, 'text': text, 'conditioning': self.conditioning,
+                           'sample_rate': self.sample_rate})
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request('POST', '/synthesize', body=body.encode('utf-8'),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}: {response.read()[:200]!r}")
+            sample_rate = int(response.getheader('X-Sample-Rate', SAMPLE_RATE))
+            first_audio = None
+            received = 0
+            while True:
+                data = response.read1(65536)
+                if not data:
+                    break
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start
+                received += len(data)
+            return first_audio or 0.0, received / 2 / sample_rate
+        finally:
+            connection.close()
+
+
+def run_load_test(target, voices: List[str], corpus: List[str], requests: int = 50,
+                  duration: float = None, concurrency: int = 4, arrival_rate: float = None,
+                  warmup: bool = True, seed: int = 0) -> Dict[str, Any]:
+    """
+    Drive a target with synthesis requests and report latency statistics.
+
+    Request i synthesizes corpus[i % len(corpus)] with voices[i % len(voices)].
+
+    Args:
+        target: InProcessTarget or HttpTarget
+        voices: Voice names to spread requests over
+        corpus: Utterances to replay
+        requests: Number of requests to send
+        duration: Stop sending after this many seconds (whichever comes first)
+        concurrency: Closed loop: number of clients; open loop: maximum
+                     requests in flight (later arrivals queue)
+        arrival_rate: Requests per second for an open-loop test; None for closed loop
+        warmup: Send one untimed request per voice first (loads voices and
+                conditioning state)
+        seed: Seed of the open-loop arrival times
+
+    Returns:
+        JSON-serializable report
+    """
+    if not voices or not corpus:
+        raise ValueError("At least one voice and one utterance are required")
+
+    if warmup:
+        for voice in voices:
+            try:
+                target.request(voice, corpus[0])
+            except Exception as e:
+                logger.warning(f"Warm-up request for {voice} failed: {e}")
+
+    results: List[Dict[str, Any]] = []
+    results_lock = threading.Lock()
+
+    def execute(index: int, scheduled: float):
+        voice = voices[index % len(voices)]
+        record = {'voice': voice}
+        started = time.perf_counter()
+        try:
+            first_audio, audio_seconds = target.request(voice, corpus[index % len(corpus)])
+            # Both include any wait between the scheduled arrival and the start
+            record.update(ok=True, latency=time.perf_counter() - scheduled,
+                          ttfa=started - scheduled + first_audio, audio_seconds=audio_seconds)
+        except Exception as e:
+            record.update(ok=False, error=type(e).__name__, message=str(e)[:200])
+        with results_lock:
+            results.append(record)
+
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    if arrival_rate:
+        rng = random.Random(seed)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            scheduled = start
+            for index in range(requests):
+                scheduled += rng.expovariate(arrival_rate)
+                if deadline and scheduled > deadline:
+                    break
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+                pool.submit(execute, index, scheduled)
+    else:
+        counter = iter(range(requests))
+        counter_lock = threading.Lock()
+
+        def client():
+            while deadline is None or time.perf_counter() < deadline:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                execute(index, time.perf_counter())
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(max(1, concurrency))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    wall_seconds = time.perf_counter() - start
+    return build_report(results, wall_seconds, target=target.name, backend=target.backend,
+                        mode='open' if arrival_rate else 'closed', concurrency=concurrency,
+                        arrival_rate=arrival_rate, sample_rate=target.sample_rate,
+                        voices=list(voices))
+
+
+def build_report(results: List[Dict[str, Any]], wall_seconds: float, **settings) -> Dict[str, Any]:
+    """Aggregate per-request results into the load test report."""
+    ok = [r for r in results if r['ok']]
+    errors: Dict[str, int] = {}
+    for record in results:
+        if not record['ok']:
+            errors[record['error']] = errors.get(record['error'], 0) + 1
+    audio_seconds = sum(r['audio_seconds'] for r in ok)
+
+    report = dict(settings)
+    report.update({
+        'requests': len(results),
+        'completed': len(ok),
+        'errors': {'count': len(results) - len(ok),
+                   'rate': round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+                   'by_type': errors},
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(ok) / wall_seconds, 3) if wall_seconds > 0 else None,
+        'audio_seconds_per_second': round(audio_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+        'latency_ms': summarize([r['latency'] for r in ok], 1000.0),
+        'ttfa_ms': summarize([r['ttfa'] for r in ok], 1000.0),
+        'real_time_factor': summarize([r['latency'] / r['audio_seconds'] for r in ok
+                                       if r['audio_seconds'] > 0], digits=4),
+    })
+    return report
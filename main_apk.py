@@ -9,15 +9,42 @@ from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
 from kivy.uix.popup import Popup
 from kivy.clock import Clock
 import os
-import threading
-from voice_model import ZonosVoiceModel, check_zonos_installation, install_zonos_tts
+import time
+from profiling import disable_cpu_profiling, enable_cpu_profiling, get_cpu_profiler
+from training_progress import format_eta
+from voice_model import (ZonosVoiceModel, ModelPrewarmer, check_zonos_installation,
+                         install_zonos_tts, get_last_used_voice)
+from job_executor import (JobExecutor, PRIORITY_INSTALL, PRIORITY_SYNTHESIS, PRIORITY_TRAINING,
+                          STATUS_RUNNING)
 
 class VoiceCloningApp(App):
+    # Opt-in: load the backend and last used voice in the background at startup
+    prewarm_on_start = os.environ.get('STIMMENKLON_PREWARM', '0') == '1'
+    
+    # Hidden toggle: tapping the job queue list this often within 3 seconds
+    # switches CPU profiling on or off
+    PROFILING_TOGGLE_TAPS = 5
+    
+    # Training stages as logged while a run progresses
+    TRAINING_STAGE_NAMES = {
+        'dedup': 'Doppelte Audiodateien suchen',
+        'preprocess': 'Audiodateien verarbeiten',
+        'embedding': 'Speaker-Embedding erstellen',
+        'save': 'Modell speichern',
+    }
+    
     def build(self):
         # Initialize voice model
         self.current_voice_model = None
-        self.training_in_progress = False
-        self.synthesis_in_progress = False
+        
+        # Single background worker for installation, training and synthesis
+        self.job_executor = JobExecutor(
+            dispatch=self.run_on_ui_thread,
+            on_queue_changed=self.update_job_queue
+        )
+        self.training_jobs = set()
+        self.training_stage = None
+        self.synthesis_counter = 0
         
         # Check Zonos installation on startup
         self.zonos_available = check_zonos_installation()
@@ -77,10 +104,15 @@ class VoiceCloningApp(App):
         )
         self.train_layout.add_widget(self.model_name_input)
         
-        # Training starten Button
-        self.train_button = Button(text='Voice-Cloning Training starten', size_hint=(1, 0.1))
+        # Training starten / abbrechen Buttons
+        train_controls = BoxLayout(orientation='horizontal', size_hint=(1, 0.1))
+        self.train_button = Button(text='Voice-Cloning Training starten', size_hint=(0.7, 1))
         self.train_button.bind(on_press=self.start_training)
-        self.train_layout.add_widget(self.train_button)
+        train_controls.add_widget(self.train_button)
+        self.cancel_training_button = Button(text='Abbrechen', size_hint=(0.3, 1), disabled=True)
+        self.cancel_training_button.bind(on_press=self.cancel_training)
+        train_controls.add_widget(self.cancel_training_button)
+        self.train_layout.add_widget(train_controls)
         
         # Fortschrittsbalken
         self.progress_layout = BoxLayout(orientation='vertical', size_hint=(1, 0.2))
@@ -167,20 +199,120 @@ class VoiceCloningApp(App):
         self.tts_tab.add_widget(self.tts_layout)
         self.tabs.add_widget(self.tts_tab)
         
+        # Tab 3: Auftragswarteschlange
+        self.queue_tab = TabbedPanelItem(text='Warteschlange')
+        self.queue_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        
+        self.queue_label = Label(
+            text='Keine Aufträge in der Warteschlange',
+            size_hint=(1, 0.8),
+            halign='left',
+            valign='top'
+        )
+        self.queue_label.bind(size=self.queue_label.setter('text_size'))
+        self.queue_label.bind(on_touch_down=self.on_queue_label_touch)
+        self.profiling_taps = []
+        self.queue_layout.add_widget(self.queue_label)
+        
+        queue_controls = BoxLayout(orientation='horizontal', size_hint=(1, 0.1))
+        cancel_current_btn = Button(text='Laufenden Auftrag abbrechen')
+        cancel_current_btn.bind(on_press=lambda instance: self.job_executor.cancel_current())
+        queue_controls.add_widget(cancel_current_btn)
+        cancel_all_btn = Button(text='Alle abbrechen')
+        cancel_all_btn.bind(on_press=lambda instance: self.job_executor.cancel_all())
+        queue_controls.add_widget(cancel_all_btn)
+        self.queue_layout.add_widget(queue_controls)
+        
+        self.queue_tab.add_widget(self.queue_layout)
+        self.tabs.add_widget(self.queue_tab)
+        
         # TabbedPanel zum Hauptlayout hinzufügen
         self.main_layout.add_widget(self.tabs)
         
+        self.prewarmer = None
+        if self.zonos_available and self.prewarm_on_start:
+            self.start_prewarm()
+        
         return self.main_layout
     
+    def on_stop(self):
+        """Cancel pending background jobs when the app closes"""
+        self.job_executor.shutdown()
+    
+    def run_on_ui_thread(self, callback):
+        """Marshal a job executor callback onto the Kivy clock"""
+        Clock.schedule_once(lambda dt: callback(), 0)
+    
+    def update_job_queue(self, jobs):
+        """Show running and queued jobs in the queue tab"""
+        if not jobs:
+            self.queue_label.text = 'Keine Aufträge in der Warteschlange'
+            self.queue_tab.text = 'Warteschlange'
+            return
+        
+        lines = []
+        for job in jobs:
+            state = 'läuft' if job.status == STATUS_RUNNING else 'wartet'
+            if job.is_cancelled:
+                state = 'wird abgebrochen'
+            lines.append(f'#{job.job_id} {job.name} ({state})')
+        self.queue_label.text = '\n'.join(lines)
+        self.queue_tab.text = f'Warteschlange ({len(jobs)})'
+    
+    def on_queue_label_touch(self, label, touch):
+        """Count taps on the job queue list for the hidden profiling toggle"""
+        if not label.collide_point(*touch.pos):
+            return False
+        now = time.monotonic()
+        self.profiling_taps = [t for t in self.profiling_taps if now - t < 3.0] + [now]
+        if len(self.profiling_taps) >= self.PROFILING_TOGGLE_TAPS:
+            self.profiling_taps = []
+            self.toggle_cpu_profiling()
+        return False
+    
+    def toggle_cpu_profiling(self):
+        """Switch CPU profiling of training, synthesis and model loading on or off"""
+        if get_cpu_profiler() is None:
+            profiler = enable_cpu_profiling()
+            self.show_popup("Profiling", f"CPU-Profiling aktiviert.\nProfile werden gespeichert in:\n"
+                                         f"{profiler.output_dir}")
+        else:
+            disable_cpu_profiling()
+            self.show_popup("Profiling", "CPU-Profiling deaktiviert.")
+    
+    def start_prewarm(self):
+        """Pre-warm the backend and the last used voice on a background thread"""
+        self.prewarmer = ModelPrewarmer(get_last_used_voice())
+        self.prewarmer.add_listener(
+            lambda state, progress: Clock.schedule_once(
+                lambda dt: self.update_prewarm_status(state, progress), 0)
+        )
+        self.prewarmer.start()
+    
+    def update_prewarm_status(self, state, progress):
+        """Show pre-warm readiness in the synthesis tab"""
+        if state == ModelPrewarmer.STATE_READY:
+            warmed_model = self.prewarmer.voice_model
+            if warmed_model and not self.current_voice_model:
+                self.current_voice_model = warmed_model
+                self.selected_model_label.text = f'Geladenes Modell: {warmed_model.model_name}'
+            self.tts_status.text = 'Modell vorgeladen - bereit für deutsche Sprachsynthese'
+        elif state == ModelPrewarmer.STATE_FAILED:
+            self.tts_status.text = 'Vorladen fehlgeschlagen - Modell wird bei Bedarf geladen'
+        else:
+            self.tts_status.text = f'Modell wird vorgeladen... {progress}%'
+    
     def install_zonos(self, instance):
         """Install Zonos TTS package"""
         self.show_popup("Installation", "Installing Zonos TTS...\nThis may take a few minutes.")
         
-        def install_thread():
-            success = install_zonos_tts()
-            Clock.schedule_once(lambda dt: self.installation_complete(success), 0)
-        
-        threading.Thread(target=install_thread, daemon=True).start()
+        self.job_executor.submit(
+            'Zonos TTS Installation',
+            lambda cancel_event: install_zonos_tts(),
+            priority=PRIORITY_INSTALL,
+            on_complete=self.installation_complete,
+            on_error=lambda e: self.installation_complete(False)
+        )
     
     def installation_complete(self, success):
         """Handle installation completion"""
@@ -235,10 +367,6 @@ class VoiceCloningApp(App):
         if not self.zonos_available:
             self.show_popup("Fehler", "Zonos TTS ist nicht installiert. Bitte installieren Sie es zuerst.")
             return
-            
-        if self.training_in_progress:
-            self.show_popup("Training läuft", "Ein Training ist bereits im Gange. Bitte warten Sie, bis es abgeschlossen ist.")
-            return
         
         # Validate inputs
         selected_files = self.file_chooser.selection
@@ -260,61 +388,92 @@ class VoiceCloningApp(App):
                           "Für optimales Voice-Cloning werden mindestens 3 Audiodateien empfohlen.\n"
                           "Möchten Sie trotzdem fortfahren?")
         
-        self.training_in_progress = True
-        self.train_button.text = "Training läuft..."
-        self.train_button.disabled = True
+        voice_model = ZonosVoiceModel(model_name)
         
-        self.update_log(f'=== Voice-Cloning Training gestartet ===')
+        def train_job(cancel_event):
+            # Reset progress once the job actually starts
+            Clock.schedule_once(lambda dt: self.reset_training_progress(), 0)
+            
+            # Training reports progress per audio block; only hand the UI thread
+            # updates it can show (a new whole percent or a new stage)
+            shown = None
+            
+            def progress_callback(progress):
+                nonlocal shown
+                report = voice_model.training_progress.report()
+                key = (int(progress), report['stage'])
+                if key == shown:
+                    return
+                shown = key
+                Clock.schedule_once(lambda dt: self.update_training_progress(progress, report), 0)
+            
+            # Continue where a run with the same files was interrupted (app killed, crash)
+            return voice_model.train_voice_model(audio_files, progress_callback, cancel_event,
+                                                 resume=True)
+        
+        job = self.job_executor.submit(
+            f'Training "{model_name}"',
+            train_job,
+            priority=PRIORITY_TRAINING,
+            on_complete=lambda success: self.training_complete(job, success, voice_model),
+            on_error=lambda e: self.training_error(job, str(e)),
+            on_cancel=lambda: self.training_cancelled(job, voice_model)
+        )
+        self.training_jobs.add(job.job_id)
+        self.cancel_training_button.disabled = False
+        
+        self.update_log(f'=== Voice-Cloning Training eingereiht (Auftrag #{job.job_id}) ===')
         self.update_log(f'Modellname: {model_name}')
         self.update_log(f'Anzahl Audiodateien: {len(audio_files)}')
         self.update_log(f'Zonos TTS wird verwendet für deutsche Sprachsynthese')
-        
-        # Reset progress
-        self.progress_bar.value = 0
-        self.progress_label.text = 'Fortschritt: 0%'
-        
-        # Start training in background thread
-        def train_thread():
-            try:
-                # Create voice model
-                voice_model = ZonosVoiceModel(model_name)
-                
-                # Progress callback
-                def progress_callback(progress):
-                    Clock.schedule_once(lambda dt: self.update_training_progress(progress), 0)
-                
-                # Train the model
-                success = voice_model.train_voice_model(audio_files, progress_callback)
-                
-                # Handle completion
-                Clock.schedule_once(lambda dt: self.training_complete(success, voice_model), 0)
-                
-            except Exception as e:
-                Clock.schedule_once(lambda dt: self.training_error(str(e)), 0)
-        
-        threading.Thread(target=train_thread, daemon=True).start()
     
-    def update_training_progress(self, progress):
+    def cancel_training(self, instance):
+        """Cancel all queued and running training jobs"""
+        for job_id in list(self.training_jobs):
+            self.job_executor.cancel(job_id)
+        self.update_log('Abbruch des Trainings angefordert...')
+    
+    def training_finished(self, job):
+        """Bookkeeping shared by all training completion handlers"""
+        self.training_jobs.discard(job.job_id)
+        self.cancel_training_button.disabled = not self.training_jobs
+    
+    def reset_training_progress(self):
+        """Reset the progress display when a training job starts"""
+        self.training_stage = None
+        self.update_training_progress(0)
+    
+    def update_training_progress(self, progress, report=None):
         """Update training progress on UI thread"""
         self.progress_bar.value = progress
-        self.progress_label.text = f'Fortschritt: {int(progress)}%'
-        
-        # Log progress milestones
-        if int(progress) in [25, 50, 75]:
-            stage_names = {25: "Audiodateien verarbeitet", 
-                          50: "Speaker-Embedding erstellt", 
-                          75: "Modell trainiert"}
-            self.update_log(f'{stage_names.get(int(progress), "")} ({int(progress)}%)')
+        if not report or report['eta_seconds'] is None or progress >= 100:
+            self.progress_label.text = f'Fortschritt: {int(progress)}%'
+        else:
+            self.progress_label.text = (f'Fortschritt: {int(progress)}% – '
+                                        f'noch ca. {format_eta(report["eta_seconds"])}')
+        
+        # Log each training stage once as it starts
+        stage = report and report['stage']
+        if stage and stage != self.training_stage:
+            self.training_stage = stage
+            self.update_log(f'{self.TRAINING_STAGE_NAMES.get(stage, stage)} ({int(progress)}%)')
     
-    def training_complete(self, success, voice_model):
+    def training_complete(self, job, success, voice_model):
         """Handle training completion"""
-        self.training_in_progress = False
-        self.train_button.text = "Voice-Cloning Training starten"
-        self.train_button.disabled = False
+        self.training_finished(job)
         
         if success:
             self.update_log('=== Training erfolgreich abgeschlossen! ===')
             self.update_log(f'Stimmenmodell "{voice_model.model_name}" ist bereit')
+            source = voice_model.training_report.get('input')
+            if source:
+                self.update_log(f'{source["files"]} Dateien, {format_eta(source["audio_seconds"])} Audio '
+                                f'({source["decoded_mb"]:.0f} MB dekodiert)')
+            dedup = voice_model.training_report.get('dedup')
+            if dedup and dedup['skipped']:
+                self.update_log(f'{len(dedup["skipped"])} doppelte Audiodateien übersprungen '
+                                f'({dedup["skipped_audio_seconds"]:.0f} s Audio, '
+                                f'ca. {dedup.get("estimated_seconds_saved", 0.0):.0f} s gespart)')
             self.update_log('Sie können jetzt zum "Deutsche Sprachsynthese" Tab wechseln')
             self.current_voice_model = voice_model
             self.show_popup("Training abgeschlossen", 
@@ -326,15 +485,18 @@ class VoiceCloningApp(App):
                           "Das Training konnte nicht abgeschlossen werden. "
                           "Bitte überprüfen Sie die Audiodateien und versuchen Sie es erneut.")
     
-    def training_error(self, error_message):
+    def training_error(self, job, error_message):
         """Handle training error"""
-        self.training_in_progress = False
-        self.train_button.text = "Voice-Cloning Training starten"
-        self.train_button.disabled = False
+        self.training_finished(job)
         
         self.update_log(f'Training-Fehler: {error_message}')
         self.show_popup("Training-Fehler", f"Ein Fehler ist aufgetreten:\n{error_message}")
     
+    def training_cancelled(self, job, voice_model):
+        """Handle training cancellation"""
+        self.training_finished(job)
+        self.update_log(f'=== Training "{voice_model.model_name}" abgebrochen ===')
+    
     def refresh_models(self, instance):
         """Refresh the list of available models"""
         models = ZonosVoiceModel.list_available_models()
@@ -375,10 +537,6 @@ class VoiceCloningApp(App):
             self.show_popup("Fehler", "Zonos TTS ist nicht installiert")
             return
             
-        if self.synthesis_in_progress:
-            self.show_popup("Synthese läuft", "Eine Sprachsynthese ist bereits im Gange")
-            return
-            
         if not self.current_voice_model:
             self.show_popup("Fehler", "Kein Stimmenmodell geladen.\nBitte laden Sie zuerst ein trainiertes Modell.")
             return
@@ -388,37 +546,31 @@ class VoiceCloningApp(App):
             self.show_popup("Fehler", "Bitte geben Sie einen Text ein")
             return
         
-        self.synthesis_in_progress = True
-        self.synthesize_button.text = "Generierung läuft..."
-        self.synthesize_button.disabled = True
-        self.play_button.disabled = True
-        self.tts_status.text = 'Deutsche Sprachsynthese mit Voice-Cloning läuft...'
+        # Bind the job to the model that is loaded right now
+        voice_model = self.current_voice_model
         
-        def synthesis_thread():
-            try:
-                # Generate output path
-                output_path = os.path.join(
-                    os.path.expanduser("~"), 
-                    f"stimmenklon_output_{self.current_voice_model.model_name}.wav"
-                )
-                
-                # Synthesize speech
-                result_path = self.current_voice_model.synthesize_speech(text, output_path)
-                
-                # Handle completion
-                Clock.schedule_once(lambda dt: self.synthesis_complete(result_path), 0)
-                
-            except Exception as e:
-                Clock.schedule_once(lambda dt: self.synthesis_error(str(e)), 0)
+        # One output file per request so queued syntheses don't overwrite each other
+        self.synthesis_counter += 1
+        output_path = os.path.join(
+            os.path.expanduser("~"), 
+            f"stimmenklon_output_{voice_model.model_name}_{self.synthesis_counter}.wav"
+        )
+        
+        def synthesis_job(cancel_event):
+            return voice_model.synthesize_speech(text, output_path, cancel_event)
         
-        threading.Thread(target=synthesis_thread, daemon=True).start()
+        job = self.job_executor.submit(
+            f'Synthese "{text[:30]}"',
+            synthesis_job,
+            priority=PRIORITY_SYNTHESIS,
+            on_complete=self.synthesis_complete,
+            on_error=lambda e: self.synthesis_error(str(e)),
+            on_cancel=lambda: setattr(self.tts_status, 'text', f'Synthese #{job.job_id} abgebrochen')
+        )
+        self.tts_status.text = f'Deutsche Sprachsynthese eingereiht (Auftrag #{job.job_id})'
     
     def synthesis_complete(self, output_path):
         """Handle synthesis completion"""
-        self.synthesis_in_progress = False
-        self.synthesize_button.text = "Deutsche Sprache generieren"
-        self.synthesize_button.disabled = False
-        
         if output_path and os.path.exists(output_path):
             self.play_button.disabled = False
             self.output_path_label.text = f'Ausgabedatei: {output_path}'
@@ -433,10 +585,6 @@ class VoiceCloningApp(App):
     
     def synthesis_error(self, error_message):
         """Handle synthesis error"""
-        self.synthesis_in_progress = False
-        self.synthesize_button.text = "Deutsche Sprache generieren"
-        self.synthesize_button.disabled = False
-        
         self.tts_status.text = f'Synthese-Fehler: {error_message}'
         self.show_popup("Synthese-Fehler", f"Fehler bei der Sprachgenerierung:\n{error_message}")
     
@@ -0,0 +1,348 @@
+"""
+Voice Model Store
+=================
+
+Stores trained voice models so that training and serving processes can
+share one store without a global lock:
+
+- The store root defaults to ~/.stimmenklon_models and can be changed with
+  STIMMENKLON_MODEL_DIR or the `root` argument.
+- Models live in a hash-prefix sharded layout, <root>/ab/cd/<name>.pt with
+  ab/cd taken from the SHA-1 of the name, so lookups are O(1) path
+  computations and no directory grows with the number of voices.
+- Models still in the old flat layout (<root>/<name>.pt) are moved into
+  their shard when first accessed, and by a background pass over the root.
+- Writers serialize to a temporary file next to the target, fsync it and
+  publish it with an atomic os.replace. A reader opening a model file always
+  gets a complete file, either the previous version or the new one.
+- Saves, deletes and migrations of the same voice are serialized by a
+  per-voice advisory lock (fcntl.flock on <shard>/<name>.lock); different
+  voices never wait for each other, and readers take no lock at all.
+- Every save increments the voice's generation number, stored in the model
+  data, so readers can tell which version they loaded.
+- Derived per-voice data (e.g. cached conditioning state) can be kept in
+  sidecar files, <shard>/.<name>.<tag>.pt. They are removed whenever the
+  voice is saved again or deleted.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking falls back to this process only
+    fcntl = None
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".stimmenklon_models")
+MODEL_SUFFIX = ".pt"
+LOCK_SUFFIX = ".lock"
+SIDECAR_TAG_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+
+def default_model_dir() -> str:
+    """
+    Store root from STIMMENKLON_MODEL_DIR, falling back to ~/.stimmenklon_models.
+    """
+    return os.environ.get('STIMMENKLON_MODEL_DIR') or DEFAULT_MODEL_DIR
+
+
+# Per-process locks, used where fcntl is unavailable
+_local_locks: Dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _pickle_save(obj, path: str):
+    import pickle
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f)
+
+
+def _pickle_load(path: str):
+    import pickle
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class ModelStore:
+    """
+    Directory of voice model files with atomic, generation-numbered saves.
+    """
+
+    def __init__(self, root: str = None,
+                 save_func: Callable[[Any, str], None] = None,
+                 load_func: Callable[[str], Any] = None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory, defaults to default_model_dir()
+            save_func: Serializer called as save_func(data, path), e.g. torch.save
+            load_func: Deserializer called as load_func(path)
+        """
+        self.root = root or default_model_dir()
+        self._save = save_func or _pickle_save
+        self._load = load_func or _pickle_load
+        self._migration_thread = None
+
+    @staticmethod
+    def _check_name(name: str):
+        if not name or name.startswith('.') or '/' in name or '\\' in name or '\0' in name:
+            raise ValueError(f"Invalid voice name: {name!r}")
+
+    def shard_dir(self, name: str) -> str:
+        """Shard directory of a voice: <root>/ab/cd from the SHA-1 of its name."""
+        self._check_name(name)
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4])
+
+    def path_for(self, name: str) -> str:
+        """Path of a voice's model file."""
+        return os.path.join(self.shard_dir(name), name + MODEL_SUFFIX)
+
+    def _flat_path(self, name: str) -> str:
+        return os.path.join(self.root, name + MODEL_SUFFIX)
+
+    @contextmanager
+    def lock(self, name: str):
+        """
+        Hold the exclusive advisory lock of one voice.
+        """
+        lock_dir = self.shard_dir(name)
+        os.makedirs(lock_dir, exist_ok=True)
+        lock_path = os.path.join(lock_dir, name + LOCK_SUFFIX)
+
+        if fcntl is None:
+            with _local_locks_guard:
+                local = _local_locks.setdefault(lock_path, threading.Lock())
+            with local:
+                yield
+            return
+
+        with open(lock_path, 'a') as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def sidecar_path(self, name: str, tag: str) -> str:
+        """Path of a sidecar file of a voice, <shard>/.<name>.<tag>.pt."""
+        if not SIDECAR_TAG_PATTERN.fullmatch(tag):
+            raise ValueError(f"Invalid sidecar tag: {tag!r}")
+        return os.path.join(self.shard_dir(name), f".{name}.{tag}{MODEL_SUFFIX}")
+    
+    def _sidecar_paths(self, name: str) -> List[str]:
+        shard = self.shard_dir(name)
+        prefix = f".{name}."
+        try:
+            entries = os.listdir(shard)
+        except FileNotFoundError:
+            return []
+        # The tag pattern has no dots, so sidecars of voice "a" never match
+        # files of a voice "a.b" in the same shard
+        return [os.path.join(shard, entry) for entry in entries
+                if entry.startswith(prefix) and entry.endswith(MODEL_SUFFIX)
+                and SIDECAR_TAG_PATTERN.fullmatch(entry[len(prefix):-len(MODEL_SUFFIX)])]
+    
+    def save_sidecar(self, name: str, tag: str, data: Any):
+        """
+        Write a sidecar file atomically. Sidecars hold derived data only, so
+        they are neither locked nor fsynced.
+        """
+        path = self.sidecar_path(name, tag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+        try:
+            self._save(data, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def load_sidecar(self, name: str, tag: str) -> Optional[Any]:
+        """Load a sidecar file, or None if it doesn't exist or is unreadable."""
+        path = self.sidecar_path(name, tag)
+        if not os.path.exists(path):
+            return None
+        try:
+            return self._load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sidecar {path}: {e}")
+            return None
+    
+    def _remove_sidecars(self, name: str):
+        for path in self._sidecar_paths(name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path_for(name)) or os.path.exists(self._flat_path(name))
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the current version of a voice, or None if it doesn't exist.
+        No lock is needed: the file is only ever replaced atomically.
+        """
+        path = self.path_for(name)
+        try:
+            return self._load(path)
+        except FileNotFoundError:
+            pass
+        if not self.migrate(name):
+            return None
+        try:
+            return self._load(path)
+        except FileNotFoundError:
+            return None
+
+    def migrate(self, name: str) -> bool:
+        """
+        Move a voice from the flat layout into its shard.
+
+        Returns:
+            bool: True if the voice now exists in the sharded layout
+        """
+        flat_path = self._flat_path(name)
+        if not os.path.exists(flat_path):
+            # Possibly just migrated by another process
+            return os.path.exists(self.path_for(name))
+
+        with self.lock(name):
+            path = self.path_for(name)
+            if os.path.exists(flat_path):
+                if os.path.exists(path):
+                    os.remove(flat_path)  # a sharded save already superseded it
+                else:
+                    os.replace(flat_path, path)
+                    _fsync_dir(os.path.dirname(path))
+                    logger.debug(f"Migrated {name} to the sharded layout")
+            return os.path.exists(path)
+
+    def flat_names(self) -> List[str]:
+        """Voices still stored in the flat layout."""
+        if not os.path.isdir(self.root):
+            return []
+        return [entry[:-len(MODEL_SUFFIX)] for entry in os.listdir(self.root)
+                if entry.endswith(MODEL_SUFFIX) and not entry.startswith('.')]
+
+    def migrate_flat_layout(self) -> int:
+        """
+        Move all voices from the flat layout into their shards.
+
+        Returns:
+            Number of migrated voices
+        """
+        migrated = 0
+        for name in self.flat_names():
+            try:
+                if self.migrate(name):
+                    migrated += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not migrate {name}: {e}")
+        if migrated:
+            logger.info(f"Migrated {migrated} voice(s) to the sharded store layout")
+        return migrated
+
+    def start_background_migration(self) -> Optional[threading.Thread]:
+        """
+        Migrate the flat layout on a daemon thread while the store stays usable.
+        """
+        if self._migration_thread is None:
+            self._migration_thread = threading.Thread(target=self.migrate_flat_layout,
+                                                      name="ModelStoreMigration", daemon=True)
+            self._migration_thread.start()
+        return self._migration_thread
+
+    def generation(self, name: str) -> int:
+        """Current generation of a voice, 0 if it doesn't exist."""
+        data = self.load(name)
+        return int(data.get('generation', 0)) if isinstance(data, dict) else 0
+
+    def save(self, name: str, data: Dict[str, Any]) -> int:
+        """
+        Publish a new version of a voice.
+
+        Returns:
+            The generation number of the saved version
+        """
+        path = self.path_for(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self.lock(name):
+            self.migrate(name)
+            generation = self.generation(name) + 1
+            data = dict(data, generation=generation, saved_at=time.time())
+
+            tmp_path = os.path.join(os.path.dirname(path),
+                                    f".{name}{MODEL_SUFFIX}.tmp{os.getpid()}-{threading.get_ident()}")
+            try:
+                self._save(data, tmp_path)
+                with open(tmp_path, 'rb') as f:
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            _fsync_dir(os.path.dirname(path))
+            self._remove_sidecars(name)
+
+        logger.debug(f"Saved {name} generation {generation}")
+        return generation
+
+    def delete(self, name: str) -> bool:
+        """
+        Remove a voice. Returns False if it didn't exist.
+        """
+        with self.lock(name):
+            self._remove_sidecars(name)
+            removed = False
+            for path in (self.path_for(name), self._flat_path(name)):
+                try:
+                    os.remove(path)
+                    removed = True
+                except FileNotFoundError:
+                    pass
+            return removed
+
+    def list_names(self) -> List[str]:
+        """
+        Names of all stored voices, in both layouts.
+        This walks every shard; use load()/exists() to look up single voices.
+        """
+        names = set(self.flat_names())
+        if not os.path.isdir(self.root):
+            return []
+        for first in os.listdir(self.root):
+            first_dir = os.path.join(self.root, first)
+            if len(first) != 2 or not os.path.isdir(first_dir):
+                continue
+            for second in os.listdir(first_dir):
+                shard = os.path.join(first_dir, second)
+                if len(second) != 2 or not os.path.isdir(shard):
+                    continue
+                names.update(entry[:-len(MODEL_SUFFIX)] for entry in os.listdir(shard)
+                             if entry.endswith(MODEL_SUFFIX) and not entry.startswith('.'))
+        return sorted(names)
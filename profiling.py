@@ -0,0 +1,478 @@
+"""
+Profiling Hooks
+===============
+
+Opt-in instrumentation for attributing time and memory to the stages of
+voice training and synthesis. Disabled by default; when disabled every hook
+is a no-op context manager.
+
+CPU profiling is enabled with STIMMENKLON_PROFILE=1, ``--profile`` in
+demo_voice_cloning.py or the hidden toggle in the app (tap the job queue
+list five times). Each call of a profiled entry point (train_voice_model,
+synthesize_speech, load_voice_model) runs under cProfile and a stack
+sampler and writes two files:
+
+- <stage>-<time>-<pid>-<n>.pstats: cProfile statistics, for pstats or snakeviz
+- <stage>-<time>-<pid>-<n>.collapsed: sampled stacks in the collapsed
+  format of flamegraph.pl, speedscope and inferno
+
+Only the outermost entry point of a thread is profiled, and only one at a
+time per process (cProfile can't run nested or, on Python 3.12+, in
+parallel); overlapping calls run unprofiled.
+
+Memory profiling is enabled with STIMMENKLON_PROFILE_MEMORY (``rss`` or
+``1`` for RSS and torch allocator stats, ``tracemalloc`` to also trace
+Python allocations) or with ``--profile-memory`` in demo_voice_cloning.py.
+Each stage records RSS at entry and exit, its peak RSS (sampled by a
+background thread) and, if enabled, its tracemalloc peak. Stages nest,
+e.g. ``train/preprocess``, and repeated stages are aggregated. The JSON
+report is written to STIMMENKLON_PROFILE_DIR (default <cache>/profiles)
+at exit or on request.
+"""
+
+import atexit
+import collections
+import contextlib
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from cpu_inference import current_rss_mb, get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MEMORY_MODE_RSS = 'rss'
+MEMORY_MODE_TRACEMALLOC = 'tracemalloc'
+MEMORY_MODES = (MEMORY_MODE_RSS, MEMORY_MODE_TRACEMALLOC)
+
+SAMPLE_INTERVAL_SECONDS = 0.01
+STACK_SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def default_profile_dir() -> str:
+    """
+    Directory for profiling reports: STIMMENKLON_PROFILE_DIR or <cache>/profiles.
+    """
+    profile_dir = os.environ.get('STIMMENKLON_PROFILE_DIR')
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        return profile_dir
+    return get_cache_dir('profiles')
+
+
+def _memory_mode_from_env() -> Optional[str]:
+    value = os.environ.get('STIMMENKLON_PROFILE_MEMORY', '').strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value in ('1', 'true', 'yes', 'on'):
+        return MEMORY_MODE_RSS
+    if value not in MEMORY_MODES:
+        logger.warning(f"Unknown memory profiling mode '{value}', using {MEMORY_MODE_RSS}")
+        return MEMORY_MODE_RSS
+    return value
+
+
+def _torch_allocated_mb() -> Optional[float]:
+    """Memory held by the torch CUDA allocator, if torch uses a GPU."""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return torch.cuda.memory_allocated() / 1024 / 1024
+    except Exception:
+        pass
+    return None
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+class MemoryProfiler:
+    """
+    Per-stage RSS, tracemalloc and torch allocator statistics.
+    """
+
+    def __init__(self, mode: str = MEMORY_MODE_RSS, interval: float = SAMPLE_INTERVAL_SECONDS):
+        """
+        Initialize the profiler.
+
+        Args:
+            mode: 'rss' or 'tracemalloc' (also traces Python allocations, slower)
+            interval: RSS sampling interval in seconds while a stage is active
+        """
+        if mode not in MEMORY_MODES:
+            raise ValueError(f"Unsupported memory profiling mode '{mode}', expected one of {MEMORY_MODES}")
+        self.mode = mode
+        self.interval = interval
+        self.started_at = time.time()
+        self.baseline_rss_mb = current_rss_mb()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._local = threading.local()
+        self._active: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+
+        if mode == MEMORY_MODE_TRACEMALLOC:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def _stack(self) -> List[str]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _ensure_sampler(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name="MemoryProfiler",
+                                             daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._active:
+                    continue
+                self._fold_rss(current_rss_mb())
+
+    def _fold_rss(self, rss: Optional[float]):
+        """Raise the peak of all active stages to an RSS sample."""
+        if rss is None:
+            return
+        for record in self._active:
+            record['peak'] = max(record['peak'], rss)
+
+    def _tracemalloc_peak(self) -> Optional[float]:
+        """Fold the tracemalloc peak since the last reset into all active stages."""
+        if self.mode != MEMORY_MODE_TRACEMALLOC:
+            return None
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for record in self._active:
+            record['traced_peak'] = max(record['traced_peak'], peak)
+        return current
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Measure one stage. Stages entered inside it are recorded as name/child.
+        """
+        stack = self._stack()
+        stack.append(name)
+        path = "/".join(stack)
+        start_rss = current_rss_mb()
+        with self._lock:
+            traced = self._tracemalloc_peak()
+            record = {'peak': start_rss or 0.0, 'traced_peak': traced or 0.0}
+            self._active.append(record)
+            self._fold_rss(start_rss)
+        self._ensure_sampler()
+        start_torch = _torch_allocated_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            end_rss = current_rss_mb()
+            with self._lock:
+                self._tracemalloc_peak()
+                self._fold_rss(end_rss)
+                self._active = [active for active in self._active if active is not record]
+                peak = record['peak']
+                self._record(path, seconds, start_rss, end_rss, peak,
+                             record['traced_peak'] if traced is not None else None,
+                             start_torch, _torch_allocated_mb())
+            stack.pop()
+
+    def _record(self, path, seconds, start_rss, end_rss, peak, traced_peak, start_torch, end_torch):
+        stats = self._stages.setdefault(path, {'calls': 0, 'seconds': 0.0, 'rss_peak_mb': None,
+                                               'rss_max_growth_mb': None, 'rss_entry_mb': start_rss,
+                                               'rss_exit_mb': None})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['rss_exit_mb'] = end_rss
+        if start_rss is not None:
+            stats['rss_peak_mb'] = max(stats['rss_peak_mb'] or 0.0, peak)
+            stats['rss_max_growth_mb'] = max(stats['rss_max_growth_mb'] or 0.0, peak - start_rss)
+        if traced_peak is not None:
+            stats['tracemalloc_peak_mb'] = max(stats.get('tracemalloc_peak_mb', 0.0),
+                                               traced_peak / 1024 / 1024)
+        if start_torch is not None and end_torch is not None:
+            stats['torch_allocated_delta_mb'] = end_torch - start_torch
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Aggregated statistics per stage, in order of first completion.
+        """
+        with self._lock:
+            stages = {}
+            for path, stats in self._stages.items():
+                stages[path] = {key: (round(value, 4) if key == 'seconds' else
+                                      value if key == 'calls' else _round(value))
+                                for key, value in stats.items()}
+        torch_peak = None
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch_peak = _round(torch.cuda.max_memory_allocated() / 1024 / 1024)
+        except Exception:
+            pass
+        return {
+            'pid': os.getpid(),
+            'mode': self.mode,
+            'started_at': self.started_at,
+            'baseline_rss_mb': _round(self.baseline_rss_mb),
+            'final_rss_mb': _round(current_rss_mb()),
+            'torch_peak_allocated_mb': torch_peak,
+            'stages': stages,
+        }
+
+    def write_report(self, path: str = None) -> str:
+        """
+        Write the JSON report, by default to the profile directory.
+
+        Returns:
+            Path of the report
+        """
+        if path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+            path = os.path.join(default_profile_dir(), f"memory-{stamp}-{os.getpid()}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"Memory profile written to {path}")
+        return path
+
+    def stop(self):
+        self._stop.set()
+
+
+_memory_profiler: Optional[MemoryProfiler] = None
+_memory_profiler_checked = False
+_profiler_lock = threading.Lock()
+
+
+def enable_memory_profiling(mode: str = MEMORY_MODE_RSS, report_at_exit: bool = True) -> MemoryProfiler:
+    """
+    Start recording memory per stage for the rest of the process.
+
+    Args:
+        mode: 'rss' or 'tracemalloc'
+        report_at_exit: Write the JSON report when the process exits
+    """
+    global _memory_profiler, _memory_profiler_checked
+    with _profiler_lock:
+        if _memory_profiler is None:
+            _memory_profiler = MemoryProfiler(mode)
+            if report_at_exit:
+                atexit.register(_write_report_at_exit)
+        _memory_profiler_checked = True
+        return _memory_profiler
+
+
+def get_memory_profiler() -> Optional[MemoryProfiler]:
+    """
+    The active memory profiler, enabling it from STIMMENKLON_PROFILE_MEMORY on first use.
+    """
+    global _memory_profiler_checked
+    if not _memory_profiler_checked:
+        mode = _memory_mode_from_env()
+        if mode:
+            return enable_memory_profiling(mode)
+        _memory_profiler_checked = True
+    return _memory_profiler
+
+
+def _write_report_at_exit():
+    if _memory_profiler is not None and _memory_profiler.report()['stages']:
+        try:
+            _memory_profiler.write_report()
+        except OSError as e:
+            logger.warning(f"Could not write memory profile: {e}")
+
+
+def memory_stage(name: str):
+    """
+    Context manager measuring a stage if memory profiling is enabled.
+    """
+    profiler = get_memory_profiler()
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval and counts
+    collapsed stacks ("outer;inner;leaf").
+    """
+
+    def __init__(self, thread_id: int, interval: float = STACK_SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: 'collections.Counter[str]' = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.counts[";".join(reversed(names))] += 1
+
+    def write(self, path: str):
+        """Write the samples in collapsed-stack format, one "stack count" per line."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CpuProfiler:
+    """
+    cProfile plus stack sampling around profiled entry points.
+    """
+
+    def __init__(self, output_dir: str = None, sample_interval: float = STACK_SAMPLE_INTERVAL_SECONDS):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Directory for .pstats and .collapsed files, defaults
+                        to default_profile_dir()
+            sample_interval: Stack sampling interval in seconds
+        """
+        self.output_dir = output_dir or default_profile_dir()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.sample_interval = sample_interval
+        self.outputs: List[str] = []
+        self.skipped = 0
+        self._busy = threading.Lock()
+        self._local = threading.local()
+        self._sequence = 0
+
+    @contextlib.contextmanager
+    def session(self, stage: str):
+        """
+        Profile the enclosed call, unless a profile is already running.
+        """
+        if getattr(self._local, 'active', False):
+            yield
+            return
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            yield
+            return
+
+        self._local.active = True
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        profile = cProfile.Profile()
+        try:
+            sampler.start()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                sampler.stop()
+                self._write(stage, profile, sampler)
+        finally:
+            self._local.active = False
+            self._busy.release()
+
+    def _write(self, stage: str, profile: 'cProfile.Profile', sampler: StackSampler):
+        self._sequence += 1
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.output_dir, f"{stage}-{stamp}-{os.getpid()}-{self._sequence}")
+        try:
+            profile.dump_stats(f"{base}.pstats")
+            sampler.write(f"{base}.collapsed")
+        except OSError as e:
+            logger.warning(f"Could not write CPU profile {base}: {e}")
+            return
+        self.outputs.extend([f"{base}.pstats", f"{base}.collapsed"])
+        logger.info(f"CPU profile written to {base}.pstats / .collapsed")
+
+
+_cpu_profiler: Optional[CpuProfiler] = None
+_cpu_profiler_checked = False
+
+
+def enable_cpu_profiling(output_dir: str = None) -> CpuProfiler:
+    """
+    Profile every following call of a profiled entry point.
+
+    Args:
+        output_dir: Directory for the profiles, defaults to default_profile_dir()
+    """
+    global _cpu_profiler, _cpu_profiler_checked
+    with _profiler_lock:
+        if _cpu_profiler is None:
+            _cpu_profiler = CpuProfiler(output_dir)
+        _cpu_profiler_checked = True
+        return _cpu_profiler
+
+
+def disable_cpu_profiling():
+    """Stop profiling new calls; running profiles still finish and are written."""
+    global _cpu_profiler, _cpu_profiler_checked
+    with _profiler_lock:
+        _cpu_profiler = None
+        _cpu_profiler_checked = True
+
+
+def get_cpu_profiler() -> Optional[CpuProfiler]:
+    """
+    The active CPU profiler, enabling it from STIMMENKLON_PROFILE on first use.
+    """
+    global _cpu_profiler_checked
+    if not _cpu_profiler_checked:
+        if os.environ.get('STIMMENKLON_PROFILE', '').strip().lower() in ('1', 'true', 'yes', 'on'):
+            return enable_cpu_profiling()
+        _cpu_profiler_checked = True
+    return _cpu_profiler
+
+
+def cpu_profile(stage: str):
+    """
+    Context manager profiling a call if CPU profiling is enabled.
+    """
+    profiler = get_cpu_profiler()
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.session(stage)
+
+
+def profiled(stage: str):
+    """
+    Decorator running a method inside a memory stage and CPU profile of the same name.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with memory_stage(stage), cpu_profile(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
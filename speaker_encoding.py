@@ -0,0 +1,151 @@
+"""
+Batched Speaker Encoding
+========================
+
+Helpers for the embedding stage of voice training. Instead of passing one
+long concatenated signal to the speaker encoder, the audio is cut into
+fixed-length windows, windows of similar length are bucketed and batched
+with minimal padding, batches are sized to stay under a memory cap, and
+the per-window embeddings are combined with a robust mean that
+down-weights outlier windows (noise bursts, music, other speakers).
+"""
+
+import math
+from collections import defaultdict, namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import torch
+    import torch.nn.functional as F
+    TORCH_AVAILABLE = True
+except ImportError:
+    torch = None
+    F = None
+    TORCH_AVAILABLE = False
+
+WINDOW_SECONDS = 3.0
+MIN_WINDOW_SECONDS = 1.0
+BUCKET_SECONDS = 0.5
+
+# Encoder working memory per input sample (activations, spectra) in bytes,
+# used to turn the memory cap into a batch size
+BYTES_PER_SAMPLE = 64
+
+Window = namedtuple('Window', ['start', 'length', 'bucket'])
+
+
+def plan_windows(num_samples: int, sample_rate: int, window_seconds: float = WINDOW_SECONDS,
+                 min_window_seconds: float = MIN_WINDOW_SECONDS,
+                 bucket_seconds: float = BUCKET_SECONDS) -> List[Window]:
+    """
+    Cut a signal into fixed-length windows.
+
+    A trailing remainder becomes its own window if it is at least
+    min_window_seconds long; its padded length ('bucket') is rounded up to a
+    multiple of bucket_seconds. A signal shorter than one window is used whole.
+    """
+    window = max(1, int(window_seconds * sample_rate))
+    min_window = int(min_window_seconds * sample_rate)
+    bucket = max(1, int(bucket_seconds * sample_rate))
+
+    windows = [Window(start, window, window) for start in range(0, num_samples - window + 1, window)]
+    tail_start = len(windows) * window
+    tail = num_samples - tail_start
+    if tail and (tail >= min_window or not windows):
+        windows.append(Window(tail_start, tail, min(window, math.ceil(tail / bucket) * bucket)))
+    return windows
+
+
+def batch_windows(windows: List[Window], memory_cap_mb: float) -> Iterator[List[Window]]:
+    """
+    Group windows of the same bucket into batches whose padded size stays
+    under memory_cap_mb of encoder working memory (at least one window each).
+    """
+    by_bucket = defaultdict(list)
+    for window in windows:
+        by_bucket[window.bucket].append(window)
+
+    max_samples = memory_cap_mb * 1024 * 1024 / BYTES_PER_SAMPLE
+    for bucket in sorted(by_bucket, reverse=True):
+        group = by_bucket[bucket]
+        batch_size = max(1, int(max_samples // bucket))
+        for start in range(0, len(group), batch_size):
+            yield group[start:start + batch_size]
+
+
+def padded_batch(audio, batch: List[Window]) -> Tuple['torch.Tensor', 'torch.Tensor']:
+    """
+    Stack the windows of one batch into a zero-padded (batch, bucket) tensor.
+    `audio` is a tensor or anything whose slices are float32 arrays.
+
+    Returns:
+        Tuple of (padded audio, window lengths)
+    """
+    padded = torch.zeros(len(batch), batch[0].bucket, dtype=torch.float32)
+    for row, window in enumerate(batch):
+        padded[row, :window.length] = torch.as_tensor(audio[window.start:window.start + window.length])
+    lengths = torch.tensor([window.length for window in batch])
+    return padded, lengths
+
+
+class BandEnergyEncoder(torch.nn.Module if TORCH_AVAILABLE else object):
+    """
+    Placeholder speaker encoder: log band energies of the unpadded STFT
+    frames, projected to the embedding size with a fixed random matrix.
+
+    Maps a (windows, samples) zero-padded batch and its window lengths to
+    (windows, embedding_size); a real implementation would run the Zonos
+    speaker encoder with a padding mask built from the lengths.
+    """
+
+    def __init__(self, embedding_size: int = 256, n_fft: int = 1024, hop: int = 512):
+        super().__init__()
+        self.n_fft = n_fft
+        self.hop = hop
+        self.register_buffer('window', torch.hann_window(n_fft))
+        self.register_buffer('projection', torch.randn(n_fft // 2 + 1, embedding_size,
+                                                       generator=torch.Generator().manual_seed(0)))
+
+    def forward(self, batch: 'torch.Tensor', lengths: 'torch.Tensor') -> 'torch.Tensor':
+        spectrum = torch.stft(batch, self.n_fft, hop_length=self.hop, window=self.window,
+                              return_complex=True).abs().pow(2)
+        frames = spectrum.shape[-1]
+        positions = torch.arange(frames, device=batch.device)[None, :] * self.hop
+        valid = (positions < lengths[:, None]).float()
+        energies = (spectrum * valid[:, None, :]).sum(-1) / valid.sum(-1, keepdim=True).clamp(min=1)
+        return torch.log(energies + 1e-8) @ self.projection
+
+
+def robust_mean(embeddings: 'torch.Tensor', weights: Optional['torch.Tensor'] = None,
+                iterations: int = 3, cutoff: float = 2.5,
+                min_spread: float = 0.01) -> Tuple['torch.Tensor', 'torch.Tensor']:
+    """
+    Iteratively reweighted mean direction of L2-normalized embeddings.
+
+    Windows whose cosine distance to the current mean exceeds the median
+    distance by more than `cutoff` robust standard deviations (MAD) get their
+    weight reduced in proportion to the squared excess. The spread is at
+    least `min_spread`, so near-identical windows are never treated as outliers.
+
+    Args:
+        embeddings: (num_windows, dim) embeddings
+        weights: Base weight per window (e.g. its duration), default uniform
+
+    Returns:
+        Tuple of (normalized mean embedding, relative weight per window in [0, 1])
+    """
+    unit = F.normalize(embeddings.float(), dim=1)
+    base = weights.float() if weights is not None else torch.ones(len(unit))
+    relative = torch.ones(len(unit))
+
+    for _ in range(iterations):
+        mean = F.normalize((base * relative) @ unit, dim=0)
+        distance = 1.0 - unit @ mean
+        median = distance.median()
+        mad = torch.clamp((distance - median).abs().median() * 1.4826, min=min_spread)
+        threshold = median + cutoff * mad
+        relative = torch.where(distance <= threshold, torch.ones_like(distance),
+                               (threshold / distance.clamp(min=1e-6)) ** 2)
+
+    mean = F.normalize((base * relative) @ unit, dim=0)
+    return mean, relative
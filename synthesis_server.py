@@ -0,0 +1,228 @@
+"""
+Local Synthesis Server
+======================
+
+Minimal HTTP front end for ZonosVoiceModel, for load tests and local
+integrations. It binds to localhost by default and is not meant to be
+exposed publicly.
+
+    POST /synthesize   {"voice": "anna", "text": "Hallo Welt.", "conditioning": {...},
+                        "sample_rate": 16000}
+        200: chunked audio/L16 (16-bit mono PCM, rate in X-Sample-Rate),
+             one chunk per text segment as soon as it is generated
+        400: malformed request, empty text, unknown conditioning settings or
+             unsupported sample rate, 404: unknown voice
+    GET /health        {"status": "ok", "backend": ..., "voices": [...]}
+
+At most `workers` requests synthesize at the same time; further requests
+wait for a slot, so queueing shows up in client-side latency like it
+would in a deployment of that size.
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from voice_model import ZonosVoiceModel, check_zonos_installation
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+SAMPLE_RATE = 44100
+SYNTHETIC_PREFIX = "synthetic-"
+
+
+class VoicePool:
+    """
+    Loaded voices by name, shared by concurrent requests.
+
+    Stored voices are loaded on first use. Synthetic voices (random speaker
+    embeddings, named synthetic-<n>) stand in when fewer trained voices exist
+    than a test needs; their cost per request is the same.
+    """
+
+    def __init__(self, placeholder: Optional[bool] = None, synthetic_voices: int = 0,
+                 model_dir: str = None, output_sample_rate: int = None):
+        """
+        Initialize the pool.
+
+        Args:
+            placeholder: Use the placeholder backend instead of Zonos; None
+                         uses it only if Zonos is not installed
+            synthetic_voices: Number of synthetic voices to create
+            model_dir: Model store root, None for the default store
+            output_sample_rate: Default output rate of the voices, None for 44.1 kHz
+        """
+        self.placeholder = not check_zonos_installation() if placeholder is None else placeholder
+        self.model_dir = model_dir
+        self.output_sample_rate = output_sample_rate
+        self._voices: Dict[str, ZonosVoiceModel] = {}
+        self._lock = threading.Lock()
+        if self.placeholder:
+            logger.warning("Using the placeholder backend: latencies exclude Zonos inference")
+
+        if synthetic_voices:
+            import torch
+            generator = torch.Generator().manual_seed(0)
+            for i in range(synthetic_voices):
+                voice = self._new_voice(f"{SYNTHETIC_PREFIX}{i}")
+                voice.speaker_embedding = torch.randn(256, generator=generator)
+                self._voices[voice.model_name] = voice
+
+    @property
+    def backend(self) -> str:
+        return "placeholder" if self.placeholder else "zonos"
+
+    def _new_voice(self, name: str) -> ZonosVoiceModel:
+        voice = ZonosVoiceModel(name, model_dir=self.model_dir,
+                                output_sample_rate=self.output_sample_rate)
+        if self.placeholder:
+            voice.use_placeholder_backend()
+        return voice
+
+    def get(self, name: str) -> ZonosVoiceModel:
+        """
+        Return a loaded voice.
+
+        Raises:
+            KeyError: If the voice is not in the store
+            RuntimeError: If the backend can't be loaded
+        """
+        with self._lock:
+            voice = self._voices.get(name)
+            if voice is None:
+                voice = self._new_voice(name)
+                if not voice.load_voice_model():
+                    raise KeyError(name)
+                self._voices[name] = voice
+        if not voice.is_loaded and not voice.load_model():
+            raise RuntimeError("Zonos TTS backend could not be loaded")
+        return voice
+
+    def names(self) -> List[str]:
+        """Stored and synthetic voices available for requests."""
+        with self._lock:
+            loaded = set(self._voices)
+        return sorted(loaded | set(ZonosVoiceModel.list_available_models(self.model_dir)))
+
+
+def pcm16(chunk) -> bytes:
+    """Convert float samples in [-1, 1] to little-endian 16-bit PCM."""
+    samples = np.clip(np.asarray(chunk, dtype=np.float32), -1.0, 1.0)
+    return (samples * 32767).astype('<i2').tobytes()
+
+
+class SynthesisRequestHandler(BaseHTTPRequestHandler):
+    """Handles /synthesize and /health; the server carries pool and slots."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        self._send_json(200, {'status': 'ok', 'backend': self.server.pool.backend,
+                              'voices': self.server.pool.names()})
+
+    def do_POST(self):
+        if self.path != '/synthesize':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            voice_name, text = request['voice'], request['text']
+            conditioning = request.get('conditioning')
+            sample_rate = int(request.get('sample_rate') or 0) or None
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'bad request: {e}'})
+            return
+        if not isinstance(text, str) or not text.strip():
+            self._send_json(400, {'error': 'bad request: empty text'})
+            return
+        if sample_rate and sample_rate not in ZonosVoiceModel.OUTPUT_SAMPLE_RATES:
+            self._send_json(400, {'error': f'unsupported sample rate {sample_rate}, expected one of '
+                                           f'{list(ZonosVoiceModel.OUTPUT_SAMPLE_RATES)}'})
+            return
+
+        with self.server.slots:
+            try:
+                voice = self.server.pool.get(voice_name)
+            except KeyError:
+                self._send_json(404, {'error': f'unknown voice: {voice_name}'})
+                return
+            except RuntimeError as e:
+                self._send_json(503, {'error': str(e)})
+                return
+            self._stream(voice, text, conditioning, sample_rate or voice.output_sample_rate)
+
+    def _stream(self, voice: ZonosVoiceModel, text: str, conditioning, sample_rate: int):
+        cancel_event = threading.Event()
+        chunks = voice.iter_speech_chunks(text, cancel_event, conditioning, sample_rate)
+        try:
+            first = next(chunks)
+        except ValueError as e:
+            # Invalid conditioning settings or sample rate
+            self._send_json(400, {'error': f'bad request: {e}'})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/L16')
+        self.send_header('X-Sample-Rate', str(sample_rate))
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in _prepend(first, chunks):
+                data = pcm16(chunk)
+                self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client disconnected, synthesis stopped")
+        except Exception as e:
+            # Headers are out: dropping the connection tells the client the stream failed
+            logger.error(f"Synthesis failed mid-stream: {e}")
+            self.close_connection = True
+        finally:
+            cancel_event.set()
+            chunks.close()
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, pool: VoicePool = None,
+                  workers: int = DEFAULT_WORKERS) -> ThreadingHTTPServer:
+    """
+    Create a synthesis server; call serve_forever() on it (port 0 picks a free port).
+    """
+    server = ThreadingHTTPServer((host, port), SynthesisRequestHandler)
+    server.daemon_threads = True
+    server.pool = pool or VoicePool()
+    server.slots = threading.BoundedSemaphore(max(1, workers))
+    return server
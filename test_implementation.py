@@ -6,6 +6,7 @@ Test script for Stimmenklon-Builder core functionality
 import os
 import sys
 import tempfile
+import time
 
 def test_voice_model():
     """Test voice_model.py functionality"""
@@ -36,6 +37,1611 @@ def test_voice_model():
         print(f"✗ voice_model test failed: {e}")
         return False
 
+def test_job_executor():
+    """Test job_executor.py priorities and cancellation"""
+    print("\n=== Testing job_executor.py ===")
+    
+    try:
+        import threading
+        from job_executor import (JobExecutor, PRIORITY_SYNTHESIS, PRIORITY_TRAINING,
+                                  STATUS_CANCELLED, STATUS_DONE)
+        
+        executor = JobExecutor()
+        order = []
+        gate = threading.Event()
+        finished = threading.Event()
+        
+        # Block the worker so the following jobs queue up
+        executor.submit('blocker', lambda cancel_event: gate.wait(5))
+        training = executor.submit('training', lambda cancel_event: order.append('training'),
+                                   priority=PRIORITY_TRAINING)
+        synthesis = executor.submit('synthesis', lambda cancel_event: order.append('synthesis'),
+                                    priority=PRIORITY_SYNTHESIS)
+        dropped = executor.submit('dropped', lambda cancel_event: order.append('dropped'),
+                                  priority=PRIORITY_TRAINING)
+        executor.cancel(dropped.job_id)
+        executor.submit('last', lambda cancel_event: finished.set(), priority=PRIORITY_TRAINING + 1)
+        gate.set()
+        
+        if not finished.wait(5):
+            print("✗ Jobs did not finish")
+            return False
+        
+        if order != ['synthesis', 'training']:
+            print(f"✗ Unexpected job order: {order}")
+            return False
+        print("✓ Synthesis runs ahead of training")
+        
+        if dropped.status != STATUS_CANCELLED or synthesis.status != STATUS_DONE:
+            print("✗ Unexpected job status after cancellation")
+            return False
+        print("✓ Queued job cancelled")
+        
+        # Cooperative cancellation of a running job
+        started = threading.Event()
+        
+        def long_job(cancel_event):
+            started.set()
+            cancel_event.wait(5)
+        
+        running = executor.submit('long', long_job)
+        started.wait(5)
+        executor.cancel(running.job_id)
+        executor.shutdown(wait=True, timeout=5)
+        
+        if running.status != STATUS_CANCELLED:
+            print(f"✗ Running job not cancelled: {running.status}")
+            return False
+        print("✓ Running job cancelled cooperatively")
+        
+        # Shutdown while a job runs: queued jobs never start
+        executor = JobExecutor()
+        started.clear()
+        ran = []
+        executor.submit('long', long_job)
+        started.wait(5)
+        queued = executor.submit('queued', lambda cancel_event: ran.append(1))
+        executor.shutdown(wait=True, timeout=5)
+        if ran or queued.status != STATUS_CANCELLED:
+            print("✗ Queued job started after shutdown")
+            return False
+        print("✓ Shutdown cancels queued jobs before they start")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Job executor test failed: {e}")
+        return False
+
+def test_voice_activity_detection():
+    """Test audio_analysis.py silence trimming"""
+    print("\n=== Testing voice activity detection ===")
+    
+    try:
+        from audio_analysis import NUMPY_AVAILABLE, EnergyVAD
+        
+        if not NUMPY_AVAILABLE:
+            print("✓ NumPy not installed, VAD test skipped")
+            return True
+        
+        import numpy as np
+        
+        # 2s near-silence, 3s tone, 2s near-silence
+        sample_rate = 16000
+        rng = np.random.default_rng(0)
+        silence = rng.normal(0, 0.001, sample_rate * 2).astype(np.float32)
+        tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(sample_rate * 3) / sample_rate)
+        audio = np.concatenate([silence, tone.astype(np.float32), silence])
+        
+        vad = EnergyVAD(sample_rate=sample_rate)
+        speech = vad.process_array(audio, block_size=5000)
+        speech_seconds = len(speech) / sample_rate
+        
+        if not 3.0 <= speech_seconds <= 3.5:
+            print(f"✗ Unexpected speech duration: {speech_seconds:.2f}s")
+            return False
+        print(f"✓ Silence trimmed: kept {speech_seconds:.2f}s of 7s ({vad.speech_ratio:.0%} speech)")
+        
+        # Streaming in small blocks matches a single pass
+        single = EnergyVAD(sample_rate=sample_rate).process_array(audio, block_size=len(audio))
+        if len(single) != len(speech):
+            print(f"✗ Streaming result differs: {len(single)} vs {len(speech)} samples")
+            return False
+        print("✓ Block-wise processing matches single pass")
+        
+        # 12s of speech-level sound without pauses, over several blocks, is not taken for noise
+        t = np.arange(sample_rate * 12) / sample_rate
+        continuous = 0.2 * (1 + 0.5 * np.sin(2 * np.pi * 3 * t)) * np.sin(2 * np.pi * 220 * t)
+        continuous = (continuous + rng.normal(0, 0.001, len(t))).astype(np.float32)
+        kept = [EnergyVAD(sample_rate=sample_rate).process_array(continuous, block_size=size)
+                for size in (sample_rate // 2, sample_rate * 2, len(continuous))]
+        if len(kept[0]) < 0.95 * len(continuous) or any(not np.array_equal(k, kept[0]) for k in kept):
+            print(f"✗ Pause-free speech dropped: kept {[len(k) / sample_rate for k in kept]}s of 12s")
+            return False
+        print("✓ Pause-free speech kept, independent of block size")
+
+        return True
+        
+    except Exception as e:
+        print(f"✗ VAD test failed: {e}")
+        return False
+
+def test_quality_screening():
+    """Test audio_analysis.py segment scoring and budget selection"""
+    print("\n=== Testing audio quality screening ===")
+    
+    try:
+        from audio_analysis import NUMPY_AVAILABLE, score_segments, select_best_segments
+        
+        if not NUMPY_AVAILABLE:
+            print("✓ NumPy not installed, quality screening test skipped")
+            return True
+        
+        import numpy as np
+        
+        sample_rate = 16000
+        t = np.arange(sample_rate * 2) / sample_rate
+        rng = np.random.default_rng(1)
+        
+        # Speech-like: tone bursts with pauses; noise; clipped loud tone
+        envelope = (np.sin(2 * np.pi * 2 * t) > 0).astype(np.float32)
+        clean = 0.1 * np.sin(2 * np.pi * 220 * t) * envelope
+        noise = rng.normal(0, 0.1, len(t))
+        clipped = np.clip(3.0 * np.sin(2 * np.pi * 220 * t), -1.0, 1.0)
+        audio = np.concatenate([noise, clipped, clean]).astype(np.float32)
+        
+        segments = score_segments(audio, sample_rate, segment_seconds=2.0)
+        if len(segments) != 3:
+            print(f"✗ Expected 3 segments, got {len(segments)}")
+            return False
+        
+        best = max(segments, key=lambda s: s['score'])
+        if best['start'] != 2 * len(t):
+            print(f"✗ Clean segment not ranked best: {[s['score'] for s in segments]}")
+            return False
+        print(f"✓ Clean segment ranked best (scores: {[s['score'] for s in segments]})")
+        
+        selected = select_best_segments(segments, sample_rate, budget_seconds=2.5)
+        if [s['start'] for s in selected] != [best['start']]:
+            print("✗ Budget selection did not keep only the best segment")
+            return False
+        print("✓ Selection respects the seconds budget")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Quality screening test failed: {e}")
+        return False
+
+def test_chunked_audio_reader():
+    """Test audio_io.py streaming decode/resample on a multi-hour WAV"""
+    print("\n=== Testing chunked audio reader ===")
+    
+    try:
+        from audio_io import AUDIO_IO_AVAILABLE, StreamingResampler, audio_info, iter_audio_blocks
+        
+        if not AUDIO_IO_AVAILABLE:
+            print("✓ NumPy/soundfile not installed, chunked reader test skipped")
+            return True
+        
+        import tracemalloc
+        import wave
+        import numpy as np
+        
+        # Streaming resampling matches resampling the whole signal at once
+        signal = np.random.default_rng(3).standard_normal(48000 * 3).astype(np.float32)
+        whole = StreamingResampler(48000, 44100).resample(signal)
+        resampler = StreamingResampler(48000, 44100)
+        streamed = [resampler.process(signal[i:i + 7777]) for i in range(0, len(signal), 7777)]
+        streamed = np.concatenate(streamed + [resampler.flush()])
+        if len(streamed) != 132300 or not np.allclose(streamed, whole, atol=1e-6):
+            print("✗ Streamed resampling differs from whole-signal resampling")
+            return False
+        print("✓ Streamed resampling matches whole-signal resampling")
+        
+        # Downsampling keeps the passband and rejects what would alias
+        def tone_db(target_rate, frequency):
+            t = np.arange(44100 * 2) / 44100
+            tone = np.sin(2 * np.pi * frequency * t).astype(np.float32)
+            out = StreamingResampler(44100, target_rate).resample(tone)[target_rate // 2:-target_rate // 2]
+            return 20 * np.log10(np.sqrt(2 * np.mean(out ** 2)) + 1e-12)
+        for target_rate in (8000, 16000):
+            nyquist = target_rate / 2
+            passband = tone_db(target_rate, 0.8 * nyquist)
+            stopband = max(tone_db(target_rate, ratio * nyquist) for ratio in (1.1, 1.3, 1.8))
+            if passband < -1.0 or stopband > -60.0:
+                print(f"✗ 44.1 -> {target_rate // 1000} kHz: passband {passband:.1f} dB, stopband {stopband:.1f} dB")
+                return False
+        print("✓ Downsampling to 8/16 kHz attenuates tones above the new Nyquist by over 60 dB")
+        
+        # Filter delay is compensated: output matches the analytic sine in phase and amplitude
+        for orig_rate, target_rate in ((44100, 16000), (44100, 8000), (48000, 44100), (16000, 44100)):
+            tone = np.sin(2 * np.pi * 300 * np.arange(orig_rate * 2) / orig_rate).astype(np.float32)
+            out = StreamingResampler(orig_rate, target_rate).resample(tone)
+            expected = np.sin(2 * np.pi * 300 * np.arange(len(out)) / target_rate)
+            inner = slice(target_rate // 10, -target_rate // 10)
+            if len(out) != 2 * target_rate or np.max(np.abs(out - expected)[inner]) > 1e-3:
+                print(f"✗ {orig_rate} -> {target_rate} Hz output is shifted or scaled")
+                return False
+        print("✓ Resampled sine matches the analytic signal in phase and amplitude")
+
+        # Two-hour stereo WAV (low rate to keep the test fast), written in chunks
+        rate, hours, tone = 1000, 2, 50.0
+        frames = rate * 3600 * hours
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "podcast.wav")
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(2)
+                wav.setsampwidth(2)
+                wav.setframerate(rate)
+                for start in range(0, frames, rate * 600):
+                    t = np.arange(start, min(start + rate * 600, frames)) / rate
+                    left = np.sin(2 * np.pi * tone * t) * 16000
+                    pcm = np.stack([left, left * 0.5], axis=1).astype('<i2')
+                    wav.writeframes(pcm.tobytes())
+            
+            # Memory-mapped WAV fast path decodes like libsndfile
+            import soundfile as sf
+            from audio_io import MappedWav, iter_decoded_blocks
+            for subtype in ('PCM_16', 'PCM_24', 'FLOAT'):
+                small = os.path.join(tmp_dir, f"small_{subtype}.wav")
+                sf.write(small, np.stack([signal[:9999], -signal[:9999]], axis=1) * 0.2, 48000, subtype=subtype)
+                reference, _ = sf.read(small, dtype='float32', always_2d=True)
+                if MappedWav.open(small) is None or not np.array_equal(
+                        np.concatenate(list(iter_decoded_blocks(small, 1000))), reference):
+                    print(f"✗ Memory-mapped {subtype} WAV differs from libsndfile")
+                    return False
+            print("✓ Memory-mapped WAV fast path matches libsndfile (int16/int24/float32)")
+            
+            if audio_info(path) != (rate, frames, 2):
+                print(f"✗ Unexpected header info: {audio_info(path)}")
+                return False
+            
+            tracemalloc.start()
+            total = 0
+            checked = False
+            for block in iter_audio_blocks(path, target_rate=2 * rate):
+                if not checked and total > rate * 3600:
+                    # Downmixed tone at 0.75 amplitude, at the right position
+                    t = (total + np.arange(len(block))) / (2 * rate)
+                    expected = 0.75 * 16000 / 32768 * np.sin(2 * np.pi * tone * t)
+                    if np.max(np.abs(block - expected)) > 0.01:
+                        print("✗ Streamed audio differs from the source signal")
+                        return False
+                    checked = True
+                total += len(block)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            whole_file_mb = frames * 2 * 4 / 1024 / 1024
+            if total != 2 * frames or not checked:
+                print(f"✗ Unexpected output length: {total}")
+                return False
+            if peak / 1024 / 1024 > whole_file_mb / 4:
+                print(f"✗ Peak memory {peak / 1024 / 1024:.1f} MB not bounded")
+                return False
+            print(f"✓ {hours}h WAV streamed with {peak / 1024 / 1024:.1f} MB peak "
+                  f"(whole file: {whole_file_mb:.0f} MB)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Chunked audio reader test failed: {e}")
+        return False
+
+def test_training_checkpoints():
+    """Test training_checkpoint.py atomic stage checkpoints"""
+    print("\n=== Testing training checkpoints ===")
+    
+    try:
+        from training_checkpoint import TrainingCheckpoint, run_fingerprint
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            audio_file = os.path.join(tmp_dir, "clip.wav")
+            with open(audio_file, 'wb') as f:
+                f.write(b"RIFF")
+            fingerprint = run_fingerprint("voice", [audio_file], {'trim_silence': True})
+            if fingerprint == run_fingerprint("voice", [audio_file], {'trim_silence': False}):
+                print("✗ Fingerprint ignores preprocessing options")
+                return False
+            
+            checkpoint = TrainingCheckpoint(os.path.join(tmp_dir, "run"))
+            checkpoint.save_json('files', [audio_file])
+            
+            # An interrupted write leaves no checkpoint behind
+            handle = checkpoint.open_audio("audio/00000")
+            handle.write(b"\0" * 16)
+            checkpoint.discard_audio(handle)
+            if checkpoint.load_audio_meta("audio/00000") is not None:
+                print("✗ Incomplete audio checkpoint was reported as done")
+                return False
+            
+            handle = checkpoint.open_audio("audio/00000")
+            handle.write(b"\0" * 16)
+            checkpoint.commit_audio("audio/00000", handle, {'length': 4, 'candidates': []})
+            
+            resumed = TrainingCheckpoint(checkpoint.work_dir)
+            if resumed.load_json('files') != [audio_file] or \
+                    resumed.load_audio_meta("audio/00000") != {'length': 4, 'candidates': []}:
+                print("✗ Checkpoints not found when resuming")
+                return False
+            print("✓ Completed stages are found on resume, incomplete ones are not")
+            
+            resumed.cleanup()
+            if os.path.exists(checkpoint.work_dir):
+                print("✗ Work directory not removed")
+                return False
+            print("✓ Work directory removed after the run")
+            
+            try:
+                import numpy as np
+                import soundfile as sf
+                import torch
+            except ImportError:
+                print("✓ NumPy/soundfile/torch not installed, training run checks skipped")
+                return True
+            
+            # Joined audio is read back range by range
+            checkpoint = TrainingCheckpoint(os.path.join(tmp_dir, "join"))
+            parts = []
+            for i in range(3):
+                handle = checkpoint.open_audio(f"audio/{i:05d}")
+                handle.write(np.arange(i * 10, i * 10 + 10, dtype=np.float32).tobytes())
+                checkpoint.commit_audio(f"audio/{i:05d}", handle, {'length': 10})
+                parts.append(checkpoint.load_audio(f"audio/{i:05d}", 10).subrange(2, 8))
+            joined = checkpoint.join_audio('combined', parts, chunk_samples=4)
+            expected = np.concatenate([np.arange(i * 10 + 2, i * 10 + 8) for i in range(3)])
+            if len(joined) != 18 or not np.array_equal(joined[:], expected) or \
+                    not np.array_equal(joined[5:9], expected[5:9]):
+                print("✗ Joined audio differs from the selected ranges")
+                return False
+            print("✓ Selected ranges joined on disk and read back by range")
+            
+            # Whole training runs: failed runs without resume leave no work directory,
+            # resumed runs keep this run's input scan
+            from training_checkpoint import RUNS_SUBDIR
+            from voice_model import ZonosVoiceModel
+            previous = os.environ.get('STIMMENKLON_CACHE_DIR')
+            os.environ['STIMMENKLON_CACHE_DIR'] = os.path.join(tmp_dir, "cache")
+            try:
+                clip = os.path.join(tmp_dir, "speech.wav")
+                t = np.arange(44100 * 3) / 44100
+                sf.write(clip, (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), 44100)
+                runs_dir = os.path.join(tmp_dir, "cache", RUNS_SUBDIR)
+                
+                voice = ZonosVoiceModel("run_test", model_dir=os.path.join(tmp_dir, "models"),
+                                        max_training_seconds=None)
+                voice.use_placeholder_backend()
+                voice._save_voice_model = lambda: False
+                if voice.train_voice_model([clip]) or os.listdir(runs_dir):
+                    print(f"✗ Failed run left its work directory: {os.listdir(runs_dir)}")
+                    return False
+                print("✓ Failed run without resume removes its decoded audio")
+                
+                # Interrupted before saving; its checkpointed report has a stale input scan
+                voice.train_voice_model([clip], resume=True)
+                run = TrainingCheckpoint.for_run("run_test", [clip], voice._preprocessing_options())
+                embedded = run.load_torch('embedding')
+                embedded['training_report']['input']['audio_seconds'] = 999.0
+                run.save_torch('embedding', embedded)
+                
+                del voice._save_voice_model
+                if not voice.train_voice_model([clip], resume=True) or os.listdir(runs_dir):
+                    print("✗ Resumed run did not finish")
+                    return False
+                if voice.training_report.get('input', {}).get('audio_seconds') != 3.0 or \
+                        'embedding' not in voice.training_report:
+                    print(f"✗ Resumed report incomplete: {sorted(voice.training_report)}")
+                    return False
+                print("✓ Resumed run keeps its input scan and the saved stage reports")
+            finally:
+                if previous is None:
+                    os.environ.pop('STIMMENKLON_CACHE_DIR', None)
+                else:
+                    os.environ['STIMMENKLON_CACHE_DIR'] = previous
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Training checkpoint test failed: {e}")
+        return False
+
+def test_model_store():
+    """Test model_store.py atomic, generation-numbered saves and sharded layout"""
+    print("\n=== Testing model store ===")
+    
+    try:
+        import threading
+        from model_store import ModelStore
+        
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = ModelStore(store_dir)
+            payload = list(range(20000))
+            errors = []
+            generations = []
+            
+            def writer():
+                for _ in range(10):
+                    generations.append(store.save("voice", {'speaker_embedding': payload}))
+            
+            def reader():
+                for _ in range(50):
+                    try:
+                        data = store.load("voice")
+                        if data is not None and data['speaker_embedding'] != payload:
+                            errors.append("incomplete read")
+                    except Exception as e:
+                        errors.append(str(e))
+            
+            threads = [threading.Thread(target=writer) for _ in range(4)] + \
+                      [threading.Thread(target=reader) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            if errors:
+                print(f"✗ Readers saw incomplete models: {errors[:3]}")
+                return False
+            print("✓ Concurrent readers always see complete models")
+            
+            if sorted(generations) != list(range(1, 41)) or store.generation("voice") != 40:
+                print(f"✗ Unexpected generations: {sorted(generations)}")
+                return False
+            print("✓ Every save gets a unique, increasing generation")
+            
+            shard_files = set(os.listdir(os.path.dirname(store.path_for("voice"))))
+            if shard_files != {"voice.pt", "voice.lock"} or store.list_names() != ["voice"] \
+                    or not store.delete("voice") or store.load("voice") is not None:
+                print(f"✗ Unexpected store contents: {shard_files}")
+                return False
+            print("✓ No temporary files left behind")
+            
+            # Voices in the old flat layout move into their shard when accessed
+            import pickle
+            with open(os.path.join(store_dir, "old_voice.pt"), 'wb') as f:
+                pickle.dump({'speaker_embedding': [1.0]}, f)
+            with open(os.path.join(store_dir, "other_voice.pt"), 'wb') as f:
+                pickle.dump({'speaker_embedding': [2.0]}, f)
+            if store.list_names() != ["old_voice", "other_voice"] or store.load("old_voice") is None:
+                print("✗ Flat-layout voices not found")
+                return False
+            migrated = store.migrate_flat_layout()
+            shard = os.path.relpath(store.path_for("other_voice"), store_dir).split(os.sep)
+            if migrated != 1 or store.flat_names() or len(shard) != 3 or len(shard[0]) != 2:
+                print(f"✗ Unexpected layout after migration: {shard}")
+                return False
+            print("✓ Flat-layout voices migrated into hash-prefix shards")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Model store test failed: {e}")
+        return False
+
+def test_batched_speaker_encoding():
+    """Test speaker_encoding.py windowing, batching and robust mean"""
+    print("\n=== Testing batched speaker encoding ===")
+    
+    try:
+        from speaker_encoding import (BYTES_PER_SAMPLE, TORCH_AVAILABLE, batch_windows,
+                                      plan_windows, robust_mean)
+        
+        sample_rate = 1000
+        windows = plan_windows(10700, sample_rate, window_seconds=3.0, min_window_seconds=1.0,
+                               bucket_seconds=0.5)
+        if [w.length for w in windows] != [3000, 3000, 3000, 1700] or windows[-1].bucket != 2000:
+            print(f"✗ Unexpected windows: {windows}")
+            return False
+        if len(plan_windows(3500, sample_rate)) != 1 or len(plan_windows(800, sample_rate)) != 1:
+            print("✗ Short remainders should be dropped, short signals kept whole")
+            return False
+        print("✓ Audio cut into fixed windows with a bucketed tail")
+        
+        many = plan_windows(300 * 3000 + 1700, sample_rate)
+        cap_mb = 1.0
+        batches = list(batch_windows(many, cap_mb))
+        if sum(len(b) for b in batches) != len(many) or any(
+                len({w.bucket for w in b}) != 1 or
+                (len(b) > 1 and len(b) * b[0].bucket * BYTES_PER_SAMPLE > cap_mb * 1024 * 1024)
+                for b in batches):
+            print("✗ Batches mix buckets or exceed the memory cap")
+            return False
+        print(f"✓ {len(many)} windows in {len(batches)} single-bucket batches under the memory cap")
+        
+        if not TORCH_AVAILABLE:
+            print("✓ PyTorch not installed, robust mean test skipped")
+            return True
+        
+        import torch
+        generator = torch.Generator().manual_seed(0)
+        speaker = torch.randn(64, generator=generator)
+        embeddings = speaker + 0.1 * torch.randn(20, 64, generator=generator)
+        embeddings[:3] = torch.randn(3, 64, generator=generator) * 3
+        mean, weights = robust_mean(embeddings)
+        plain = torch.nn.functional.normalize(
+            torch.nn.functional.normalize(embeddings, dim=1).mean(0), dim=0)
+        target = torch.nn.functional.normalize(speaker, dim=0)
+        if float(weights[:3].max()) > 0.5 or float(weights[3:].min()) < 0.9 or \
+                float(mean @ target) <= float(plain @ target):
+            print("✗ Outlier windows not down-weighted")
+            return False
+        print(f"✓ Robust mean down-weights outliers (cosine {float(mean @ target):.3f} "
+              f"vs {float(plain @ target):.3f} for the plain mean)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batched speaker encoding test failed: {e}")
+        return False
+
+def test_conditioning_cache():
+    """Test conditioning_cache.py in-memory and sidecar reuse and invalidation"""
+    print("\n=== Testing conditioning cache ===")
+    
+    try:
+        from conditioning_cache import ConditioningCache, normalize_conditioning
+        from model_store import ModelStore
+        
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = ModelStore(store_dir)
+            store.save("voice", {'speaker_embedding': [0.1, 0.2]})
+            calls = []
+            
+            def compute():
+                calls.append(1)
+                return {'prefix': len(calls)}
+            
+            cache = ConditioningCache()
+            german = normalize_conditioning()
+            english = normalize_conditioning({'language': 'EN-US', 'speaking_rate': 12})
+            cache.get([0.1, 0.2], german, compute, store, "voice")
+            cache.get([0.1, 0.2], german, compute, store, "voice")
+            cache.get([0.1, 0.2], english, compute, store, "voice")
+            if len(calls) != 2 or cache.stats['hits'] != 1:
+                print(f"✗ Unexpected cache behaviour: {cache.stats}")
+                return False
+            print("✓ Conditioning state reused per voice and settings")
+            
+            cache.get([0.1, 0.2], german, compute, store, "voice", backend_key="int8-eager")
+            if len(calls) != 3:
+                print("✗ Conditioning state shared between precision modes")
+                return False
+            print("✓ Conditioning state kept apart per backend configuration")
+            
+            fresh = ConditioningCache()
+            if fresh.get([0.1, 0.2], german, compute, store, "voice") != {'prefix': 1} or \
+                    fresh.stats['sidecar_hits'] != 1 or store.list_names() != ["voice"]:
+                print("✗ Persisted conditioning state not reused")
+                return False
+            fresh.get([0.3, 0.4], german, compute, store, "voice")
+            if len(calls) != 4:
+                print("✗ Conditioning state of a changed embedding was reused")
+                return False
+            print("✓ Sidecars reused by a new cache and checked against the embedding")
+            
+            store.save("voice", {'speaker_embedding': [0.3, 0.4]})
+            if store._sidecar_paths("voice"):
+                print("✗ Sidecars left behind after saving a new model version")
+                return False
+            print("✓ Sidecars removed when the model file changes")
+            
+            try:
+                normalize_conditioning({'volume': 3})
+                print("✗ Unknown conditioning setting accepted")
+                return False
+            except ValueError:
+                pass
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Conditioning cache test failed: {e}")
+        return False
+
+def test_model_prewarmer():
+    """Test voice_model.py ModelPrewarmer states, voice loading and failure"""
+    print("\n=== Testing model pre-warmer ===")
+    
+    try:
+        import torch
+    except ImportError:
+        print("✓ PyTorch not installed, pre-warmer test skipped")
+        return True
+    
+    import voice_model
+    previous = os.environ.get('STIMMENKLON_MODEL_DIR')
+    shared_backend = voice_model.get_shared_backend
+    try:
+        from voice_model import ModelPrewarmer, ZonosVoiceModel
+        
+        with tempfile.TemporaryDirectory() as model_dir:
+            os.environ['STIMMENKLON_MODEL_DIR'] = model_dir
+            voice_model.get_shared_backend = lambda *args: torch.nn.Linear(4, 4)
+            voice = ZonosVoiceModel("prewarm_voice")
+            voice.speaker_embedding = torch.randn(256)
+            voice._save_voice_model()
+            
+            events = []
+            prewarmer = ModelPrewarmer("prewarm_voice")
+            prewarmer.add_listener(lambda state, progress: events.append((state, progress)))
+            prewarmer.start()
+            if not prewarmer.wait(30) or prewarmer.voice_model is None:
+                print(f"✗ Pre-warm did not finish with the voice loaded: {prewarmer.error}")
+                return False
+            states = [state for state, _ in events]
+            progress = [value for _, value in events]
+            if states[-1] != ModelPrewarmer.STATE_READY or ModelPrewarmer.STATE_WARMING not in states \
+                    or progress != sorted(progress) or 'warmup_inference_seconds' not in prewarmer.timings:
+                print(f"✗ Unexpected pre-warm events {events}")
+                return False
+            print(f"✓ Pre-warm loads backend and voice, warms up and reports {len(events)} state changes")
+            
+            def unavailable(*args):
+                raise ImportError("zonos")
+            
+            voice_model.get_shared_backend = unavailable
+            prewarmer = ModelPrewarmer()
+            if prewarmer.run() or prewarmer.state != ModelPrewarmer.STATE_FAILED or not prewarmer.error:
+                print("✗ Missing backend not reported as a failed pre-warm")
+                return False
+            print("✓ Missing backend ends in the failed state")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Pre-warmer test failed: {e}")
+        return False
+    finally:
+        voice_model.get_shared_backend = shared_backend
+        if previous is None:
+            os.environ.pop('STIMMENKLON_MODEL_DIR', None)
+        else:
+            os.environ['STIMMENKLON_MODEL_DIR'] = previous
+
+def test_precision_modes():
+    """Test cpu_inference.py int8 cache and bf16 precision context"""
+    print("\n=== Testing precision modes ===")
+    
+    try:
+        import torch
+    except ImportError:
+        print("✓ PyTorch not installed, precision test skipped")
+        return True
+    
+    previous = os.environ.get('STIMMENKLON_CACHE_DIR')
+    try:
+        from cpu_inference import PRECISION_BF16, PRECISION_FP32, load_or_quantize_int8, precision_context
+        
+        def backend(seed):
+            torch.manual_seed(seed)
+            return torch.nn.Sequential(torch.nn.Linear(64, 32), torch.nn.ReLU(), torch.nn.Linear(32, 8))
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ['STIMMENKLON_CACHE_DIR'] = cache_dir
+            x = torch.randn(4, 64)
+            original = backend(0)
+            quantized = load_or_quantize_int8(original)
+            if (quantized(x) - original(x)).abs().max() > 0.05:
+                print("✗ int8 output too far from fp32")
+                return False
+            cached = load_or_quantize_int8(backend(0))
+            if not torch.equal(cached(x), quantized(x)) or len(os.listdir(os.path.join(cache_dir, "quantized"))) != 1:
+                print("✗ Quantized backend not reused from the cache")
+                return False
+            print("✓ int8 backend is close to fp32 and reused from the cache")
+            
+            updated = backend(1)
+            if (load_or_quantize_int8(updated)(x) - updated(x)).abs().max() > 0.05:
+                print("✗ Stale quantized weights loaded after a weight update")
+                return False
+            print("✓ Updated weights get their own quantized cache entry")
+        
+        with precision_context(PRECISION_FP32):
+            if original(x).dtype != torch.float32:
+                print("✗ fp32 context changed the output dtype")
+                return False
+        with precision_context(PRECISION_BF16):
+            output = original(x)
+        if output.dtype not in (torch.float32, torch.bfloat16) or (output.float() - original(x)).abs().max() > 0.1:
+            print("✗ bf16 output differs from fp32")
+            return False
+        print(f"✓ bf16 context runs in {output.dtype}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Precision test failed: {e}")
+        return False
+    finally:
+        if previous is None:
+            os.environ.pop('STIMMENKLON_CACHE_DIR', None)
+        else:
+            os.environ['STIMMENKLON_CACHE_DIR'] = previous
+
+def test_compiled_backend():
+    """Test cpu_inference.py traced inference against eager execution"""
+    print("\n=== Testing compiled backend ===")
+    
+    try:
+        import torch
+    except ImportError:
+        print("✓ PyTorch not installed, compiled backend test skipped")
+        return True
+    
+    previous = os.environ.get('STIMMENKLON_CACHE_DIR')
+    try:
+        from cpu_inference import COMPILE_TRACE, CompiledBackend, backend_cache_key, shape_bucket
+        
+        class Normalized(torch.nn.Module):
+            # Mixes across time: padding would shift the mean
+            def __init__(self):
+                super().__init__()
+                self.conv = torch.nn.Conv1d(8, 4, 3, padding=1)
+            
+            def forward(self, x):
+                y = self.conv(x)
+                return y - y.mean(dim=-1, keepdim=True)
+        
+        def backend(seed, cls=Normalized):
+            torch.manual_seed(seed)
+            return cls().eval()
+        
+        def compiled(module, **kwargs):
+            return CompiledBackend(module, COMPILE_TRACE, f"{backend_cache_key(module)}-fp32", **kwargs)
+        
+        if shape_bucket(100) != 256 or shape_bucket(300) != 512:
+            print("✗ Unexpected shape buckets")
+            return False
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ['STIMMENKLON_CACHE_DIR'] = cache_dir
+            module = backend(0)
+            runner = compiled(module)
+            with torch.inference_mode():
+                for length in (300, 301, 300):
+                    x = torch.randn(1, 8, length)
+                    if not torch.allclose(runner(x), module(x), atol=1e-5):
+                        print(f"✗ Traced output differs from eager at length {length}")
+                        return False
+            if len(runner.stats['compile_seconds']) != 2 or runner.stats['fallbacks']:
+                print(f"✗ Unexpected graphs: {runner.stats}")
+                return False
+            print("✓ Traced output equals eager for a module that mixes across time")
+            
+            x = torch.randn(1, 8, 300)
+            with torch.inference_mode():
+                same = compiled(backend(0))
+                same(x)
+                updated_module = backend(1)
+                updated = compiled(updated_module)
+                stale = not torch.allclose(updated(x), updated_module(x), atol=1e-5)
+            if same.stats['cache_hits'] != 1 or updated.stats['cache_hits'] != 0 or stale:
+                print("✗ Traced graph cache not invalidated by a weight change")
+                return False
+            print("✓ Traced graphs are reused for the same weights only")
+            
+            pointwise = backend(0, lambda: torch.nn.Conv1d(8, 4, 1))
+            bucketed = compiled(pointwise, pad_to_bucket=True)
+            with torch.inference_mode():
+                output = bucketed(x)
+                if output.shape[-1] != 300 or not torch.allclose(output, pointwise(x), atol=1e-5):
+                    print("✗ Bucketed output differs from eager for a pointwise module")
+                    return False
+            print("✓ Padding to shape buckets works for pointwise modules")
+            
+            # Training runs the speaker encoder through the graph cache when compile_mode is set
+            from voice_model import ZonosVoiceModel, get_speaker_encoder
+            audio = torch.randn(44100 * 7) * 0.1
+            embeddings = {}
+            for mode in ('eager', COMPILE_TRACE):
+                voice = ZonosVoiceModel("compile_test", compile_mode=mode)
+                voice.use_placeholder_backend()
+                embeddings[mode] = voice._create_speaker_embedding(audio)
+            encoder = get_speaker_encoder(256, 'fp32', COMPILE_TRACE)
+            traced_files = [name for name in os.listdir(os.path.join(cache_dir, "compiled"))
+                            if name.startswith("BandEnergyEncoder")]
+            if not torch.allclose(embeddings['eager'], embeddings[COMPILE_TRACE], atol=1e-5) or \
+                    not isinstance(encoder, CompiledBackend) or encoder.stats['fallbacks'] or not traced_files:
+                print(f"✗ Speaker encoder not run through traced graphs: {traced_files}")
+                return False
+            print(f"✓ Speaker embedding uses {len(traced_files)} traced encoder graphs and equals eager")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Compiled backend test failed: {e}")
+        return False
+    finally:
+        if previous is None:
+            os.environ.pop('STIMMENKLON_CACHE_DIR', None)
+        else:
+            os.environ['STIMMENKLON_CACHE_DIR'] = previous
+
+def test_thread_settings():
+    """Test cpu_inference.py thread limits, autotune selection and persisted settings"""
+    print("\n=== Testing thread settings ===")
+    
+    try:
+        import torch
+    except ImportError:
+        print("✓ PyTorch not installed, thread settings test skipped")
+        return True
+    
+    previous = {key: os.environ.get(key) for key in ('STIMMENKLON_CACHE_DIR', 'STIMMENKLON_THREADS')}
+    baseline = torch.get_num_threads()
+    try:
+        from cpu_inference import (apply_default_thread_settings, autotune_threads, load_thread_settings,
+                                   save_thread_settings, thread_limit)
+        
+        # Overlapping limits (e.g. from two jobs) exit in a different order than they entered
+        torch.set_num_threads(3)
+        first, second = thread_limit(1), thread_limit(2)
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        second.__exit__(None, None, None)
+        if torch.get_num_threads() != 3:
+            print(f"✗ Overlapping limits left {torch.get_num_threads()} threads instead of 3")
+            return False
+        print("✓ Overlapping thread limits restore the process setting")
+        
+        # 2 threads are within tolerance of the fastest, so they win over 4
+        # (margins of tens of milliseconds, so sleep jitter on a busy machine doesn't matter)
+        delays = {1: 0.15, 2: 0.051, 4: 0.05}
+        report = autotune_threads({'work': lambda: time.sleep(delays[torch.get_num_threads()])},
+                                  candidates=[1, 2, 4], repeats=3, tolerance=0.5)
+        if report['intra_op_threads'] != 2 or torch.get_num_threads() != 3:
+            print(f"✗ Autotune picked {report['intra_op_threads']} threads")
+            return False
+        print("✓ Autotune picks the smallest thread count within tolerance of the fastest")
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ['STIMMENKLON_CACHE_DIR'] = cache_dir
+            os.environ.pop('STIMMENKLON_THREADS', None)
+            save_thread_settings({'intra_op_threads': 1})
+            if load_thread_settings() != {'intra_op_threads': 1}:
+                print("✗ Thread settings not persisted")
+                return False
+            if apply_default_thread_settings().get('intra_op_threads') != 1:
+                print("✗ Saved thread settings not applied")
+                return False
+            os.environ['STIMMENKLON_THREADS'] = '2'
+            if apply_default_thread_settings().get('intra_op_threads') != 2:
+                print("✗ STIMMENKLON_THREADS does not override saved settings")
+                return False
+        print("✓ Saved settings are applied at load, STIMMENKLON_THREADS overrides them")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Thread settings test failed: {e}")
+        return False
+    finally:
+        torch.set_num_threads(baseline)
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def test_shared_weight_cache():
+    """Test cpu_inference.py memory-mapped backend weight loading"""
+    print("\n=== Testing shared weight cache ===")
+    
+    try:
+        import torch
+    except ImportError:
+        print("✓ PyTorch not installed, shared weight cache test skipped")
+        return True
+    
+    previous = os.environ.get('STIMMENKLON_CACHE_DIR')
+    try:
+        import cpu_inference
+        from cpu_inference import default_mmap_weights, load_backend_mapped
+        
+        devices = []
+        
+        class Backend(torch.nn.Sequential):
+            def __init__(self):
+                devices.append(torch.empty(0).device.type)
+                super().__init__(torch.nn.Linear(64, 32), torch.nn.ReLU(), torch.nn.Linear(32, 8))
+        
+        def reference(seed):
+            torch.manual_seed(seed)
+            return Backend()
+        
+        mmap_setting = os.environ.pop('STIMMENKLON_MMAP_WEIGHTS', None)
+        enabled_by_default = default_mmap_weights()
+        if mmap_setting is not None:
+            os.environ['STIMMENKLON_MMAP_WEIGHTS'] = mmap_setting
+        if enabled_by_default:
+            print("✗ Weight mapping should be opt-in")
+            return False
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ['STIMMENKLON_CACHE_DIR'] = cache_dir
+            weights_dir = os.path.join(cache_dir, "weights")
+            checkpoint = os.path.join(cache_dir, "tts.pt")
+            torch.save(reference(0).state_dict(), checkpoint)
+            x = torch.randn(4, 64)
+            
+            first = load_backend_mapped(Backend, checkpoint)
+            
+            # Later loads neither hash the weights nor build them
+            digest = cpu_inference.weights_digest
+            cpu_inference.weights_digest = None
+            try:
+                devices.clear()
+                second = load_backend_mapped(Backend, checkpoint)
+                built_on = list(devices)
+            finally:
+                cpu_inference.weights_digest = digest
+            if len(os.listdir(weights_dir)) != 1 or not torch.equal(first(x), second(x)) \
+                    or not torch.equal(second(x), reference(0)(x)):
+                print(f"✗ Weights not shared through one cache file: {os.listdir(weights_dir)}")
+                return False
+            if built_on != ['meta'] or second[0].weight.is_meta:
+                print(f"✗ Mapped backend was not built without weights: {built_on}")
+                return False
+            print("✓ Later loads build on the meta device and map the cached weights")
+            
+            torch.save(reference(1).state_dict(), checkpoint)
+            stat = os.stat(checkpoint)
+            os.utime(checkpoint, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            updated = load_backend_mapped(Backend, checkpoint)
+            if len(os.listdir(weights_dir)) != 2 or not torch.equal(updated(x), reference(1)(x)):
+                print("✗ Updated weights were served from a stale cache file")
+                return False
+            print("✓ Updated checkpoint gets its own cache file")
+            
+            plain = object()
+            if load_backend_mapped(lambda: plain, checkpoint) is not plain:
+                print("✗ Non-module backends should be returned unchanged")
+                return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Shared weight cache test failed: {e}")
+        return False
+    finally:
+        if previous is None:
+            os.environ.pop('STIMMENKLON_CACHE_DIR', None)
+        else:
+            os.environ['STIMMENKLON_CACHE_DIR'] = previous
+
+def test_memory_profiling():
+    """Test profiling.py per-stage memory reports"""
+    print("\n=== Testing memory profiling ===")
+    
+    try:
+        import json
+        import tracemalloc
+        from profiling import MemoryProfiler
+        
+        was_tracing = tracemalloc.is_tracing()
+        profiler = MemoryProfiler('tracemalloc', interval=0.001)
+        try:
+            with profiler.stage('train'):
+                with profiler.stage('preprocess'):
+                    buffer = bytearray(64 * 1024 * 1024)
+                    buffer[::4096] = b'x' * len(buffer[::4096])  # touch every page
+                    del buffer
+                for _ in range(3):
+                    with profiler.stage('file'):
+                        pass
+        finally:
+            profiler.stop()
+            if not was_tracing:
+                tracemalloc.stop()
+        
+        stages = profiler.report()['stages']
+        if list(stages) != ['train/preprocess', 'train/file', 'train'] or stages['train/file']['calls'] != 3:
+            print(f"✗ Unexpected stages: {list(stages)}")
+            return False
+        if stages['train/preprocess']['tracemalloc_peak_mb'] < 60 or \
+                stages['train']['tracemalloc_peak_mb'] < stages['train/preprocess']['tracemalloc_peak_mb']:
+            print(f"✗ Allocation peak not attributed: {stages}")
+            return False
+        if stages['train/preprocess']['rss_peak_mb'] is not None and \
+                stages['train']['rss_peak_mb'] < stages['train/preprocess']['rss_peak_mb']:
+            print("✗ Parent stage peak below its child's peak")
+            return False
+        print(f"✓ 64 MB allocation attributed to train/preprocess "
+              f"(tracemalloc peak {stages['train/preprocess']['tracemalloc_peak_mb']} MB, "
+              f"RSS growth {stages['train/preprocess']['rss_max_growth_mb']} MB)")
+        
+        with tempfile.TemporaryDirectory() as profile_dir:
+            path = profiler.write_report(os.path.join(profile_dir, "memory.json"))
+            with open(path, 'r', encoding='utf-8') as f:
+                if json.load(f)['stages'] != stages:
+                    print("✗ JSON report differs from the in-memory report")
+                    return False
+        print("✓ JSON report written")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Memory profiling test failed: {e}")
+        return False
+
+def test_cpu_profiling():
+    """Test profiling.py cProfile and collapsed-stack output"""
+    print("\n=== Testing CPU profiling ===")
+    
+    try:
+        import pstats
+        from profiling import CpuProfiler
+        
+        def busy_loop():
+            total = 0
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                total += sum(range(100))
+            return total
+        
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler = CpuProfiler(profile_dir, sample_interval=0.002)
+            with profiler.session('synthesize'):
+                with profiler.session('load_voice'):  # nested entry points are not profiled again
+                    busy_loop()
+            
+            if len(profiler.outputs) != 2 or not profiler.outputs[0].endswith('.pstats'):
+                print(f"✗ Unexpected profile files: {profiler.outputs}")
+                return False
+            stats = pstats.Stats(profiler.outputs[0])
+            if not any(func[2] == 'busy_loop' for func in stats.stats):
+                print("✗ busy_loop missing from the pstats file")
+                return False
+            
+            with open(profiler.outputs[1], 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            stack, count = lines[0].rsplit(' ', 1)
+            if not int(count) or 'busy_loop (test_implementation.py' not in stack:
+                print(f"✗ Unexpected collapsed stacks: {lines[:3]}")
+                return False
+            print(f"✓ pstats and collapsed stacks written ({sum(int(l.rsplit(' ', 1)[1]) for l in lines)} samples)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ CPU profiling test failed: {e}")
+        return False
+
+def test_audio_dedup():
+    """Test audio_dedup.py exact and near-duplicate detection"""
+    print("\n=== Testing duplicate audio detection ===")
+    
+    try:
+        from audio_dedup import deduplicate_audio_files
+        from audio_io import AUDIO_IO_AVAILABLE
+        
+        if not AUDIO_IO_AVAILABLE:
+            print("✓ NumPy/soundfile not installed, duplicate detection test skipped")
+            return True
+        
+        import shutil
+        import numpy as np
+        import soundfile as sf
+        
+        def take(seed, seconds, rate=16000):
+            # Voiced harmonics with a wandering pitch and on/off syllables
+            rng = np.random.default_rng(seed)
+            t = np.arange(int(seconds * rate)) / rate
+            pitch = np.interp(t, np.arange(0, seconds + 1, 0.25),
+                              100 + 80 * rng.random(len(np.arange(0, seconds + 1, 0.25))))
+            syllables = np.interp(t, np.arange(0, seconds + 1, 0.1),
+                                  rng.random(len(np.arange(0, seconds + 1, 0.1))) > 0.4)
+            phase = 2 * np.pi * np.cumsum(pitch) / rate
+            voiced = sum(np.sin(k * phase) * rng.random() / k for k in range(1, 16))
+            return (0.2 * voiced * syllables + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, name) for name in
+                     ("take.wav", "take_copy.wav", "other.wav", "take_trimmed.flac")]
+            audio = take(1, 20)
+            sf.write(paths[0], audio, 16000)
+            shutil.copy(paths[0], paths[1])
+            sf.write(paths[2], take(2, 20), 16000)
+            # Trimmed at both ends, quieter and re-encoded
+            sf.write(paths[3], audio[12345:16000 * 17] * 0.5, 16000)
+            
+            unique, report = deduplicate_audio_files(paths)
+            reasons = {os.path.basename(e['file']): e['reason'] for e in report['skipped']}
+            if unique != paths[:1] + paths[2:3] or \
+                    reasons != {"take_copy.wav": "identical", "take_trimmed.flac": "near_duplicate"}:
+                print(f"✗ Unexpected dedup result: {unique}, {report['skipped']}")
+                return False
+            if not 35 < report['skipped_audio_seconds'] < 37:
+                print(f"✗ Wrong skipped duration: {report['skipped_audio_seconds']}")
+                return False
+            print(f"✓ Exact copy and trimmed copy skipped, unrelated take kept "
+                  f"({report['fingerprint_seconds']:.2f}s)")
+        
+        return True
+    
+    except Exception as e:
+        print(f"✗ Duplicate audio detection test failed: {e}")
+        return False
+
+def test_training_progress():
+    """Test training_progress.py duration weighting and ETA refinement"""
+    print("\n=== Testing training progress ===")
+    
+    try:
+        from training_progress import TrainingProgress, format_eta
+        
+        now = [0.0]
+        reported = []
+        progress = TrainingProgress(reported.append, costs={'preprocess': 1.0, 'embedding': 1.0},
+                                    clock=lambda: now[0])
+        progress.plan('preprocess', 3601.0)  # a one-second clip and a one-hour file
+        progress.plan('embedding', 300.0)
+        progress.start('preprocess')
+        progress.advance(1.0)
+        if progress.percent > 0.1:
+            print(f"✗ A one-second clip moved the bar to {progress.percent:.1f}%")
+            return False
+        if progress.eta_seconds is not None:
+            print("✗ ETA reported before any throughput was measured")
+            return False
+        
+        # Preprocessing runs at 10 audio seconds per second
+        for _ in range(180):
+            now[0] += 1.0
+            progress.advance(10.0)
+        eta = progress.eta_seconds
+        if abs(progress.percent - 1801 / 3901 * 100) > 0.01 or abs(eta - 2100 * 180 / 1801) > 0.01:
+            print(f"✗ Unexpected progress {progress.percent:.1f}% / ETA {eta}")
+            return False
+        print(f"✓ Progress weighted by audio seconds ({progress.percent:.1f}%), "
+              f"ETA {format_eta(eta)} from measured throughput")
+        
+        # Fewer seconds than planned reach the embedding stage: progress never goes back
+        progress.start('embedding')
+        progress.plan('embedding', 30.0)
+        progress.complete()
+        if reported != sorted(reported) or reported[-1] != 100.0:
+            print("✗ Progress went backwards or did not reach 100%")
+            return False
+        print("✓ Progress is monotonic and ends at 100%")
+        
+        return True
+    
+    except Exception as e:
+        print(f"✗ Training progress test failed: {e}")
+        return False
+
+def test_async_api():
+    """Test async_voice_model.py bounded executor, cancellation and streams"""
+    print("\n=== Testing async API ===")
+    
+    try:
+        import asyncio
+        import threading
+        from async_voice_model import AsyncVoiceModel, BoundedExecutor, ProgressStream
+        
+        async def scenario():
+            executor = BoundedExecutor(max_workers=2, max_queued=0)
+            running, peak = [], []
+            lock = threading.Lock()
+            
+            def job(cancel_event):
+                with lock:
+                    running.append(1)
+                    peak.append(len(running))
+                time.sleep(0.02)
+                with lock:
+                    running.pop()
+                return 1
+            
+            results = await asyncio.gather(*[executor.run(job) for _ in range(6)])
+            if sum(results) != 6 or max(peak) > 2:
+                return f"bound not respected (peak {max(peak)})"
+            
+            finished = threading.Event()
+            
+            def blocking(cancel_event):
+                cancel_event.wait(5)
+                finished.set()
+            
+            task = asyncio.ensure_future(executor.run(blocking))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+                return "cancellation not propagated"
+            except asyncio.CancelledError:
+                if not finished.is_set():
+                    return "cancelled job still running"
+            
+            progress = ProgressStream(asyncio.get_running_loop())
+            threading.Thread(target=lambda: ([progress.push(p) for p in (10, 50, 100)],
+                                             progress.close())).start()
+            if [p async for p in progress] != [10, 50, 100]:
+                return "progress stream lost events"
+            
+            class StubModel:
+                def iter_speech_chunks(self, text, cancel_event=None, conditioning=None,
+                                       sample_rate=None):
+                    for segment in text.split('.'):
+                        yield segment.strip()
+            
+            voice = AsyncVoiceModel(StubModel(), executor)
+            chunks = [chunk async for chunk in voice.stream_speech("Eins. Zwei. Drei")]
+            if chunks != ["Eins", "Zwei", "Drei"]:
+                return f"unexpected chunks {chunks}"
+            executor.shutdown()
+            return None
+        
+        error = asyncio.run(scenario())
+        if error:
+            print(f"✗ {error}")
+            return False
+        print("✓ Bounded executor, task cancellation, progress stream and chunk streaming work")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Async API test failed: {e}")
+        return False
+
+def test_load_test():
+    """Test load_test.py report in-process and against the synthesis server"""
+    print("\n=== Testing load test ===")
+    
+    try:
+        import threading
+        from load_test import HttpTarget, InProcessTarget, percentile, run_load_test
+        from synthesis_server import VoicePool, create_server
+        
+        if percentile([1, 2, 3, 4], 50) != 2.5 or percentile([], 99) is not None:
+            print("✗ Unexpected percentiles")
+            return False
+        
+        with tempfile.TemporaryDirectory() as model_dir:
+            pool = VoicePool(placeholder=True, synthetic_voices=2, model_dir=model_dir)
+            voices = pool.names()
+            corpus = ["Hallo Welt.", "Eins. Zwei."]
+            
+            report = run_load_test(InProcessTarget(pool), voices, corpus, requests=8, concurrency=2)
+            if report['completed'] != 8 or report['latency_ms']['p99'] is None:
+                print(f"✗ Unexpected in-process report: {report}")
+                return False
+            print(f"✓ In-process closed loop: p50 {report['latency_ms']['p50']} ms, "
+                  f"RTF p50 {report['real_time_factor']['p50']}")
+            
+            server = create_server('127.0.0.1', 0, pool, workers=2)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                target = HttpTarget(f"http://127.0.0.1:{server.server_address[1]}")
+                report = run_load_test(target, voices + ['unknown'], corpus, requests=8,
+                                       arrival_rate=200.0, warmup=False)
+                
+                # Invalid conditioning is the client's fault
+                import json
+                import urllib.error
+                import urllib.request
+                statuses = []
+                for fields in ({'text': 'Hallo.', 'conditioning': {'bogus': 1}}, {'text': ''}, {'text': ' \n'}):
+                    body = json.dumps({'voice': voices[0], **fields})
+                    try:
+                        urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/synthesize",
+                                               body.encode('utf-8'), timeout=10)
+                        statuses.append(200)
+                    except urllib.error.HTTPError as e:
+                        statuses.append(e.code)
+            finally:
+                server.shutdown()
+                server.server_close()
+            if report['completed'] != 6 or report['errors']['rate'] != 0.25:
+                print(f"✗ Unexpected server report: {report}")
+                return False
+            if report['ttfa_ms']['p50'] > report['latency_ms']['p50']:
+                print("✗ Time to first audio exceeds latency")
+                return False
+            print("✓ Open loop against the server streams audio and counts unknown voices as errors")
+            if statuses != [400, 400, 400]:
+                print(f"✗ Invalid conditioning or empty text answered with {statuses}")
+                return False
+            print("✓ Invalid conditioning and empty text rejected with 400")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Load test failed: {e}")
+        return False
+
+def test_output_sample_rate():
+    """Test low-rate synthesis output with in-stream resampling"""
+    print("\n=== Testing output sample rate ===")
+    
+    try:
+        import numpy as np
+        import soundfile as sf
+        import torch
+        from audio_io import StreamingResampler
+        from voice_model import ZonosVoiceModel
+        
+        text = "Hallo Welt. Wie geht es dir? Gut!"
+        with tempfile.TemporaryDirectory() as model_dir:
+            voice = ZonosVoiceModel("rate_test", model_dir=model_dir, output_sample_rate=16000)
+            voice.use_placeholder_backend()
+            voice.speaker_embedding = torch.randn(256)
+            
+            # Backend at 44.1 kHz: chunks are resampled as they are generated
+            generated = []
+            generate = voice._generate_speech
+            voice._generation_rate = lambda sample_rate: ZonosVoiceModel.NATIVE_SAMPLE_RATE
+            voice._generate_speech = lambda *args: generated.append(generate(*args)) or generated[-1]
+            chunks = list(voice.iter_speech_chunks(text))
+            expected = StreamingResampler(44100, 16000).resample(np.concatenate(generated))
+            streamed = np.concatenate(chunks)
+            if len(chunks) != 3 or len(streamed) != len(expected) or not np.allclose(streamed, expected, atol=1e-6):
+                print("✗ Chunk-wise resampling differs from resampling the whole utterance")
+                return False
+            print(f"✓ {len(chunks)} chunks resampled in-stream to {len(streamed)} samples at 16 kHz")
+            
+            # Placeholder backend generates at the output rate directly
+            del voice._generation_rate
+            output = voice.synthesize_speech(text, os.path.join(model_dir, "out.wav"), sample_rate=24000)
+            info = sf.info(output)
+            frames = sum(int(24000 * len(segment) * 0.1) for segment in voice._split_text_segments(text))
+            if info.samplerate != 24000 or info.frames != frames:
+                print(f"✗ Unexpected output {info.samplerate} Hz, {info.frames} frames")
+                return False
+            print("✓ File written at the requested rate")
+            
+            try:
+                ZonosVoiceModel("rate_test", model_dir=model_dir, output_sample_rate=12345)
+                print("✗ Unsupported rate accepted")
+                return False
+            except ValueError:
+                print("✓ Unsupported rates are rejected")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Output sample rate test failed: {e}")
+        return False
+
+def test_embedding_index():
+    """Test embedding_index.py top-k lookup and persistence"""
+    print("\n=== Testing embedding index ===")
+    
+    try:
+        from embedding_index import NUMPY_AVAILABLE, EmbeddingIndex
+        
+        if not NUMPY_AVAILABLE:
+            print("✓ NumPy not installed, embedding index test skipped")
+            return True
+        
+        import threading
+        import numpy as np
+        
+        rng = np.random.default_rng(2)
+        vectors = rng.standard_normal((50, 64)).astype(np.float32)
+        
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = EmbeddingIndex(index_dir)
+            for i, vector in enumerate(vectors):
+                index.add(f"voice_{i}", vector)
+            index.add("copy_of_7", vectors[7] * 2.0)
+            # Update in place
+            index.add("voice_3", vectors[4])
+            
+            reopened = EmbeddingIndex(index_dir)
+            if len(reopened) != 51:
+                print(f"✗ Unexpected index size: {len(reopened)}")
+                return False
+            print("✓ Index persisted and reopened")
+            
+            matches = reopened.top_k(vectors[7], k=2, exclude="voice_7")
+            if matches[0][0] != "copy_of_7" or matches[0][1] < 0.999:
+                print(f"✗ Unexpected nearest voice: {matches}")
+                return False
+            print("✓ Cosine top-k finds the nearest voice")
+            
+            pairs = {(a, b) for a, b, _ in reopened.find_near_duplicates(0.99)}
+            if pairs != {("voice_3", "voice_4"), ("voice_7", "copy_of_7")}:
+                print(f"✗ Unexpected near-duplicates: {pairs}")
+                return False
+            print("✓ Near-duplicates detected")
+        
+        with tempfile.TemporaryDirectory() as index_dir:
+            # Separate instances, like concurrent trainings in several processes
+            def writer(worker):
+                for i in range(25):
+                    EmbeddingIndex(index_dir).add(f"w{worker}_{i}", rng.standard_normal(64))
+            
+            threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            index = EmbeddingIndex(index_dir)
+            if len(index) != 200 or len(set(index._names)) != 200:
+                print(f"✗ Concurrent writers lost or overlapped rows ({len(index)} voices)")
+                return False
+            print("✓ Concurrent writers get distinct rows")
+            
+            # A writer that died after its name but before its row
+            with open(os.path.join(index_dir, "embeddings.names"), 'a', encoding='utf-8') as f:
+                f.write("orphan\n")
+            if len(EmbeddingIndex(index_dir)) != 200 or not EmbeddingIndex(index_dir).top_k(vectors[0], 3):
+                print("✗ Names without rows break queries")
+                return False
+            index.add("after_orphan", vectors[0])
+            if index.top_k(vectors[0], 1)[0][0] != "after_orphan" or "orphan" in index:
+                print("✗ Index not repaired by the next writer")
+                return False
+            print("✓ Names without rows are ignored and dropped by the next writer")
+        
+        with tempfile.TemporaryDirectory() as index_dir:
+            # Both generations map voice_i to vectors[i], in opposite row order,
+            # so names of one generation over rows of the other are caught
+            forward = {f"voice_{i}": vectors[i] for i in range(20)}
+            backward = {f"voice_{i}": vectors[i] for i in reversed(range(20))}
+            index = EmbeddingIndex(index_dir)
+            index.rebuild(forward)
+            errors = []
+            done = threading.Event()
+            
+            def reader():
+                reader_index = EmbeddingIndex(index_dir)
+                while not done.is_set():
+                    for i in range(0, 20, 3):
+                        match = reader_index.top_k(vectors[i], 1)
+                        if not match or match[0][0] != f"voice_{i}" or match[0][1] < 0.999:
+                            errors.append(match)
+            
+            threads = [threading.Thread(target=reader) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for generation in range(60):
+                index.rebuild(backward if generation % 2 else forward)
+            done.set()
+            for thread in threads:
+                thread.join()
+            if errors:
+                print(f"✗ Readers saw names and rows of different rebuilds: {errors[:3]}")
+                return False
+            matrix_files = [f for f in os.listdir(index_dir) if f.endswith(".f32")]
+            if len(matrix_files) != 1:
+                print(f"✗ Old index generations left behind: {matrix_files}")
+                return False
+            print("✓ Rebuilds switch names and rows atomically")
+            
+            if not index.remove("voice_7") or index.remove("voice_7"):
+                print("✗ Unexpected result removing a voice")
+                return False
+            reopened = EmbeddingIndex(index_dir)
+            if "voice_7" in reopened or len(reopened) != 19 \
+                    or reopened.top_k(vectors[8], 1)[0][0] != "voice_8":
+                print(f"✗ Voice not removed cleanly: {reopened._names}")
+                return False
+            index.add("voice_7", vectors[7])
+            if EmbeddingIndex(index_dir).top_k(vectors[7], 1)[0][0] != "voice_7":
+                print("✗ Index not writable after a removal")
+                return False
+            print("✓ Voices can be removed from the index")
+        
+        from voice_model import DEPENDENCIES_AVAILABLE, ZonosVoiceModel, get_model_store
+        if not DEPENDENCIES_AVAILABLE:
+            print("✓ PyTorch not installed, voice deletion check skipped")
+            return True
+        
+        import torch
+        with tempfile.TemporaryDirectory() as model_dir:
+            store = get_model_store(model_dir)
+            for i, name in enumerate(["kept", "gone"]):
+                store.save(name, {'speaker_embedding': torch.from_numpy(vectors[i])})
+            ZonosVoiceModel.rebuild_embedding_index(model_dir)
+            if not ZonosVoiceModel.delete_voice_model("gone", model_dir) or store.load("gone") is not None:
+                print("✗ Voice model not deleted")
+                return False
+            index = ZonosVoiceModel.get_embedding_index(model_dir)
+            if "gone" in index or "kept" not in index:
+                print(f"✗ Deleted voice still indexed: {index._names}")
+                return False
+            print("✓ Deleted voices leave the index")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Embedding index test failed: {e}")
+        return False
+
+def test_bulk_training_manifest():
+    """Test batch_jobs.py speaker discovery, resumable manifest and job records"""
+    print("\n=== Testing bulk job manifest ===")
+    
+    try:
+        from batch_jobs import Manifest, find_speakers, job_output_path, read_job_records
+        
+        with tempfile.TemporaryDirectory() as root:
+            for speaker, files in {'alice': ['a.wav', 'b.flac'], 'bob': ['c.mp3', 'notes.txt'],
+                                   'empty': ['readme.md']}.items():
+                os.makedirs(os.path.join(root, speaker))
+                for name in files:
+                    open(os.path.join(root, speaker, name), 'w').close()
+            
+            speakers = find_speakers(root)
+            if sorted(speakers) != ['alice', 'bob'] or len(speakers['alice']) != 2 or len(speakers['bob']) != 1:
+                print(f"✗ Unexpected speakers: {speakers}")
+                return False
+            print("✓ Speaker subdirectories discovered")
+            
+            path = os.path.join(root, '.manifest.jsonl')
+            manifest = Manifest(path)
+            manifest.append({'key': 'alice', 'status': 'done'})
+            manifest.append({'key': 'bob', 'status': 'failed'})
+            with open(path, 'a') as f:
+                f.write('{"key": "carol", "sta')  # interrupted write
+            
+            resumed = Manifest(path)
+            if not resumed.is_done('alice') or resumed.is_done('bob') or 'carol' in resumed.records:
+                print(f"✗ Unexpected manifest state: {resumed.records}")
+                return False
+            print("✓ Manifest resumes finished speakers and ignores truncated lines")
+            
+            csv_path = os.path.join(root, 'jobs.csv')
+            with open(csv_path, 'w') as f:
+                f.write("voice,text,output,format\nalice,Hallo,out/a,flac\nbob,Hi,out/b.mp3,wav\n")
+            jobs = list(read_job_records(csv_path))
+            if job_output_path(jobs[0]) != 'out/a.flac' or jobs[1]['line'] != 3:
+                print(f"✗ Unexpected job records: {jobs}")
+                return False
+            try:
+                job_output_path(jobs[1])
+                print("✗ Mismatched output format was accepted")
+                return False
+            except ValueError:
+                pass
+            print("✓ CSV job records streamed with output formats checked")
+            
+            # Throughput counts the scanned input, with or without silence trimming
+            import batch_jobs
+            
+            class ScannedModel:
+                def __init__(self, name, **options):
+                    self.training_report = {}
+                
+                def train_voice_model(self, files, resume=False):
+                    self.training_report['input'] = {'files': len(files), 'audio_seconds': 12.5}
+                    return True
+            
+            real_model = batch_jobs.ZonosVoiceModel
+            batch_jobs.ZonosVoiceModel = ScannedModel
+            try:
+                result = batch_jobs._train_speaker('alice', speakers['alice'], {'trim_silence': False})
+            finally:
+                batch_jobs.ZonosVoiceModel = real_model
+            if result['audio_seconds'] != 12.5:
+                print(f"✗ Unexpected audio seconds without VAD: {result['audio_seconds']}")
+                return False
+            print("✓ Audio seconds taken from the input scan")
+            
+            # Outputs in directories that do not exist yet are created
+            class WritingModel:
+                def synthesize_speech(self, text, output_path, conditioning=None, sample_rate=None):
+                    with open(output_path, 'w') as f:
+                        f.write(text)
+                    return True
+            
+            nested = os.path.join(root, 'out', 'new', 'a.wav')
+            result = batch_jobs._synthesize_job({'line': 2, 'voice': 'alice', 'text': 'Hallo'}, WritingModel(), nested)
+            if result.get('error') or not os.path.exists(nested):
+                print(f"✗ Output in a new directory not written: {result}")
+                return False
+            print("✓ Missing output directories created")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Bulk training test failed: {e}")
+        return False
+
 def test_app_structure():
     """Test main_apk.py structure"""
     print("\n=== Testing main_apk.py structure ===")
@@ -168,6 +1774,28 @@ def main():
     
     tests = [
         test_voice_model,
+        test_job_executor,
+        test_voice_activity_detection,
+        test_quality_screening,
+        test_chunked_audio_reader,
+        test_training_checkpoints,
+        test_model_store,
+        test_batched_speaker_encoding,
+        test_conditioning_cache,
+        test_model_prewarmer,
+        test_precision_modes,
+        test_compiled_backend,
+        test_thread_settings,
+        test_shared_weight_cache,
+        test_memory_profiling,
+        test_cpu_profiling,
+        test_audio_dedup,
+        test_training_progress,
+        test_async_api,
+        test_load_test,
+        test_output_sample_rate,
+        test_embedding_index,
+        test_bulk_training_manifest,
         test_app_structure,
         test_dependencies,
         test_buildozer_config,
@@ -0,0 +1,250 @@
+"""
+Training Checkpoints
+====================
+
+Stage-level checkpoints of a voice training run, so a crash or an app kill
+after most of a large corpus was decoded doesn't start everything over.
+
+Each run gets a work directory under <cache>/training_runs, named after the
+voice and a fingerprint of its inputs (paths, sizes, mtimes and the
+preprocessing options). It holds:
+
+- files.json            validated audio file list
+- audio/NNNNN.f32       preprocessed (resampled, mono, speech-only) audio per file
+- audio/NNNNN.json      per-file metadata: length, VAD stats, scored segments
+- combined.f32          selected training audio, read window by window by the encoder
+- embedding.pt          speaker embedding and training report
+- state.json            last completed stage
+
+Every file is written to a temporary name and published with os.replace, so
+a checkpoint is either complete or absent. The directory is removed once the
+voice model has been saved.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from cpu_inference import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RUNS_SUBDIR = "training_runs"
+STALE_RUN_SECONDS = 7 * 24 * 3600
+
+
+def _fsync_replace(tmp_path: str, path: str):
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def run_fingerprint(model_name: str, audio_files: List[str], options: Dict[str, Any]) -> str:
+    """
+    Hash of a run's inputs; a changed file or option starts a new run.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    for path in audio_files:
+        try:
+            stat = os.stat(path)
+            entry = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            entry = (os.path.abspath(path), None, None)
+        digest.update(repr(entry).encode('utf-8'))
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class DiskAudio:
+    """
+    A range of float32 samples in a raw audio file, read only on access.
+
+    Slicing with a step-less slice reads just those samples, so audio of any
+    length can be passed around and windowed in bounded memory; subrange()
+    narrows the range without reading anything.
+    """
+
+    def __init__(self, path: Optional[str], start: int = 0, length: int = 0):
+        self.path = path
+        self.start = start
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: slice) -> 'np.ndarray':
+        start, stop, _ = index.indices(self.length)
+        count = max(0, stop - start)
+        if not count:
+            return np.zeros(0, dtype=np.float32)
+        return np.fromfile(self.path, dtype=np.float32, count=count, offset=(self.start + start) * 4)
+
+    def subrange(self, start: int, stop: int) -> 'DiskAudio':
+        start, stop, _ = slice(start, stop).indices(self.length)
+        return DiskAudio(self.path, self.start + start, max(0, stop - start))
+
+
+class TrainingCheckpoint:
+    """
+    Work directory of one training run with atomic stage checkpoints.
+    """
+
+    def __init__(self, work_dir: str):
+        self.work_dir = work_dir
+        os.makedirs(os.path.join(work_dir, "audio"), exist_ok=True)
+
+    @classmethod
+    def for_run(cls, model_name: str, audio_files: List[str],
+                options: Dict[str, Any]) -> 'TrainingCheckpoint':
+        """
+        Open the work directory of the run with these inputs.
+        """
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)[:64]
+        fingerprint = run_fingerprint(model_name, audio_files, options)
+        return cls(os.path.join(get_cache_dir(RUNS_SUBDIR), f"{safe_name}-{fingerprint}"))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def save_json(self, name: str, data):
+        path = self._path(f"{name}.json")
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        _fsync_replace(tmp_path, path)
+
+    def load_json(self, name: str):
+        try:
+            with open(self._path(f"{name}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_torch(self, name: str, obj):
+        import torch
+        path = self._path(f"{name}.pt")
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        torch.save(obj, tmp_path)
+        _fsync_replace(tmp_path, path)
+
+    def load_torch(self, name: str):
+        path = self._path(f"{name}.pt")
+        if not os.path.exists(path):
+            return None
+        try:
+            import torch
+            return torch.load(path, map_location='cpu')
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def mark_stage(self, stage: str, **details):
+        self.save_json('state', dict(details, stage=stage, updated_at=time.time()))
+
+    def open_audio(self, key: str):
+        """
+        Open a temporary file for a file's preprocessed float32 audio.
+        Publish it with commit_audio() once it is complete.
+        """
+        return open(self._path(f"{key}.f32.tmp{os.getpid()}"), 'wb')
+
+    def commit_audio(self, key: str, handle, meta: Dict[str, Any]):
+        """
+        Publish preprocessed audio and then its metadata, which marks it complete.
+        """
+        handle.flush()
+        os.fsync(handle.fileno())
+        handle.close()
+        os.replace(handle.name, self._path(f"{key}.f32"))
+        self.save_json(key, meta)
+
+    def discard_audio(self, handle):
+        handle.close()
+        if os.path.exists(handle.name):
+            os.remove(handle.name)
+
+    def load_audio_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of a completed per-file checkpoint, or None if it must be redone.
+        """
+        meta = self.load_json(key)
+        if meta is None or meta.get('error'):
+            return meta
+        try:
+            if os.path.getsize(self._path(f"{key}.f32")) != meta['length'] * 4:
+                return None
+        except (OSError, KeyError):
+            return None
+        return meta
+
+    def load_audio(self, key: str, length: int) -> DiskAudio:
+        """
+        A file's preprocessed audio, read from disk on access.
+        """
+        return DiskAudio(self._path(f"{key}.f32"), 0, length)
+
+    def join_audio(self, key: str, parts: List[DiskAudio],
+                   chunk_samples: int = 1 << 20) -> DiskAudio:
+        """
+        Write the concatenation of audio ranges to one file, chunk by chunk.
+        """
+        handle = self.open_audio(key)
+        length = 0
+        try:
+            for part in parts:
+                for start in range(0, len(part), chunk_samples):
+                    chunk = part[start:start + chunk_samples]
+                    handle.write(chunk.tobytes())
+                    length += len(chunk)
+        except BaseException:
+            self.discard_audio(handle)
+            raise
+        self.commit_audio(key, handle, {'length': length})
+        return self.load_audio(key, length)
+
+    def clear(self):
+        """Remove all checkpoints of this run and start empty."""
+        self.cleanup()
+        os.makedirs(os.path.join(self.work_dir, "audio"), exist_ok=True)
+
+    def cleanup(self):
+        """Remove the work directory."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def prune_stale_runs(max_age_seconds: float = STALE_RUN_SECONDS) -> int:
+    """
+    Remove work directories of abandoned runs not touched for max_age_seconds.
+
+    Returns:
+        Number of removed runs
+    """
+    runs_dir = get_cache_dir(RUNS_SUBDIR)
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    for name in os.listdir(runs_dir):
+        path = os.path.join(runs_dir, name)
+        try:
+            stamp = os.path.getmtime(os.path.join(path, "state.json"))
+        except OSError:
+            try:
+                stamp = os.path.getmtime(path)
+            except OSError:
+                continue
+        if stamp < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale training run(s)")
+    return removed
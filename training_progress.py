@@ -0,0 +1,182 @@
+"""
+Training Progress
+=================
+
+Duration-weighted progress and ETA for voice training. A header-only
+pre-pass gives the duration of every input file, and each training stage
+then reports progress in seconds of audio processed, so a one-hour upload
+moves the bar sixty times as far as a one-minute clip.
+
+Stages are weighted by a default relative cost per second of audio. The ETA
+is refined from measured throughput as the run goes on: the remaining audio
+of the current stage is extrapolated from the stage's own rate, and upcoming
+stages from their default cost scaled by how fast the finished work went on
+this machine.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Relative cost of one second of audio per stage (preprocessing = 1)
+STAGE_COSTS = OrderedDict([
+    ('dedup', 0.3),
+    ('preprocess', 1.0),
+    ('embedding', 2.0),
+])
+
+# Audio seconds a stage must have processed before its own rate is trusted
+MIN_MEASURED_SECONDS = 5.0
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """Format an ETA as m:ss or h:mm:ss, '?' if unknown."""
+    if seconds is None:
+        return "?"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class TrainingProgress:
+    """
+    Thread-safe progress and ETA tracker for one training run.
+    """
+
+    def __init__(self, callback: Callable[[float], None] = None, costs: Dict[str, float] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize the tracker.
+
+        Args:
+            callback: Called with the overall progress (0-100) whenever it
+                      increases; never called with a lower value than before
+            costs: Relative cost per audio second by stage, defaults to STAGE_COSTS
+            clock: Time source, for tests
+        """
+        self.callback = callback
+        self.costs = dict(costs or STAGE_COSTS)
+        self.clock = clock
+        self.stage: Optional[str] = None
+        self._totals = {stage: 0.0 for stage in self.costs}
+        self._done = {stage: 0.0 for stage in self.costs}
+        self._elapsed = {stage: 0.0 for stage in self.costs}
+        self._finished = set()
+        self._stage_started = None
+        self._reported = 0.0
+        self._lock = threading.Lock()
+
+    def plan(self, stage: str, audio_seconds: float):
+        """Set the amount of audio a stage will process."""
+        with self._lock:
+            self._totals[stage] = max(0.0, audio_seconds)
+            self._done[stage] = min(self._done[stage], self._totals[stage])
+        self._notify()
+
+    def start(self, stage: str):
+        """Begin a stage; the previous one is finished."""
+        with self._lock:
+            self._finish_locked(self.stage)
+            self.stage = stage
+            self._stage_started = self.clock()
+        self._notify()
+
+    def advance(self, audio_seconds: float):
+        """Record audio processed by the current stage."""
+        with self._lock:
+            if self.stage in self._done:
+                self._done[self.stage] = min(self._totals[self.stage],
+                                             self._done[self.stage] + audio_seconds)
+        self._notify()
+
+    def finish(self, stage: str = None):
+        """Mark a stage (default: the current one) as complete, e.g. when restored from a checkpoint."""
+        with self._lock:
+            self._finish_locked(stage or self.stage)
+        self._notify()
+
+    def complete(self):
+        """Mark the whole run as complete."""
+        with self._lock:
+            for stage in self.costs:
+                self._finish_locked(stage)
+            self.stage = None
+        self._notify(100.0)
+
+    def _finish_locked(self, stage: Optional[str]):
+        if stage not in self.costs or stage in self._finished:
+            return
+        if stage == self.stage and self._stage_started is not None:
+            self._elapsed[stage] += self.clock() - self._stage_started
+            self._stage_started = None
+        self._done[stage] = self._totals[stage]
+        self._finished.add(stage)
+
+    @property
+    def percent(self) -> float:
+        """Overall progress, weighted by audio seconds and stage cost."""
+        with self._lock:
+            return self._percent_locked()
+
+    def _percent_locked(self) -> float:
+        total = sum(self._totals[s] * cost for s, cost in self.costs.items())
+        if total <= 0:
+            return 0.0
+        done = sum(self._done[s] * cost for s, cost in self.costs.items())
+        # 100% only once the model has been saved
+        return min(99.0, 100.0 * done / total)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds until the run completes, None until throughput was measured."""
+        with self._lock:
+            return self._eta_locked()
+
+    def _eta_locked(self) -> Optional[float]:
+        elapsed = dict(self._elapsed)
+        if self.stage in elapsed and self._stage_started is not None:
+            elapsed[self.stage] += self.clock() - self._stage_started
+
+        # Seconds per cost unit of all work measured so far
+        measured_units = sum(self._done[s] * self.costs[s] for s in self.costs if elapsed[s] > 0)
+        if measured_units <= 0:
+            return None
+        seconds_per_unit = sum(elapsed.values()) / measured_units
+
+        remaining = 0.0
+        for stage, cost in self.costs.items():
+            left = self._totals[stage] - self._done[stage]
+            if left <= 0 or stage in self._finished:
+                continue
+            if self._done[stage] >= MIN_MEASURED_SECONDS and elapsed[stage] > 0:
+                remaining += left * elapsed[stage] / self._done[stage]
+            else:
+                remaining += left * cost * seconds_per_unit
+        return remaining
+
+    def _notify(self, percent: float = None):
+        with self._lock:
+            percent = self._percent_locked() if percent is None else percent
+            if percent <= self._reported:
+                return
+            self._reported = percent
+        if self.callback:
+            self.callback(percent)
+
+    def report(self) -> Dict[str, Any]:
+        """Snapshot of the run's progress for display."""
+        with self._lock:
+            return {
+                'stage': self.stage,
+                'percent': round(self._reported, 1),
+                'eta_seconds': self._eta_locked(),
+                'processed_seconds': round(sum(self._done.values()), 1),
+                'total_seconds': round(sum(self._totals.values()), 1),
+            }
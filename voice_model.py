@@ -14,9 +14,12 @@ Zonos TTS features:
 """
 
 import os
+import re
+import time
 import logging
 import tempfile
-from typing import Optional, List, Dict, Any
+import threading
+from typing import Optional, List, Dict, Any, Iterator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -112,25 +115,208 @@ except ImportError as e:
                 f.write(f"Dummy audio file: {len(data)} samples at {samplerate}Hz")
             logger.info(f"Dummy audio written to {path}")
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cpu_inference import (PRECISION_FP32, PRECISION_INT8, PRECISION_BF16, PRECISIONS,
+                           COMPILE_EAGER, COMPILE_MODES, compile_backend, default_compile_mode,
+                           default_mmap_weights, default_precision, default_weights_path,
+                           load_backend_mapped,
+                           load_or_quantize_int8, precision_context,
+                           apply_default_thread_settings, thread_limit)
+from audio_analysis import (NUMPY_AVAILABLE, EnergyVAD, StreamingSegmentScorer, summarize_vad,
+                            select_best_segments)
+from audio_io import (AUDIO_IO_AVAILABLE, StreamingResampler, decoded_bytes, duration_seconds,
+                      iter_audio_blocks, scan_audio_files)
+from audio_dedup import deduplicate_audio_files
+from embedding_index import EmbeddingIndex
+from training_checkpoint import TrainingCheckpoint, prune_stale_runs
+from training_progress import TrainingProgress
+from model_store import ModelStore, default_model_dir
+from profiling import memory_stage, profiled
+from conditioning_cache import get_conditioning_cache, normalize_conditioning
+from speaker_encoding import (TORCH_AVAILABLE, BandEnergyEncoder, batch_windows, padded_batch, plan_windows,
+                              robust_mean)
+
+
+class OperationCancelled(Exception):
+    """
+    Raised internally when a training or synthesis run is cancelled
+    through its cancel event.
+    """
+
+
+def _check_cancelled(cancel_event, stage: str):
+    """
+    Raise OperationCancelled if the given cancel event has been set.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled(f"Cancelled during {stage}")
+
+
+# Process-wide Zonos backend shared by all ZonosVoiceModel instances
+# (one instance per precision and compile mode, fp32 and bf16 share the same weights)
+_shared_backends: Dict[Any, Any] = {}
+# Speaker encoders by embedding size, precision and compile mode
+_shared_encoders: Dict[Any, Any] = {}
+_shared_backend_lock = threading.Lock()
+
+
+def get_shared_backend(precision: str = PRECISION_FP32, compile_mode: str = COMPILE_EAGER):
+    """
+    Return the process-wide Zonos TTS backend, loading it on first use.
+    
+    Args:
+        precision: Precision mode (fp32, int8 or bf16)
+        compile_mode: Compile mode (eager, trace or compile)
+    
+    Raises:
+        ImportError: If the zonos package is not installed
+    """
+    with _shared_backend_lock:
+        return _get_shared_backend_locked(precision, compile_mode)
+
+
+def _get_shared_backend_locked(precision: str, compile_mode: str = COMPILE_EAGER):
+    if precision == PRECISION_BF16:
+        # bfloat16 is applied via autocast at inference time
+        precision = PRECISION_FP32
+    
+    if compile_mode != COMPILE_EAGER:
+        key = (precision, compile_mode)
+        if key not in _shared_backends:
+            base = _get_shared_backend_locked(precision)
+            _shared_backends[key] = compile_backend(base, compile_mode, precision)
+        return _shared_backends[key]
+    
+    if precision not in _shared_backends:
+        if precision == PRECISION_INT8:
+            base = _get_shared_backend_locked(PRECISION_FP32)
+            _shared_backends[precision] = load_or_quantize_int8(base)
+        else:
+            # Import zonos here to handle import errors gracefully
+            import zonos
+            
+            # Apply configured/autotuned thread counts before the first torch work
+            apply_default_thread_settings()
+            
+            logger.info("Loading Zonos TTS model...")
+            # Initialize Zonos TTS model
+            # Note: This is a placeholder - actual implementation would depend on
+            # the specific Zonos API which may evolve. With memory-mapped weights
+            # the checkpoint at STIMMENKLON_WEIGHTS is mapped onto a backend
+            # built without weights; all processes share one copy in the page cache.
+            weights_path = default_weights_path()
+            if default_mmap_weights() and not weights_path:
+                logger.warning("STIMMENKLON_MMAP_WEIGHTS needs STIMMENKLON_WEIGHTS, weights not mapped")
+            if default_mmap_weights() and weights_path:
+                _shared_backends[precision] = load_backend_mapped(zonos.TTS, weights_path)
+            else:
+                _shared_backends[precision] = zonos.TTS()
+            logger.info("Zonos TTS model loaded successfully")
+    return _shared_backends[precision]
+
+
+def get_speaker_encoder(embedding_size: int = 256, precision: str = PRECISION_FP32,
+                        compile_mode: str = COMPILE_EAGER):
+    """
+    Return the process-wide speaker encoder for the embedding stage, run
+    through the traced/compiled wrapper unless compile_mode is eager.
+    """
+    key = (embedding_size, precision, compile_mode)
+    with _shared_backend_lock:
+        if key not in _shared_encoders:
+            encoder = BandEnergyEncoder(embedding_size).eval()
+            _shared_encoders[key] = compile_backend(encoder, compile_mode, precision)
+        return _shared_encoders[key]
+
+
+def is_backend_loaded() -> bool:
+    """
+    Check whether the shared backend has already been loaded.
+    """
+    return bool(_shared_backends)
+
+
+def reset_shared_backend():
+    """
+    Drop the shared backends so the next load starts cold (used for benchmarks).
+    """
+    with _shared_backend_lock:
+        _shared_backends.clear()
+        _shared_encoders.clear()
+
 
 class ZonosVoiceModel:
     """
     Voice model class for training and synthesis using Zonos TTS.
     """
     
-    def __init__(self, model_name: str = "default"):
+    NATIVE_SAMPLE_RATE = 44100  # Zonos decoder output
+    OUTPUT_SAMPLE_RATES = (8000, 16000, 22050, 24000, 44100)
+    
+    def __init__(self, model_name: str = "default", precision: str = None,
+                 compile_mode: str = None, num_threads: int = None,
+                 trim_silence: bool = True, vad_options: Dict[str, Any] = None,
+                 max_training_seconds: Optional[float] = 300.0, model_dir: str = None,
+                 embedding_memory_mb: float = 256.0, persist_conditioning: bool = False,
+                 dedup_audio: bool = True, output_sample_rate: int = None):
         """
         Initialize the voice model.
         
         Args:
             model_name: Name identifier for this voice model
+            precision: Inference precision (fp32, int8 or bf16); defaults to
+                       STIMMENKLON_PRECISION or fp32
+            compile_mode: Inference graph mode (eager, trace or compile);
+                          defaults to STIMMENKLON_COMPILE or eager
+            num_threads: Intra-op torch threads for this model's inference
+                         calls; None keeps the process setting
+            trim_silence: Drop non-speech frames before speaker embedding
+            vad_options: EnergyVAD keyword arguments (thresholds, frame size, hangover)
+            max_training_seconds: Budget of best-scoring audio passed to the
+                                  speaker encoder; None uses all audio
+            model_dir: Root of the voice model store; defaults to
+                       STIMMENKLON_MODEL_DIR or ~/.stimmenklon_models
+            embedding_memory_mb: Working memory cap of one batched speaker
+                                 encoder pass
+            persist_conditioning: Keep computed conditioning state in sidecar
+                                  files next to the model file
+            dedup_audio: Skip identical and near-duplicate (trimmed,
+                         re-encoded) training files before preprocessing
+            output_sample_rate: Sample rate of synthesized audio, one of
+                                OUTPUT_SAMPLE_RATES; defaults to 44.1 kHz
         """
+        precision = precision or default_precision()
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+        compile_mode = compile_mode or default_compile_mode()
+        if compile_mode not in COMPILE_MODES:
+            raise ValueError(f"Unsupported compile mode '{compile_mode}', expected one of {COMPILE_MODES}")
+        
         self.model_name = model_name
+        self.precision = precision
+        self.compile_mode = compile_mode
+        self.num_threads = num_threads
+        self.trim_silence = trim_silence
+        self.vad_options = vad_options or {}
+        self.max_training_seconds = max_training_seconds
+        self.embedding_memory_mb = embedding_memory_mb
+        self.persist_conditioning = persist_conditioning
+        self.dedup_audio = dedup_audio
+        self.output_sample_rate = self._output_rate(output_sample_rate or self.NATIVE_SAMPLE_RATE)
+        self.training_report: Dict[str, Any] = {}
+        self.training_progress: Optional[TrainingProgress] = None
         self.model = None
         self.is_loaded = False
         self.speaker_embedding = None
         self.model_path = None
+        self.model_generation = None
+        self.store = get_model_store(model_dir)
         
+    @profiled('load_backend')
     def load_model(self) -> bool:
         """
         Load the Zonos TTS model.
@@ -139,16 +325,8 @@ class ZonosVoiceModel:
             bool: True if model loaded successfully, False otherwise
         """
         try:
-            # Import zonos here to handle import errors gracefully
-            import zonos
-            
-            logger.info("Loading Zonos TTS model...")
-            # Initialize Zonos TTS model
-            # Note: This is a placeholder - actual implementation would depend on
-            # the specific Zonos API which may evolve
-            self.model = zonos.TTS()
+            self.model = get_shared_backend(self.precision, self.compile_mode)
             self.is_loaded = True
-            logger.info("Zonos TTS model loaded successfully")
             return True
             
         except ImportError:
@@ -158,74 +336,183 @@ class ZonosVoiceModel:
             logger.error(f"Failed to load Zonos TTS model: {e}")
             return False
     
-    def train_voice_model(self, audio_files: List[str], progress_callback=None) -> bool:
+    def use_placeholder_backend(self):
+        """
+        Run without the Zonos backend: synthesis produces placeholder audio
+        of realistic length. For offline load tests and machines without Zonos.
+        """
+        self.model = None
+        self.is_loaded = True
+    
+    @profiled('train')
+    def train_voice_model(self, audio_files: List[str], progress_callback=None,
+                          cancel_event=None, resume: bool = False) -> bool:
         """
         Train a voice model using provided audio files.
         
+        Completed stages are checkpointed in a per-run work directory, which
+        is removed once the model has been saved, or when the run fails or is
+        cancelled without resume being requested.
+        
         Args:
             audio_files: List of paths to audio files for training
-            progress_callback: Function to call with progress updates (0-100)
+            progress_callback: Function to call with progress updates (0-100),
+                               weighted by seconds of audio processed; the
+                               ETA is available from training_progress
+            cancel_event: Optional threading.Event; training stops between
+                          stages once it is set
+            resume: Continue an interrupted run with the same inputs from its
+                    checkpoints instead of starting over
             
         Returns:
             bool: True if training successful, False otherwise
         """
         if not self.is_loaded and not self.load_model():
             return False
-            
+        
+        checkpoint = None
         try:
             logger.info(f"Starting voice model training with {len(audio_files)} files")
+            self.training_report = {}
+            progress = TrainingProgress(progress_callback)
+            self.training_progress = progress
             
-            # Validate audio files
-            valid_files = []
-            for i, audio_file in enumerate(audio_files):
-                if progress_callback:
-                    progress_callback(int((i / len(audio_files)) * 20))  # First 20% for validation
-                    
-                if os.path.exists(audio_file) and self._is_valid_audio_file(audio_file):
-                    valid_files.append(audio_file)
-                    logger.info(f"Validated: {audio_file}")
-                else:
-                    logger.warning(f"Invalid or missing audio file: {audio_file}")
+            prune_stale_runs()
+            checkpoint = TrainingCheckpoint.for_run(self.model_name, audio_files,
+                                                    self._preprocessing_options())
+            if not resume:
+                checkpoint.clear()
             
-            if not valid_files:
-                logger.error("No valid audio files found for training")
-                return False
+            # Header-only pre-pass: durations weight progress and the ETA
+            durations = self._scan_audio_files(audio_files)
             
-            # Process audio files and create speaker embedding
-            if progress_callback:
-                progress_callback(25)
-                
-            combined_audio = self._combine_audio_files(valid_files, progress_callback)
+            def audio_seconds(files):
+                # Without readable headers every file counts the same
+                return sum(durations.get(f) or 1.0 for f in files)
             
-            if progress_callback:
-                progress_callback(70)
+            def plan_stages(files):
+                progress.plan('preprocess', audio_seconds(files))
+                progress.plan('embedding', min(audio_seconds(files),
+                                               self.max_training_seconds or float('inf')))
             
-            # Create speaker embedding from combined audio
-            self.speaker_embedding = self._create_speaker_embedding(combined_audio)
+            # Validate audio files
+            valid_files = checkpoint.load_json('files')
+            if valid_files is not None:
+                logger.info(f"Resuming training run: {len(valid_files)} files already validated")
+                dedup_report = checkpoint.load_json('dedup')
+                if dedup_report:
+                    self.training_report['dedup'] = dedup_report
+            else:
+                valid_files = []
+                with memory_stage('validate'):
+                    for audio_file in audio_files:
+                        _check_cancelled(cancel_event, "validation")
+                        if os.path.exists(audio_file) and self._is_valid_audio_file(
+                                audio_file, durations.get(audio_file)):
+                            valid_files.append(audio_file)
+                            logger.info(f"Validated: {audio_file}")
+                        else:
+                            logger.warning(f"Invalid or missing audio file: {audio_file}")
+                
+                if not valid_files:
+                    logger.error("No valid audio files found for training")
+                    checkpoint.cleanup()
+                    return False
+                
+                # Process each recording only once
+                if self.dedup_audio:
+                    progress.plan('dedup', audio_seconds(valid_files))
+                    plan_stages(valid_files)
+                    progress.start('dedup')
+                    with memory_stage('dedup'):
+                        valid_files, dedup_report = deduplicate_audio_files(
+                            valid_files, cancel_check=lambda: _check_cancelled(cancel_event, "dedup"),
+                            progress_callback=lambda f: progress.advance(audio_seconds([f])))
+                    progress.finish('dedup')
+                    self.training_report['dedup'] = dedup_report
+                    checkpoint.save_json('dedup', dedup_report)
+                    if dedup_report['skipped']:
+                        logger.info(f"Skipped {len(dedup_report['skipped'])} duplicate files "
+                                    f"({dedup_report['skipped_audio_seconds']:.1f}s audio)")
+                checkpoint.save_json('files', valid_files)
+                checkpoint.mark_stage('validated', model_name=self.model_name)
             
-            if progress_callback:
-                progress_callback(90)
+            plan_stages(valid_files)
+            progress.finish('dedup')
             
-            # Save the trained model
-            self._save_voice_model()
+            embedded = checkpoint.load_torch('embedding')
+            if embedded is not None:
+                logger.info("Resuming training run: speaker embedding already computed")
+                self.speaker_embedding = embedded['speaker_embedding']
+                # Skipped stages keep their saved report; this run's input scan stays current
+                scanned = self.training_report.get('input')
+                self.training_report.update(embedded.get('training_report', {}))
+                if scanned:
+                    self.training_report['input'] = scanned
+                progress.finish('preprocess')
+                progress.finish('embedding')
+            else:
+                # Process audio files and create speaker embedding
+                progress.start('preprocess')
+                preprocess_start = time.perf_counter()
+                with memory_stage('preprocess'):
+                    combined_audio = self._combine_audio_files(valid_files, progress,
+                                                               cancel_event, checkpoint)
+                checkpoint.mark_stage('preprocessed', model_name=self.model_name)
+                self._estimate_dedup_savings(valid_files, time.perf_counter() - preprocess_start)
+                
+                # Create speaker embedding from combined audio
+                _check_cancelled(cancel_event, "embedding")
+                progress.plan('embedding', len(combined_audio) / 44100)
+                progress.start('embedding')
+                with memory_stage('embedding'), thread_limit(self.num_threads):
+                    self.speaker_embedding = self._create_speaker_embedding(combined_audio, cancel_event,
+                                                                            progress)
+                del combined_audio
+                checkpoint.save_torch('embedding', {'speaker_embedding': self.speaker_embedding,
+                                                    'training_report': self.training_report})
+                checkpoint.mark_stage('embedded', model_name=self.model_name)
             
-            if progress_callback:
-                progress_callback(100)
+            # Save the trained model
+            _check_cancelled(cancel_event, "saving")
+            progress.start('save')
+            with memory_stage('save'):
+                saved = self._save_voice_model()
+            if not saved:
+                return False
+            checkpoint.cleanup()
+            progress.complete()
                 
             logger.info(f"Voice model '{self.model_name}' trained successfully")
             return True
             
+        except OperationCancelled as e:
+            logger.info(f"Training of '{self.model_name}' cancelled: {e}")
+            return False
         except Exception as e:
             logger.error(f"Training failed: {e}")
             return False
+        finally:
+            # Nothing will pick up the decoded audio of a run that can't be resumed
+            if checkpoint is not None and not resume:
+                checkpoint.cleanup()
     
-    def synthesize_speech(self, text: str, output_path: str = None) -> Optional[str]:
+    @profiled('synthesize')
+    def synthesize_speech(self, text: str, output_path: str = None,
+                          cancel_event=None, conditioning: Dict[str, Any] = None,
+                          sample_rate: int = None) -> Optional[str]:
         """
         Synthesize speech from text using the trained voice model.
         
         Args:
             text: Text to synthesize
             output_path: Path to save the output audio file
+            cancel_event: Optional threading.Event; synthesis stops between
+                          text segments once it is set
+            conditioning: Overrides of the conditioning settings (language,
+                          speaking_rate, pitch_std, emotion)
+            sample_rate: Sample rate of the written file, defaults to
+                         output_sample_rate
             
         Returns:
             str: Path to the generated audio file, or None if failed
@@ -233,7 +520,7 @@ class ZonosVoiceModel:
         if not self.is_loaded and not self.load_model():
             return None
             
-        if not self.speaker_embedding:
+        if self.speaker_embedding is None:
             logger.error("No voice model trained. Please train a model first.")
             return None
             
@@ -244,52 +531,345 @@ class ZonosVoiceModel:
             if not output_path:
                 output_path = os.path.join(tempfile.gettempdir(), f"zonos_output_{self.model_name}.wav")
             
-            # Synthesize speech using Zonos TTS
+            # Synthesize speech using Zonos TTS, one sentence segment at a time
             # Note: This is a placeholder implementation
             # Actual implementation would use the Zonos API
-            audio_data = self._generate_speech(text, self.speaker_embedding)
+            sample_rate = self._output_rate(sample_rate)
+            with memory_stage('conditioning'), thread_limit(self.num_threads):
+                conditioning_state = self.get_conditioning(conditioning)
+            with memory_stage('generate'):
+                segments = list(self._iter_output_audio(text, conditioning_state, sample_rate,
+                                                        cancel_event))
             
             # Save audio to file
-            sf.write(output_path, audio_data, 44100)  # Zonos outputs at 44kHz
+            with memory_stage('write'):
+                audio_data = self._concatenate_audio(segments)
+                sf.write(output_path, audio_data, sample_rate)
             
             logger.info(f"Speech synthesized successfully: {output_path}")
             return output_path
             
+        except OperationCancelled as e:
+            logger.info(f"Speech synthesis cancelled: {e}")
+            return None
         except Exception as e:
             logger.error(f"Speech synthesis failed: {e}")
             return None
     
-    def _is_valid_audio_file(self, file_path: str) -> bool:
+    def iter_speech_chunks(self, text: str, cancel_event=None,
+                           conditioning: Dict[str, Any] = None,
+                           sample_rate: int = None) -> Iterator[Any]:
+        """
+        Generate speech one sentence segment at a time, for streaming playback.
+        
+        Args:
+            text: Text to synthesize
+            cancel_event: Optional threading.Event; generation stops before
+                          the next segment once it is set
+            conditioning: Overrides of the conditioning settings (language,
+                          speaking_rate, pitch_std, emotion)
+            sample_rate: Sample rate of the chunks, defaults to output_sample_rate
+            
+        Yields:
+            Audio of one segment (float samples at sample_rate)
+        
+        Raises:
+            ValueError: If sample_rate is not one of OUTPUT_SAMPLE_RATES
+            RuntimeError: If the backend can't be loaded or no voice is loaded
+            OperationCancelled: If cancel_event is set
+        """
+        if not self.is_loaded and not self.load_model():
+            raise RuntimeError("Zonos TTS backend could not be loaded")
+        if self.speaker_embedding is None:
+            raise RuntimeError("No voice model trained. Please train a model first.")
+        
+        sample_rate = self._output_rate(sample_rate)
+        with thread_limit(self.num_threads):
+            conditioning_state = self.get_conditioning(conditioning)
+        yield from self._iter_output_audio(text, conditioning_state, sample_rate, cancel_event)
+    
+    def _output_rate(self, sample_rate: int = None) -> int:
+        """
+        Validate the output rate of one synthesis call.
+        """
+        sample_rate = int(sample_rate or self.output_sample_rate)
+        if sample_rate not in self.OUTPUT_SAMPLE_RATES:
+            raise ValueError(f"Unsupported output sample rate {sample_rate}, "
+                             f"expected one of {self.OUTPUT_SAMPLE_RATES}")
+        return sample_rate
+    
+    def _generation_rate(self, sample_rate: int) -> int:
+        """
+        Rate to generate at for an output rate. The Zonos decoder only runs
+        at its native rate; the placeholder backend generates at any rate.
+        """
+        return sample_rate if self.model is None else self.NATIVE_SAMPLE_RATE
+    
+    def _iter_output_audio(self, text: str, conditioning_state, sample_rate: int,
+                           cancel_event=None) -> Iterator[Any]:
+        """
+        Generate text segment by segment and resample to sample_rate in-stream.
+        
+        The resampler carries its filter history from one segment into the
+        next, so the concatenated chunks equal resampling the whole utterance
+        at once; its delay tail is flushed with the last segment.
+        """
+        generation_rate = self._generation_rate(sample_rate)
+        resampler = None
+        if generation_rate != sample_rate:
+            if not AUDIO_IO_AVAILABLE:
+                raise RuntimeError("Resampling synthesized audio requires NumPy and soundfile")
+            resampler = StreamingResampler(generation_rate, sample_rate)
+        
+        segments = self._split_text_segments(text)
+        for index, segment_text in enumerate(segments):
+            _check_cancelled(cancel_event, "synthesis")
+            with thread_limit(self.num_threads):
+                chunk = self._generate_speech(segment_text, conditioning_state, generation_rate)
+            if resampler is not None:
+                chunk = resampler.process(chunk)
+                if index == len(segments) - 1:
+                    chunk = np.concatenate([chunk, resampler.flush()])
+            yield chunk
+    
+    def as_async(self, executor=None):
+        """
+        asyncio front end for this model (see async_voice_model.AsyncVoiceModel).
+        """
+        from async_voice_model import AsyncVoiceModel
+        return AsyncVoiceModel(self, executor)
+    
+    @staticmethod
+    def _split_text_segments(text: str) -> List[str]:
+        """
+        Split text into sentence segments that are synthesized one by one.
+        """
+        segments = [s.strip() for s in re.split(r'(?<=[.!?;:])\s+', text)]
+        return [s for s in segments if s] or [text]
+    
+    @staticmethod
+    def _concatenate_audio(segments):
+        """
+        Concatenate generated audio segments into one array.
+        """
+        if len(segments) == 1:
+            return segments[0]
+        if np is not None:
+            return np.concatenate([np.asarray(s) for s in segments])
+        combined = segments[0]
+        for segment in segments[1:]:
+            combined = combined + segment
+        return combined
+    
+    def _is_valid_audio_file(self, file_path: str, duration: float = None) -> bool:
         """
         Check if file is a valid audio file.
+        
+        Args:
+            file_path: Path of the audio file
+            duration: Duration from the pre-pass, read from the header if None
         """
         try:
             # Check file extension
             valid_extensions = ['.wav', '.mp3', '.flac', '.ogg', '.m4a']
             if not any(file_path.lower().endswith(ext) for ext in valid_extensions):
                 return False
-                
-            # Try to load the audio file
-            audio, sample_rate = torchaudio.load(file_path)
             
-            # Basic validation: audio should be at least 1 second long
+            # Basic validation: audio should be at least 1 second long.
+            # The duration comes from the header, without decoding the file.
+            if duration is not None:
+                return duration >= 1.0
+            if AUDIO_IO_AVAILABLE:
+                return duration_seconds(file_path) >= 1.0
+            
+            audio, sample_rate = torchaudio.load(file_path)
             duration = audio.shape[1] / sample_rate
             return duration >= 1.0
             
         except Exception:
             return False
     
-    def _combine_audio_files(self, audio_files: List[str], progress_callback=None):
+    def _scan_audio_files(self, audio_files: List[str]) -> Dict[str, Optional[float]]:
         """
-        Combine multiple audio files into a single tensor.
+        Read the duration of every file from its header and record the input
+        totals in training_report['input']. Durations are None if unknown.
         """
-        combined_audio = []
+        if not AUDIO_IO_AVAILABLE:
+            return {}
+        
+        start = time.perf_counter()
+        infos = scan_audio_files(audio_files)
+        durations = {path: info.frames / info.sample_rate if info and info.sample_rate else None
+                     for path, info in infos.items()}
+        readable = [info for info in infos.values() if info]
+        self.training_report['input'] = {
+            'files': len(audio_files),
+            'audio_seconds': round(sum(d for d in durations.values() if d), 1),
+            'decoded_mb': round(sum(decoded_bytes(info) for info in readable) / 1024 / 1024, 1),
+            'scan_seconds': round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"Training input: {self.training_report['input']['audio_seconds']:.1f}s audio, "
+                    f"{self.training_report['input']['decoded_mb']:.1f} MB decoded")
+        return durations
+    
+    def _preprocessing_options(self) -> Dict[str, Any]:
+        """Options that change the preprocessed audio, part of the run fingerprint."""
+        return {'trim_silence': self.trim_silence, 'vad_options': self.vad_options,
+                'max_training_seconds': self.max_training_seconds, 'dedup_audio': self.dedup_audio}
+    
+    def _estimate_dedup_savings(self, processed_files: List[str], preprocess_seconds: float):
+        """Extrapolate the preprocessing time the skipped duplicates would have cost."""
+        report = self.training_report.get('dedup')
+        if not report or not report['skipped'] or not AUDIO_IO_AVAILABLE:
+            return
+        try:
+            processed_seconds = sum(duration_seconds(path) for path in processed_files)
+        except Exception:
+            return
+        if processed_seconds > 0:
+            per_audio_second = preprocess_seconds / processed_seconds
+            report['estimated_seconds_saved'] = max(
+                0.0, report['skipped_audio_seconds'] * per_audio_second - report['fingerprint_seconds'])
+    
+    def _combine_audio_files(self, audio_files: List[str], progress: TrainingProgress = None,
+                             cancel_event=None, checkpoint: TrainingCheckpoint = None):
+        """
+        Combine multiple audio files into one training signal.
+        
+        Files are streamed block by block (decode, mono, resample, VAD,
+        quality scoring) into per-file checkpoints on disk, so peak memory
+        does not grow with the length of the uploads and files processed by
+        an interrupted run are not decoded again. The selected audio is
+        joined on disk and returned as DiskAudio, which the speaker encoder
+        reads window by window, so memory stays bounded with or without a
+        training budget.
+        """
+        if not AUDIO_IO_AVAILABLE:
+            return self._combine_audio_files_whole(audio_files, progress, cancel_event)
+        
+        if checkpoint is None:
+            # Without a run directory the result has to be read into memory
+            with tempfile.TemporaryDirectory(prefix="stimmenklon_audio_") as work_dir:
+                combined = self._combine_audio_files(audio_files, progress, cancel_event,
+                                                     TrainingCheckpoint(work_dir))
+                return torch.from_numpy(combined[:])
+        
+        vad_stats = {}
+        segment_candidates = []
+        audio_list = []
         
         for i, file_path in enumerate(audio_files):
-            if progress_callback:
-                progress = 25 + int((i / len(audio_files)) * 40)  # 25-65% of total progress
-                progress_callback(progress)
-                
+            _check_cancelled(cancel_event, "audio processing")
+            key = f"audio/{i:05d}"
+            meta = checkpoint.load_audio_meta(key)
+            if meta is None:
+                with memory_stage('file'):
+                    meta = self._preprocess_audio_file(file_path, checkpoint, key, cancel_event,
+                                                       progress)
+            else:
+                logger.info(f"Resuming training run: {os.path.basename(file_path)} already processed")
+                if progress:
+                    progress.advance(duration_seconds(file_path))
+            
+            if meta.get('error'):
+                logger.warning(f"Failed to process {file_path}: {meta['error']}")
+                continue
+            if meta.get('vad'):
+                vad_stats[file_path] = meta['vad']
+                logger.info(f"VAD {os.path.basename(file_path)}: {meta['vad']['speech_ratio']:.0%} speech")
+            for segment in meta['candidates']:
+                segment.update({'file': file_path, 'index': len(audio_list)})
+            segment_candidates.extend(meta['candidates'])
+            audio_list.append(checkpoint.load_audio(key, meta['length']))
+        
+        if not audio_list:
+            raise ValueError("No audio files could be processed")
+        
+        vad_summary = summarize_vad(vad_stats)
+        if vad_summary:
+            self.training_report['vad'] = vad_summary
+            logger.info(f"VAD kept {vad_summary['speech_seconds']:.1f}s of "
+                        f"{vad_summary['total_seconds']:.1f}s audio "
+                        f"({vad_summary['compute_saved_ratio']:.0%} embedding compute saved)")
+            if vad_summary['speech_seconds'] == 0:
+                raise ValueError("No speech detected in training audio")
+        
+        # Keep only the best-scoring audio up to the training budget
+        with memory_stage('select_segments'):
+            if segment_candidates:
+                audio_list = self._select_training_segments(audio_list, segment_candidates)
+            
+            # Join the selected audio on disk; the encoder reads it window by window
+            combined = checkpoint.join_audio('combined', audio_list)
+        del audio_list
+        return combined
+    
+    def _preprocess_audio_file(self, file_path: str, checkpoint: TrainingCheckpoint, key: str,
+                               cancel_event=None, progress: TrainingProgress = None) -> Dict[str, Any]:
+        """
+        Stream one file into a per-file checkpoint and return its metadata.
+        Files that fail to decode are recorded with an 'error'.
+        """
+        handle = checkpoint.open_audio(key)
+        try:
+            length, candidates, vad = self._stream_audio_file(file_path, handle, cancel_event, progress)
+        except OperationCancelled:
+            checkpoint.discard_audio(handle)
+            raise
+        except Exception as e:
+            checkpoint.discard_audio(handle)
+            meta = {'file': file_path, 'error': str(e)}
+        else:
+            meta = {'file': file_path, 'length': length, 'vad': vad, 'candidates': candidates}
+            checkpoint.commit_audio(key, handle, meta)
+            return meta
+        checkpoint.save_json(key, meta)
+        return meta
+    
+    def _stream_audio_file(self, file_path: str, sink, cancel_event=None,
+                           progress: TrainingProgress = None):
+        """
+        Stream one file through resampling, VAD and quality scoring into sink
+        as raw float32 samples.
+        
+        Returns:
+            Tuple of (number of samples written, scored segment candidates, VAD stats or None)
+        """
+        vad = EnergyVAD(sample_rate=44100, **self.vad_options) if self.trim_silence else None
+        scorer = StreamingSegmentScorer(44100) if self.max_training_seconds else None
+        candidates = []
+        length = 0
+        
+        def emit(audio):
+            nonlocal length
+            if len(audio):
+                sink.write(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+                length += len(audio)
+                if scorer:
+                    candidates.extend(scorer.feed(audio))
+        
+        # Drop silence and pauses before they reach the encoder
+        for block in iter_audio_blocks(file_path, 44100):
+            _check_cancelled(cancel_event, "audio processing")
+            emit(vad.process(block) if vad else block)
+            if progress:
+                progress.advance(len(block) / 44100)
+        
+        if vad:
+            emit(vad.flush())
+        if scorer:
+            candidates.extend(scorer.finish())
+        return length, candidates, vad.stats() if vad else None
+    
+    def _combine_audio_files_whole(self, audio_files: List[str], progress: TrainingProgress = None,
+                                   cancel_event=None):
+        """
+        Decode each file in full and concatenate (fallback without NumPy/soundfile).
+        """
+        combined_audio = []
+        
+        for file_path in audio_files:
+            _check_cancelled(cancel_event, "audio processing")
             try:
                 audio, sample_rate = torchaudio.load(file_path)
                 
@@ -306,6 +886,10 @@ class ZonosVoiceModel:
                 
             except Exception as e:
                 logger.warning(f"Failed to process {file_path}: {e}")
+            
+            # Durations are unknown here, every file weighs the same
+            if progress:
+                progress.advance(1.0)
         
         if not combined_audio:
             raise ValueError("No audio files could be processed")
@@ -313,64 +897,214 @@ class ZonosVoiceModel:
         # Concatenate all audio
         return torch.cat(combined_audio, dim=0)
     
-    def _create_speaker_embedding(self, audio_tensor) -> torch.Tensor:
+    def _select_training_segments(self, audio_list, candidates: List[Dict[str, Any]]):
         """
-        Create a speaker embedding from audio tensor.
-        This is a placeholder implementation.
+        Select the top-scoring segments across all files within the training
+        budget and record per-file quality scores in the training report.
         """
-        # In a real implementation, this would use Zonos TTS's speaker encoding
-        # For now, we'll create a dummy embedding
-        logger.info("Creating speaker embedding from audio data")
+        sample_rate = 44100
+        total_samples = sum(len(audio) for audio in audio_list)
+        
+        if total_samples <= self.max_training_seconds * sample_rate:
+            selected = candidates
+            result = audio_list
+        else:
+            selected = select_best_segments(candidates, sample_rate, self.max_training_seconds)
+            result = [audio_list[s['index']].subrange(s['start'], s['end']) for s in selected]
+        
+        selected_ids = {id(s) for s in selected}
+        files = {}
+        for segment in candidates:
+            seconds = (segment['end'] - segment['start']) / sample_rate
+            entry = files.setdefault(segment['file'], {'segments': 0, 'seconds': 0.0,
+                                                       'selected_seconds': 0.0, '_scores': []})
+            entry['segments'] += 1
+            entry['seconds'] += seconds
+            entry['_scores'].append(segment)
+            if id(segment) in selected_ids:
+                entry['selected_seconds'] += seconds
+        
+        for entry in files.values():
+            scored = entry.pop('_scores')
+            for metric in ('score', 'clipping_ratio', 'snr_db', 'rms_db', 'spectral_flatness'):
+                entry[metric] = round(sum(s[metric] for s in scored) / len(scored), 4)
+            entry['seconds'] = round(entry['seconds'], 3)
+            entry['selected_seconds'] = round(entry['selected_seconds'], 3)
         
-        # Placeholder: create a random embedding
-        # Real implementation would process the audio through Zonos encoder
+        selected_seconds = sum(len(audio) for audio in result) / sample_rate
+        self.training_report['quality'] = {
+            'budget_seconds': self.max_training_seconds,
+            'total_seconds': round(total_samples / sample_rate, 3),
+            'selected_seconds': round(selected_seconds, 3),
+            'files': files,
+        }
+        logger.info(f"Quality screening: using {selected_seconds:.1f}s of "
+                    f"{total_samples / sample_rate:.1f}s (budget {self.max_training_seconds:.0f}s)")
+        return result
+    
+    def _create_speaker_embedding(self, audio_tensor, cancel_event=None,
+                                  progress: TrainingProgress = None) -> torch.Tensor:
+        """
+        Create a speaker embedding from an audio tensor or DiskAudio.
+        
+        The audio is cut into fixed-length windows, windows of equal padded
+        length are encoded in batches sized by embedding_memory_mb, and the
+        window embeddings are combined with a robust, duration-weighted mean.
+        """
+        logger.info("Creating speaker embedding from audio data")
         embedding_size = 256  # Typical embedding size
-        speaker_embedding = torch.randn(embedding_size)
+        if not DEPENDENCIES_AVAILABLE or not TORCH_AVAILABLE:
+            return torch.randn(embedding_size)
+        
+        sample_rate = 44100
+        audio = audio_tensor.reshape(-1).float() if torch.is_tensor(audio_tensor) else audio_tensor
+        windows = plan_windows(len(audio), sample_rate)
+        if not windows:
+            return torch.zeros(embedding_size)
+        
+        start = time.perf_counter()
+        embeddings, lengths = [], []
+        batches = padded_samples = 0
+        for batch in batch_windows(windows, self.embedding_memory_mb):
+            _check_cancelled(cancel_event, "embedding")
+            padded, batch_lengths = padded_batch(audio, batch)
+            with torch.inference_mode(), precision_context(self.precision):
+                embeddings.append(self._encode_windows(padded, batch_lengths, embedding_size).float())
+            lengths.append(batch_lengths)
+            batches += 1
+            padded_samples += padded.numel()
+            if progress:
+                progress.advance(int(batch_lengths.sum()) / sample_rate)
+        
+        lengths = torch.cat(lengths)
+        speaker_embedding, weights = robust_mean(torch.cat(embeddings), lengths)
+        elapsed = time.perf_counter() - start
         
+        audio_seconds = len(audio) / sample_rate
+        self.training_report['embedding'] = {
+            'windows': len(windows),
+            'batches': batches,
+            'padding_ratio': round(1.0 - int(lengths.sum()) / padded_samples, 4),
+            'downweighted_windows': int((weights < 0.5).sum()),
+            'audio_seconds': round(audio_seconds, 2),
+            'seconds': round(elapsed, 3),
+            'audio_seconds_per_second': round(audio_seconds / elapsed, 1) if elapsed > 0 else None,
+        }
+        logger.info(f"Speaker embedding from {len(windows)} windows in {batches} batches "
+                    f"({audio_seconds / max(elapsed, 1e-9):.0f} audio s/s, "
+                    f"{self.training_report['embedding']['downweighted_windows']} outlier windows)")
         return speaker_embedding
     
-    def _generate_speech(self, text: str, speaker_embedding) -> torch.Tensor:
+    def _encode_windows(self, batch, lengths, embedding_size: int) -> torch.Tensor:
+        """
+        Encode a (windows, samples) batch of zero-padded audio into
+        (windows, embedding_size) speaker embeddings.
+        This is a placeholder implementation.
+        """
+        # Real implementation would run the batch through the Zonos speaker
+        # encoder with a padding mask built from lengths; the placeholder
+        # encoder goes through the same traced/compiled wrapper
+        encoder = get_speaker_encoder(embedding_size, self.precision, self.compile_mode)
+        return encoder(batch, lengths)
+    
+    def get_conditioning(self, conditioning: Dict[str, Any] = None):
+        """
+        Speaker conditioning state of this voice for the given settings,
+        served from the process-wide conditioning cache when possible.
+        
+        Args:
+            conditioning: Overrides of the conditioning settings (language,
+                          speaking_rate, pitch_std, emotion)
+            
+        Returns:
+            Conditioning state passed to _generate_speech
+        """
+        params = normalize_conditioning(conditioning)
+        store = None
+        if self.persist_conditioning and self.model_path == self.store.path_for(self.model_name):
+            store = self.store
+        return get_conditioning_cache().get(
+            self.speaker_embedding, params,
+            lambda: self._build_conditioning(self.speaker_embedding, params),
+            store=store, voice_name=self.model_name,
+            backend_key=f"{self.precision}-{self.compile_mode}")
+    
+    def _build_conditioning(self, speaker_embedding, params: Dict[str, Any]):
+        """
+        Compute the conditioning state for a speaker embedding and normalized settings.
+        This is a placeholder implementation.
+        """
+        # Real implementation would build the Zonos conditioning dictionary
+        # (make_cond_dict) and run the prefix conditioner of self.model on it
+        if not DEPENDENCIES_AVAILABLE:
+            return dict(params, speaker=speaker_embedding)
+        
+        emotion = params['emotion'] if isinstance(params['emotion'], tuple) else ()
+        with torch.inference_mode(), precision_context(self.precision):
+            speaker = torch.as_tensor(speaker_embedding, dtype=torch.float32).reshape(-1)
+            speaker = speaker / speaker.norm().clamp(min=1e-8)
+            controls = torch.tensor([params['speaking_rate'], params['pitch_std'], *emotion],
+                                    dtype=torch.float32)
+        return {'speaker': speaker, 'controls': controls, 'language': params['language'],
+                'emotion': params['emotion']}
+    
+    def _generate_speech(self, text: str, conditioning,
+                         sample_rate: int = NATIVE_SAMPLE_RATE) -> torch.Tensor:
         """
-        Generate speech from text using speaker embedding.
+        Generate speech from text using the voice's conditioning state,
+        at sample_rate (see _generation_rate).
         This is a placeholder implementation.
         """
         # In a real implementation, this would use Zonos TTS synthesis
         logger.info("Generating speech with Zonos TTS")
         
         # Placeholder: generate dummy audio data
-        # Real implementation would call Zonos TTS with text and speaker embedding
-        sample_rate = 44100
+        # Real implementation would call Zonos TTS with text and the conditioning
+        # prefix via self.model (traced/compiled wrapper when compile_mode is set)
         duration = len(text) * 0.1  # Rough estimate: 0.1 seconds per character
         num_samples = int(sample_rate * duration)
         
-        # Generate placeholder audio (silence with slight noise)
-        audio_data = torch.randn(num_samples) * 0.01
+        # Generate placeholder audio (silence with slight noise). The backend
+        # call runs inside the precision context so bf16 autocast applies to it.
+        with precision_context(self.precision):
+            audio_data = torch.randn(num_samples) * 0.01
         
         return audio_data.numpy()
     
-    def _save_voice_model(self):
+    def _save_voice_model(self) -> bool:
         """
         Save the trained voice model.
+        
+        Returns:
+            bool: True if the model file was written
         """
         try:
-            model_dir = os.path.join(os.path.expanduser("~"), ".stimmenklon_models")
-            os.makedirs(model_dir, exist_ok=True)
-            
-            model_file = os.path.join(model_dir, f"{self.model_name}.pt")
-            
             model_data = {
                 'model_name': self.model_name,
                 'speaker_embedding': self.speaker_embedding,
                 'version': '1.0'
             }
             
-            torch.save(model_data, model_file)
-            self.model_path = model_file
-            logger.info(f"Voice model saved to: {model_file}")
+            # Published atomically under the voice's lock, with a new generation number
+            self.model_generation = self.store.save(self.model_name, model_data)
+            self.model_path = self.store.path_for(self.model_name)
+            _remember_last_used_voice(self.model_name, self.store.root)
+            logger.info(f"Voice model saved to: {self.model_path} (generation {self.model_generation})")
             
         except Exception as e:
             logger.error(f"Failed to save voice model: {e}")
+            return False
+        
+        # Keep the similarity index in sync with the stored models
+        try:
+            index = ZonosVoiceModel.get_embedding_index(self.store.root)
+            if index is not None:
+                index.add(self.model_name, self.speaker_embedding)
+        except Exception as e:
+            logger.warning(f"Failed to update embedding index: {e}")
+        return True
     
+    @profiled('load_voice')
     def load_voice_model(self, model_path: str = None) -> bool:
         """
         Load a previously trained voice model.
@@ -382,17 +1116,20 @@ class ZonosVoiceModel:
             bool: True if loaded successfully, False otherwise
         """
         try:
-            if not model_path:
-                model_dir = os.path.join(os.path.expanduser("~"), ".stimmenklon_models")
-                model_path = os.path.join(model_dir, f"{self.model_name}.pt")
+            if model_path:
+                model_data = torch.load(model_path, map_location='cpu') if os.path.exists(model_path) else None
+            else:
+                model_path = self.store.path_for(self.model_name)
+                model_data = self.store.load(self.model_name)
             
-            if not os.path.exists(model_path):
+            if model_data is None:
                 logger.error(f"Model file not found: {model_path}")
                 return False
             
-            model_data = torch.load(model_path, map_location='cpu')
             self.speaker_embedding = model_data['speaker_embedding']
             self.model_path = model_path
+            self.model_generation = model_data.get('generation')
+            _remember_last_used_voice(self.model_name, self.store.root)
             
             logger.info(f"Voice model loaded from: {model_path}")
             return True
@@ -402,28 +1139,260 @@ class ZonosVoiceModel:
             return False
     
     @staticmethod
-    def list_available_models() -> List[str]:
+    def list_available_models(model_dir: str = None) -> List[str]:
         """
         List all available trained voice models.
         
+        Args:
+            model_dir: Model store root, or None for the default store
+            
         Returns:
             List of model names
         """
         try:
-            model_dir = os.path.join(os.path.expanduser("~"), ".stimmenklon_models")
-            if not os.path.exists(model_dir):
-                return []
+            return get_model_store(model_dir).list_names()
+        except Exception as e:
+            logger.error(f"Failed to list models: {e}")
+            return []
+    
+    @staticmethod
+    def delete_voice_model(name: str, model_dir: str = None) -> bool:
+        """
+        Delete a trained voice model and drop it from the similarity index.
+        
+        Args:
+            name: Voice model name
+            model_dir: Model store root, or None for the default store
             
-            models = []
-            for file in os.listdir(model_dir):
-                if file.endswith('.pt'):
-                    models.append(file[:-3])  # Remove .pt extension
+        Returns:
+            bool: True if the model existed and was deleted
+        """
+        deleted = get_model_store(model_dir).delete(name)
+        try:
+            index = ZonosVoiceModel.get_embedding_index(model_dir)
+            if index is not None:
+                index.remove(name)
+        except Exception as e:
+            logger.warning(f"Failed to update embedding index: {e}")
+        return deleted
+    
+    @staticmethod
+    def get_embedding_index(model_dir: str = None) -> Optional[EmbeddingIndex]:
+        """
+        Open the similarity index of all stored speaker embeddings.
+        
+        Args:
+            model_dir: Model store root, or None for the default store
             
-            return models
+        Returns:
+            EmbeddingIndex, or None if NumPy or torch are not available
+        """
+        if not (DEPENDENCIES_AVAILABLE and NUMPY_AVAILABLE):
+            return None
+        return EmbeddingIndex(get_model_store(model_dir).root)
+    
+    @staticmethod
+    def rebuild_embedding_index(model_dir: str = None) -> int:
+        """
+        Rebuild the similarity index from all stored model files.
+        
+        Args:
+            model_dir: Model store root, or None for the default store
+            
+        Returns:
+            Number of indexed voices
+        """
+        index = ZonosVoiceModel.get_embedding_index(model_dir)
+        if index is None:
+            return 0
+        
+        store = get_model_store(model_dir)
+        embeddings = {}
+        for name in store.list_names():
+            try:
+                model_data = store.load(name)
+                embeddings[name] = model_data['speaker_embedding']
+            except Exception as e:
+                logger.warning(f"Skipping {name} while indexing: {e}")
+        
+        index.rebuild(embeddings)
+        logger.info(f"Embedding index rebuilt with {len(embeddings)} voices")
+        return len(embeddings)
+
+
+# Model stores by root directory, shared by all voice models of the process
+_model_stores: Dict[str, ModelStore] = {}
+_model_stores_lock = threading.Lock()
+
+
+def get_model_store(model_dir: str = None) -> ModelStore:
+    """
+    Return the voice model store rooted at model_dir (default: STIMMENKLON_MODEL_DIR
+    or ~/.stimmenklon_models). Opening a store starts a background migration
+    of voices still in the old flat layout.
+    """
+    root = os.path.abspath(model_dir or default_model_dir())
+    with _model_stores_lock:
+        store = _model_stores.get(root)
+        if store is None:
+            store = ModelStore(root, torch.save, lambda path: torch.load(path, map_location='cpu'))
+            _model_stores[root] = store
+            store.start_background_migration()
+        return store
+
+
+def _last_used_voice_file(model_dir: str = None) -> str:
+    return os.path.join(model_dir or get_model_store().root, ".last_used")
+
+
+def _remember_last_used_voice(model_name: str, model_dir: str = None):
+    """
+    Record the most recently trained or loaded voice for pre-warming.
+    """
+    try:
+        path = _last_used_voice_file(model_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(model_name)
+    except OSError as e:
+        logger.debug(f"Could not record last used voice: {e}")
+
+
+def get_last_used_voice(model_dir: str = None) -> Optional[str]:
+    """
+    Return the name of the most recently trained or loaded voice, if any.
+    """
+    try:
+        with open(_last_used_voice_file(model_dir), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+        return name or None
+    except OSError:
+        return None
+
+
+class ModelPrewarmer:
+    """
+    Loads the shared backend (and optionally a voice) in the background and
+    runs a tiny dummy inference, so the first user request doesn't pay the
+    model load and first-inference warm-up.
+    
+    Progress and readiness are exposed via `state`, `progress` and listeners.
+    """
+    
+    STATE_IDLE = 'idle'
+    STATE_LOADING = 'loading'
+    STATE_WARMING = 'warming'
+    STATE_READY = 'ready'
+    STATE_FAILED = 'failed'
+    
+    WARMUP_TEXT = "Hallo."
+    
+    def __init__(self, voice_name: str = None, run_dummy_inference: bool = True):
+        """
+        Initialize the pre-warmer.
+        
+        Args:
+            voice_name: Voice to load as well, or None for the backend only
+            run_dummy_inference: Whether to run a short warm-up synthesis
+        """
+        self.voice_name = voice_name
+        self.run_dummy_inference = run_dummy_inference
+        self.state = self.STATE_IDLE
+        self.progress = 0
+        self.error = None
+        self.voice_model = None
+        self.timings: Dict[str, float] = {}
+        self._listeners = []
+        self._done = threading.Event()
+        self._thread = None
+    
+    def add_listener(self, callback):
+        """
+        Register a callback(state, progress) called on every state change.
+        Callbacks run on the pre-warm thread.
+        """
+        self._listeners.append(callback)
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.state == self.STATE_READY
+    
+    def start(self) -> threading.Thread:
+        """
+        Run the pre-warm on a background daemon thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="ModelPrewarmer", daemon=True)
+            self._thread.start()
+        return self._thread
+    
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for the pre-warm to finish.
+        
+        Returns:
+            bool: True if the backend is ready
+        """
+        self._done.wait(timeout)
+        return self.is_ready
+    
+    def run(self) -> bool:
+        """
+        Run the pre-warm synchronously.
+        
+        Returns:
+            bool: True if the backend is ready
+        """
+        start = time.perf_counter()
+        try:
+            self._set_state(self.STATE_LOADING, 10)
+            voice_model = ZonosVoiceModel(self.voice_name or "prewarm")
+            if not voice_model.load_model():
+                raise RuntimeError("Zonos TTS backend could not be loaded")
+            self.timings['backend_load_seconds'] = time.perf_counter() - start
+            
+            if self.voice_name:
+                self._set_state(self.STATE_LOADING, 50)
+                voice_start = time.perf_counter()
+                if voice_model.load_voice_model():
+                    self.voice_model = voice_model
+                else:
+                    logger.warning(f"Pre-warm: voice '{self.voice_name}' not available")
+                self.timings['voice_load_seconds'] = time.perf_counter() - voice_start
+            
+            if self.run_dummy_inference:
+                self._set_state(self.STATE_WARMING, 70)
+                warmup_start = time.perf_counter()
+                if voice_model.speaker_embedding is not None:
+                    # Also leaves the voice's conditioning state in the cache
+                    conditioning = voice_model.get_conditioning()
+                else:
+                    conditioning = voice_model._build_conditioning(torch.randn(256),
+                                                                   normalize_conditioning())
+                voice_model._generate_speech(self.WARMUP_TEXT, conditioning)
+                self.timings['warmup_inference_seconds'] = time.perf_counter() - warmup_start
+            
+            self.timings['total_seconds'] = time.perf_counter() - start
+            logger.info(f"Pre-warm finished in {self.timings['total_seconds']:.2f}s")
+            self._set_state(self.STATE_READY, 100)
+            return True
             
         except Exception as e:
-            logger.error(f"Failed to list models: {e}")
-            return []
+            self.error = str(e)
+            logger.warning(f"Pre-warm failed: {e}")
+            self._set_state(self.STATE_FAILED, 100)
+            return False
+        finally:
+            self._done.set()
+    
+    def _set_state(self, state: str, progress: int):
+        self.state = state
+        self.progress = progress
+        for callback in self._listeners:
+            try:
+                callback(state, progress)
+            except Exception as e:
+                logger.debug(f"Pre-warm listener failed: {e}")
 
 
 def check_zonos_installation() -> bool: